@@ -7,6 +7,7 @@ Manages cards, canon (facts/timeline/character states), and generates scene brie
 import yaml
 from typing import Dict, Any, List, Optional
 from app.agents.base import BaseAgent
+from app.context_engine.mentions import get_mention_detector
 from app.schemas.draft import SceneBrief, ChapterSummary
 from app.schemas.canon import Fact, TimelineEvent, CharacterState
 
@@ -77,17 +78,36 @@ Output Format:
         Returns:
             Result with scene_brief / 包含场景简报的结果
         """
+        snapshot = context.get("snapshot")
+        
         # Load relevant cards / 加载相关卡片
-        style_card = await self.card_storage.get_style_card(project_id)
-        rules_card = await self.card_storage.get_rules_card(project_id)
+        if snapshot:
+            style_card = snapshot.style_card
+            rules_card = snapshot.rules_card
+        else:
+            style_card = await self.card_storage.get_style_card(project_id)
+            rules_card = await self.card_storage.get_rules_card(project_id)
         
-        # Get character names from context or load all / 从上下文获取角色名称或加载全部
+        # Get character names from context or detect mentions in goal/title
+        # 从上下文获取角色名称，否则检测章节目标/标题中提到的角色
         character_names = context.get("characters", [])
         if not character_names:
-            character_names = await self.card_storage.list_character_cards(project_id)
+            detector = await get_mention_detector(self.card_storage, project_id)
+            counts = detector.scan([
+                context.get("chapter_goal", ""),
+                context.get("chapter_title", "")
+            ])["characters"]
+            character_names = sorted(counts, key=lambda n: -counts[n])
         
         characters = []
-        for name in character_names[:5]:  # Limit to 5 characters / 限制为5个角色
+        for name in character_names:
+            card = snapshot.get_character_card(name) if snapshot else None
+            if card:
+                characters.append({
+                    "card": card,
+                    "state": snapshot.get_character_state(name)
+                })
+                continue
             card = await self.card_storage.get_character_card(project_id, name)
             if card:
                 # Get current state / 获取当前状态
@@ -97,17 +117,21 @@ Output Format:
                     "state": state
                 })
         
-        # Load timeline events near current chapter (MVP-2 Week 6)
-        # 加载邻近章节的时间线事件（MVP-2 第6周）
-        recent_events = await self.canon_storage.get_timeline_events_near_chapter(
-            project_id=project_id,
-            chapter=chapter,
-            window=3,
-            max_events=10,
-        )
+        if snapshot:
+            recent_events = list(snapshot.near_timeline)
+            facts = list(snapshot.facts)
+        else:
+            # Load timeline events near current chapter (MVP-2 Week 6)
+            # 加载邻近章节的时间线事件（MVP-2 第6周）
+            recent_events = await self.canon_storage.get_timeline_events_near_chapter(
+                project_id=project_id,
+                chapter=chapter,
+                window=3,
+                max_events=10,
+            )
+            facts = await self.canon_storage.get_all_facts(project_id)
         
         # Load recent facts / 加载最近的事实
-        facts = await self.canon_storage.get_all_facts(project_id)
         recent_facts = facts[-10:] if facts else []  # Last 10 facts / 最近10条事实
         
         # Generate scene brief using LLM / 使用大模型生成场景简报
@@ -119,7 +143,8 @@ Output Format:
             timeline_events=recent_events,
             facts=recent_facts,
             style_card=style_card,
-            rules_card=rules_card
+            rules_card=rules_card,
+            context_blocks=snapshot.blocks if snapshot else None
         )
         
         # Parse and save scene brief / 解析并保存场景简报
@@ -141,7 +166,8 @@ Output Format:
         timeline_events: List,
         facts: List,
         style_card: Any,
-        rules_card: Any
+        rules_card: Any,
+        context_blocks: Optional[Dict[str, str]] = None
     ) -> str:
         """
         Generate scene brief using LLM
@@ -156,6 +182,8 @@ Output Format:
             facts: Recent facts / 最近的事实
             style_card: Style card / 文风卡
             rules_card: Rules card / 规则卡
+            context_blocks: Shared snapshot blocks; replace the facts/style/rules items
+                            共享快照块；提供时替代事实/文风/规则条目
             
         Returns:
             Generated scene brief in YAML format / YAML格式的场景简报
@@ -187,27 +215,30 @@ Output Format:
                 )
             context_items.append("".join(timeline_info))
         
-        # Add facts / 添加事实
-        if facts:
-            facts_info = ["Recent Facts:"]
-            for fact in facts:
-                facts_info.append(f"\n- {fact.statement}")
-            context_items.append("".join(facts_info))
-        
-        # Add style / 添加文风
-        if style_card:
-            style_info = f"""Writing Style:
+        # Facts, style and rules come from the shared blocks when available
+        # 若提供共享块，则事实、文风与规则由共享块提供
+        if not context_blocks:
+            # Add facts / 添加事实
+            if facts:
+                facts_info = ["Recent Facts:"]
+                for fact in facts:
+                    facts_info.append(f"\n- {fact.statement}")
+                context_items.append("".join(facts_info))
+            
+            # Add style / 添加文风
+            if style_card:
+                style_info = f"""Writing Style:
 - Narrative Distance: {style_card.narrative_distance}
 - Pacing: {style_card.pacing}
 - Sentence Structure: {style_card.sentence_structure}"""
-            context_items.append(style_info)
-        
-        # Add rules / 添加规则
-        if rules_card and rules_card.forbidden_actions:
-            rules_info = "Forbidden Actions:\n" + "\n".join(
-                [f"- {action}" for action in rules_card.forbidden_actions]
-            )
-            context_items.append(rules_info)
+                context_items.append(style_info)
+            
+            # Add rules / 添加规则
+            if rules_card and rules_card.forbidden_actions:
+                rules_info = "Forbidden Actions:\n" + "\n".join(
+                    [f"- {action}" for action in rules_card.forbidden_actions]
+                )
+                context_items.append(rules_info)
         
         # Build user prompt / 构建用户提示
         user_prompt = f"""Generate a scene brief for:
@@ -258,7 +289,8 @@ Generate the YAML only, no additional text.
         messages = self.build_messages(
             system_prompt=self.get_system_prompt(),
             user_prompt=user_prompt,
-            context_items=context_items
+            context_items=context_items,
+            context_blocks=context_blocks
         )
         
         response = await self.call_llm(messages)
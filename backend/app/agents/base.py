@@ -4,12 +4,28 @@ Common functionality for all agents
 所有 Agent 的通用功能
 """
 
+import re
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
-from app.llm_gateway import LLMGateway
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+from app.config import config
+from app.llm_gateway import LLMGateway, DeltaCoalescer
 from app.storage import CardStorage, CanonStorage, DraftStorage
 
 
+# Shared context blocks ordered from most to least stable; each tuple is one
+# prompt-cache segment (cards, canon, previous summaries)
+# 共享上下文块按从稳定到易变排序；每个元组是一个提示缓存分段（卡片、事实表、前文摘要）
+CONTEXT_SEGMENTS = (
+    ("rules", "style", "world", "characters"),
+    ("facts", "timeline", "character_states"),
+    ("summaries",),
+)
+
+# Paragraph reference in an issue location, e.g. "paragraph 3", "Para 3", "第3段"
+# 问题位置中的段落引用，如 "paragraph 3"、"Para 3"、"第3段"
+_PARAGRAPH_REF = re.compile(r"para(?:graph)?\s*#?\s*(\d+)|第\s*(\d+)\s*段", re.IGNORECASE)
+
+
 class BaseAgent(ABC):
     """
     Abstract base class for all agents
@@ -79,18 +95,65 @@ class BaseAgent(ABC):
         """
         return f"You are a {self.get_agent_name()} agent for novel writing."
     
+    def supports_prompt_cache(self) -> bool:
+        """
+        Whether this agent's provider reuses cached prompt prefixes
+        此 Agent 的提供商是否复用已缓存的提示前缀
+        """
+        provider = self.gateway.providers.get(
+            self.gateway.get_provider_for_agent(self.get_agent_name())
+        )
+        return bool(provider and provider.supports_prompt_cache)
+    
+    def _split_into_paragraphs(self, text: str) -> List[str]:
+        """Split text into paragraphs (by double newline or single newline for Chinese)."""
+        # Split by double newline first
+        paragraphs = re.split(r'\n\s*\n', text)
+        # Further split single-newline separated lines if they're substantial
+        result = []
+        for para in paragraphs:
+            para = para.strip()
+            if para:
+                result.append(para)
+        return result
+    
+    def _parse_paragraph_index(self, location: str) -> Optional[int]:
+        """
+        Parse paragraph index from an issue location
+        从问题位置中解析段落索引
+        
+        Args:
+            location: Issue location text / 问题位置文本
+            
+        Returns:
+            Paragraph index or None / 段落索引或None
+        """
+        match = _PARAGRAPH_REF.search(location or "")
+        if not match:
+            return None
+        return int(match.group(1) or match.group(2))
+    
     async def call_llm(
         self,
-        messages: List[Dict[str, str]],
-        temperature: Optional[float] = None
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float] = None,
+        on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
+        max_tokens: Optional[int] = None
     ) -> str:
         """
         Call LLM with agent-specific configuration
         使用 Agent 特定配置调用大模型
         
+        When on_delta is given the response is streamed and the callback
+        receives coalesced text frames (see llm.streaming in config.yaml).
+        传入 on_delta 时以流式方式获取响应，回调接收合并后的文本帧
+        （见 config.yaml 中的 llm.streaming）。
+        
         Args:
             messages: Message list / 消息列表
             temperature: Temperature override / 温度覆盖
+            on_delta: Optional async callback for streamed text / 可选的流式文本异步回调
+            max_tokens: Output limit override / 输出上限覆盖
             
         Returns:
             LLM response content / 大模型响应内容
@@ -101,11 +164,31 @@ class BaseAgent(ABC):
         if temperature is None:
             temperature = self.gateway.get_temperature_for_agent(agent_name)
         
-        response = await self.gateway.chat(
+        streaming_config = config.get("llm", {}).get("streaming", {})
+        if on_delta is None or not streaming_config.get("enabled", True):
+            response = await self.gateway.chat(
+                messages=messages,
+                provider=provider,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                agent=agent_name
+            )
+            return response["content"]
+        
+        coalescer = DeltaCoalescer(
+            on_flush=on_delta,
+            interval=streaming_config.get("flush_interval_ms", 100) / 1000,
+            max_chars=streaming_config.get("flush_chars", 200)
+        )
+        response = await self.gateway.chat_stream(
             messages=messages,
             provider=provider,
-            temperature=temperature
+            temperature=temperature,
+            max_tokens=max_tokens,
+            on_delta=coalescer.push,
+            agent=agent_name
         )
+        await coalescer.close()
         
         return response["content"]
     
@@ -113,24 +196,46 @@ class BaseAgent(ABC):
         self,
         system_prompt: str,
         user_prompt: str,
-        context_items: Optional[List[str]] = None
-    ) -> List[Dict[str, str]]:
+        context_items: Optional[List[str]] = None,
+        context_blocks: Optional[Dict[str, str]] = None
+    ) -> List[Dict[str, Any]]:
         """
         Build message list for LLM
         构建发送给大模型的消息列表
         
+        Messages are laid out from most to least stable so that providers can
+        reuse the cached prompt prefix: system prompt, shared context blocks
+        (see CONTEXT_SEGMENTS), then volatile context items and the prompt.
+        The last message of each stable segment is marked with
+        "cache_breakpoint"; providers strip the marker before sending.
+        消息按从稳定到易变排列，便于提供商复用已缓存的提示前缀：系统提示词、
+        共享上下文块（见 CONTEXT_SEGMENTS），然后是易变上下文项与提示。
+        每个稳定分段的最后一条消息带 "cache_breakpoint" 标记，提供商发送前会移除。
+        
         Args:
             system_prompt: System prompt / 系统提示词
             user_prompt: User prompt / 用户提示词
-            context_items: Additional context items / 额外上下文项
+            context_items: Volatile context items (brief, draft...) / 易变上下文项（简报、草稿等）
+            context_blocks: Shared context blocks by name / 按名称的共享上下文块
             
         Returns:
             Message list / 消息列表
         """
-        messages = [
-            {"role": "system", "content": system_prompt}
+        messages: List[Dict[str, Any]] = [
+            {"role": "system", "content": system_prompt, "cache_breakpoint": True}
         ]
         
+        # Add stable shared blocks, one message per segment / 按分段添加稳定的共享块
+        if context_blocks:
+            for segment in CONTEXT_SEGMENTS:
+                texts = [context_blocks[name] for name in segment if context_blocks.get(name)]
+                if texts:
+                    messages.append({
+                        "role": "user",
+                        "content": "\n\n".join(texts),
+                        "cache_breakpoint": True
+                    })
+        
         # Add context if provided / 添加上下文
         if context_items:
             context_text = "\n\n".join(context_items)
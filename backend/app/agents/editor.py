@@ -5,8 +5,7 @@ Revises drafts based on review feedback
 """
 
 import yaml
-import re
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Set, Tuple, Callable, Awaitable
 from app.agents.base import BaseAgent
 
 
@@ -67,7 +66,8 @@ Output: Revised draft with clear, engaging prose
         Args:
             project_id: Project ID / 项目ID
             chapter: Chapter ID / 章节ID
-            context: Context with draft_version, user_feedback / 包含草稿版本和用户反馈的上下文
+            context: Context with draft_version, user_feedback, optional incremental flag and on_delta
+                     包含草稿版本、用户反馈及可选增量标记与流式回调的上下文
             
         Returns:
             Result with revised draft / 包含修订稿的结果
@@ -92,17 +92,38 @@ Output: Revised draft with clear, engaging prose
             }
         
         # Load style card / 加载文风卡
-        style_card = await self.card_storage.get_style_card(project_id)
+        snapshot = context.get("snapshot")
+        if snapshot:
+            style_card = snapshot.style_card
+        else:
+            style_card = await self.card_storage.get_style_card(project_id)
         
         # Get user feedback if provided / 获取用户反馈（如果有）
         user_feedback = context.get("user_feedback", "")
         
+        # Incremental mode: send only the paragraphs the review points at.
+        # User feedback may target any paragraph, so it always gets the whole draft
+        # 增量模式：只发送审稿意见指向的段落。
+        # 用户反馈可能涉及任意段落，因此有反馈时始终发送全文
+        focus = None
+        if context.get("incremental") and not (user_feedback or "").strip():
+            focus = self._focus_paragraphs(review, len(self._split_into_paragraphs(draft.content)))
+        
+        # Shared blocks are resent in incremental mode only when the provider caches them
+        # 增量模式下仅当提供商缓存共享块时才重发
+        context_blocks = None
+        if snapshot and (focus is None or self.supports_prompt_cache()):
+            context_blocks = snapshot.blocks
+        
         # Generate edit instructions / 生成编辑指令
         edit_instructions_raw = await self._generate_edit_instructions(
             original_draft=draft.content,
             review=review,
             style_card=style_card,
-            user_feedback=user_feedback
+            user_feedback=user_feedback,
+            context_blocks=context_blocks,
+            focus=focus,
+            on_delta=context.get("on_delta")
         )
 
         # Parse and apply edit instructions / 解析并应用编辑指令
@@ -110,7 +131,8 @@ Output: Revised draft with clear, engaging prose
             edit_instructions = self._parse_edit_instructions(edit_instructions_raw)
             revised_content, change_rate = self._apply_edit_instructions(
                 original_draft=draft.content,
-                instructions=edit_instructions
+                instructions=edit_instructions,
+                editable=set(focus) if focus is not None else None
             )
             
             # Validate change magnitude / 验证改动幅度
@@ -122,10 +144,17 @@ Output: Revised draft with clear, engaging prose
                 # For now, accept but log warning; future: implement retry logic
                 # 目前接受但记录警告；未来：实现重试逻辑
         except Exception as e:
-            print(f"[Editor] Failed to parse/apply edit instructions: {e}, falling back to direct revision")
-            # Fallback: try to extract revised_draft directly
-            # 回退：尝试直接提取 revised_draft
-            revised_content = self._extract_revised_draft_fallback(edit_instructions_raw)
+            if focus is not None:
+                # The model only saw part of the draft, so its raw output cannot
+                # stand in for the whole chapter; keep the draft unchanged
+                # 模型只看到部分草稿，其原始输出不能替代全文；保持草稿不变
+                print(f"[Editor] Failed to parse/apply edit instructions: {e}, keeping draft unchanged")
+                revised_content = draft.content
+            else:
+                print(f"[Editor] Failed to parse/apply edit instructions: {e}, falling back to direct revision")
+                # Fallback: try to extract revised_draft directly
+                # 回退：尝试直接提取 revised_draft
+                revised_content = self._extract_revised_draft_fallback(edit_instructions_raw)
         
         # Calculate new version number / 计算新版本号
         new_version = self._increment_version(draft_version)
@@ -194,22 +223,11 @@ Output: Revised draft with clear, engaging prose
 
         return content.strip()
     
-    def _split_into_paragraphs(self, text: str) -> List[str]:
-        """Split text into paragraphs (by double newline or single newline for Chinese)."""
-        # Split by double newline first
-        paragraphs = re.split(r'\n\s*\n', text)
-        # Further split single-newline separated lines if they're substantial
-        result = []
-        for para in paragraphs:
-            para = para.strip()
-            if para:
-                result.append(para)
-        return result
-    
     def _apply_edit_instructions(
         self,
         original_draft: str,
-        instructions: List[Dict[str, Any]]
+        instructions: List[Dict[str, Any]],
+        editable: Optional[Set[int]] = None
     ) -> Tuple[str, float]:
         """Apply edit instructions to original draft and return (revised_draft, change_rate).
         
@@ -218,6 +236,9 @@ Output: Revised draft with clear, engaging prose
         - insert: insert new_text before paragraph at index
         - delete: delete paragraph at index
         - rewrite: rewrite paragraph at index with new_text (alias for replace)
+        
+        When `editable` is given, replace/delete are limited to those paragraphs
+        (the only ones the editor has seen in full).
         """
         paragraphs = self._split_into_paragraphs(original_draft)
         original_char_count = len(original_draft)
@@ -239,6 +260,10 @@ Output: Revised draft with clear, engaging prose
                 print(f"[Editor] Invalid paragraph_index {idx}, skipping")
                 continue
             
+            if editable is not None and op != 'insert' and idx not in editable:
+                print(f"[Editor] Paragraph {idx} was not shown in full, skipping {op}")
+                continue
+            
             if op in ['replace', 'rewrite']:
                 old_para = paragraphs[idx]
                 paragraphs[idx] = new_text
@@ -258,12 +283,37 @@ Output: Revised draft with clear, engaging prose
         
         return revised_draft, change_rate
     
+    def _focus_paragraphs(self, review: Any, paragraph_count: int) -> Optional[List[int]]:
+        """
+        Paragraphs referenced by review issues, or None if the whole draft is needed
+        审稿问题涉及的段落；若需要全文则返回 None
+
+        Args:
+            review: Review result / 审稿结果
+            paragraph_count: Number of draft paragraphs / 草稿段落数
+
+        Returns:
+            Sorted paragraph indices or None / 有序段落索引或None
+        """
+        focus = set()
+        for issue in review.issues:
+            idx = self._parse_paragraph_index(issue.location)
+            if idx is None or idx >= paragraph_count:
+                # Issue without a usable location needs the whole draft
+                # 没有可用位置的问题需要全文
+                return None
+            focus.add(idx)
+        return sorted(focus) if focus else None
+    
     async def _generate_edit_instructions(
         self,
         original_draft: str,
         review: Any,
         style_card: Any,
-        user_feedback: str
+        user_feedback: str,
+        context_blocks: Optional[Dict[str, str]] = None,
+        focus: Optional[List[int]] = None,
+        on_delta: Optional[Callable[[str], Awaitable[None]]] = None
     ) -> str:
         """
         Generate edit instructions using LLM
@@ -274,6 +324,11 @@ Output: Revised draft with clear, engaging prose
             review: Review result / 审稿结果
             style_card: Style card / 文风卡
             user_feedback: User feedback / 用户反馈
+            context_blocks: Shared snapshot blocks; replace the style item
+                            共享快照块；提供时替代文风条目
+            focus: Paragraph indices to send (None = whole draft)
+                   需发送的段落索引（None 表示全文）
+            on_delta: Optional callback for streamed output / 可选的流式输出回调
             
         Returns:
             Edit instructions in YAML format / YAML 格式的编辑指令
@@ -283,11 +338,20 @@ Output: Revised draft with clear, engaging prose
         
         # Split draft into numbered paragraphs for reference / 将草稿分段并编号以供引用
         paragraphs = self._split_into_paragraphs(original_draft)
-        numbered_draft = []
-        for idx, para in enumerate(paragraphs):
-            numbered_draft.append(f"[Para {idx}]\n{para}")
-        
-        context_items.append("Original Draft (numbered by paragraph):\n" + "\n\n".join(numbered_draft))
+        if focus is None:
+            numbered_draft = []
+            for idx, para in enumerate(paragraphs):
+                numbered_draft.append(f"[Para {idx}]\n{para}")
+            
+            context_items.append("Original Draft (numbered by paragraph):\n" + "\n\n".join(numbered_draft))
+        else:
+            numbered_draft = [f"[Para {idx}]\n{paragraphs[idx]}" for idx in focus]
+            context_items.append(
+                f"Paragraphs to Revise (the draft has {len(paragraphs)} paragraphs; "
+                "only these are shown, do not replace or delete any other paragraph):\n"
+                "待修订段落（仅展示这些段落，不要替换或删除其他段落）：\n"
+                + "\n\n".join(numbered_draft)
+            )
         
         # Add review issues / 添加审稿问题
         if review.issues:
@@ -335,8 +399,9 @@ Output: Revised draft with clear, engaging prose
         if user_feedback:
             context_items.append(f"User Feedback:\n{user_feedback}")
         
-        # Add style requirements / 添加文风要求
-        if style_card:
+        # Add style requirements unless the shared blocks carry the style card
+        # 添加文风要求（共享块已包含文风卡时跳过）
+        if style_card and not context_blocks:
             context_items.append(f"""Style Requirements:
 - Narrative Distance: {style_card.narrative_distance}
 - Pacing: {style_card.pacing}
@@ -414,10 +479,11 @@ edit_instructions:
         messages = self.build_messages(
             system_prompt=self.get_system_prompt(),
             user_prompt=user_prompt,
-            context_items=context_items
+            context_items=context_items,
+            context_blocks=context_blocks
         )
         
-        return await self.call_llm(messages)
+        return await self.call_llm(messages, on_delta=on_delta)
     
     def _increment_version(self, current_version: str) -> str:
         """
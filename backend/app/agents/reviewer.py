@@ -4,8 +4,9 @@ Reviews drafts and identifies issues
 审核草稿并识别问题
 """
 
+import difflib
 import yaml
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from app.agents.base import BaseAgent
 from app.schemas.draft import ReviewResult, Issue
 
@@ -67,7 +68,8 @@ Output Format: YAML with structured issues list
         Args:
             project_id: Project ID / 项目ID
             chapter: Chapter ID / 章节ID
-            context: Context with draft_version / 包含草稿版本的上下文
+            context: Context with draft_version, optional incremental flag
+                     包含草稿版本及可选增量标记的上下文
             
         Returns:
             Result with review / 包含审稿结果的结果
@@ -85,8 +87,13 @@ Output Format: YAML with structured issues list
         # Load scene brief / 加载场景简报
         scene_brief = await self.draft_storage.get_scene_brief(project_id, chapter)
         
+        snapshot = context.get("snapshot")
+        
         # Load relevant cards / 加载相关卡片
-        style_card = await self.card_storage.get_style_card(project_id)
+        if snapshot:
+            style_card = snapshot.style_card
+        else:
+            style_card = await self.card_storage.get_style_card(project_id)
         
         # Load character cards mentioned in scene brief / 加载场景简报中提到的角色卡
         character_cards = []
@@ -94,26 +101,81 @@ Output Format: YAML with structured issues list
             for char_info in scene_brief.characters:
                 char_name = char_info.get("name")
                 if char_name:
-                    card = await self.card_storage.get_character_card(project_id, char_name)
+                    card = snapshot.get_character_card(char_name) if snapshot else None
+                    if not card:
+                        card = await self.card_storage.get_character_card(project_id, char_name)
                     if card:
                         character_cards.append(card)
         
         # Load facts and timeline / 加载事实和时间线
-        facts = await self.canon_storage.get_all_facts(project_id)
-        timeline_events = await self.canon_storage.get_all_timeline_events(project_id)
+        if snapshot:
+            facts = list(snapshot.facts)
+            timeline_events = list(snapshot.timeline)
+        else:
+            facts = await self.canon_storage.get_all_facts(project_id)
+            timeline_events = await self.canon_storage.get_all_timeline_events(project_id)
         
-        # Generate review / 生成审稿意见
-        review_content = await self._generate_review(
-            draft=draft,
-            scene_brief=scene_brief,
-            character_cards=character_cards,
-            facts=facts,
-            timeline_events=timeline_events,
-            style_card=style_card
-        )
+        paragraphs = self._split_into_paragraphs(draft.content)
+        
+        # Incremental mode: review only paragraphs changed since the last review
+        # 增量模式：仅审核自上次审稿以来改动过的段落
+        previous_review = None
+        base_draft = None
+        if context.get("incremental"):
+            previous_review = await self.draft_storage.get_review(project_id, chapter)
+            # An unparsed review never covered the unchanged paragraphs, so review everything
+            # 未解析的审稿从未覆盖未改动段落，因此全文重审
+            if (
+                previous_review
+                and previous_review.draft_version != draft_version
+                and not previous_review.parse_failed
+            ):
+                base_draft = await self.draft_storage.get_draft(
+                    project_id, chapter, previous_review.draft_version
+                )
+        
+        if base_draft:
+            index_map, changed = self._diff_paragraphs(
+                self._split_into_paragraphs(base_draft.content),
+                paragraphs
+            )
+        else:
+            index_map, changed = {}, list(range(len(paragraphs)))
+        
+        # Shared blocks are resent in incremental mode only when the provider
+        # caches them; otherwise the compact card/canon items are used
+        # 增量模式下仅当提供商缓存共享块时才重发，否则使用精简的卡片/事实条目
+        context_blocks = None
+        if snapshot and (not base_draft or self.supports_prompt_cache()):
+            context_blocks = snapshot.blocks
+        
+        if base_draft and not changed:
+            # Nothing changed since the last review / 自上次审稿以来无改动
+            review_result = ReviewResult(
+                chapter=chapter,
+                draft_version=draft_version,
+                issues=[],
+                overall_assessment=previous_review.overall_assessment,
+                can_proceed=True
+            )
+        else:
+            # Generate review / 生成审稿意见
+            review_content = await self._generate_review(
+                paragraphs=paragraphs,
+                scene_brief=scene_brief,
+                character_cards=character_cards,
+                facts=facts,
+                timeline_events=timeline_events,
+                style_card=style_card,
+                context_blocks=context_blocks,
+                focus=changed if base_draft else None
+            )
+            
+            # Parse review / 解析审稿意见
+            review_result = self._parse_review(review_content, chapter, draft_version)
         
-        # Parse review / 解析审稿意见
-        review_result = self._parse_review(review_content, chapter, draft_version)
+        if base_draft:
+            review_result = self._merge_reviews(previous_review, review_result, index_map)
         
         # Save review / 保存审稿意见
         await self.draft_storage.save_review(project_id, chapter, review_result)
@@ -126,24 +188,30 @@ Output Format: YAML with structured issues list
     
     async def _generate_review(
         self,
-        draft: Any,
+        paragraphs: List[str],
         scene_brief: Any,
         character_cards: List[Any],
         facts: List[Any],
         timeline_events: List[Any],
-        style_card: Any
+        style_card: Any,
+        context_blocks: Optional[Dict[str, str]] = None,
+        focus: Optional[List[int]] = None
     ) -> str:
         """
         Generate review using LLM
         使用大模型生成审稿意见
         
         Args:
-            draft: Draft object / 草稿对象
+            paragraphs: Draft paragraphs / 草稿段落
             scene_brief: Scene brief / 场景简报
             character_cards: Character cards / 角色卡列表
             facts: Facts list / 事实列表
             timeline_events: Timeline events / 时间线事件列表
             style_card: Style card / 文风卡
+            context_blocks: Shared snapshot blocks; replace the card/canon items
+                            共享快照块；提供时替代卡片/事实表条目
+            focus: Paragraph indices to review (None = whole draft)
+                   需审核的段落索引（None 表示全文）
             
         Returns:
             Generated review in YAML format / YAML格式的审稿意见
@@ -152,7 +220,14 @@ Output Format: YAML with structured issues list
         context_items = []
         
         # Add draft content / 添加草稿内容
-        context_items.append(f"Draft Content:\n{draft.content}")
+        if focus is None:
+            context_items.append(
+                "Draft Content (numbered by paragraph):\n" + "\n\n".join(
+                    f"[Para {idx}]\n{para}" for idx, para in enumerate(paragraphs)
+                )
+            )
+        else:
+            context_items.append(self._format_focus(paragraphs, focus))
         
         # Add scene brief / 添加场景简报
         if scene_brief:
@@ -161,26 +236,29 @@ Goal: {scene_brief.goal}
 Forbidden: {', '.join(scene_brief.forbidden)}
 Style Reminder: {scene_brief.style_reminder}""")
         
-        # Add character boundaries / 添加角色边界
-        if character_cards:
-            char_info = ["Character Boundaries:"]
-            for card in character_cards:
-                char_info.append(f"\n{card.name}:")
-                char_info.append(f"  Boundaries: {', '.join(card.boundaries)}")
-                char_info.append(f"  Personality: {', '.join(card.personality)}")
-            context_items.append("".join(char_info))
-        
-        # Add recent facts / 添加最近的事实
-        if facts:
-            recent_facts = facts[-10:]  # Last 10 facts / 最近10条
-            facts_info = ["Recent Facts:"]
-            for fact in recent_facts:
-                facts_info.append(f"\n- {fact.statement}")
-            context_items.append("".join(facts_info))
-        
-        # Add style requirements / 添加文风要求
-        if style_card:
-            context_items.append(f"""Style Requirements:
+        # Cards and canon come from the shared blocks when available
+        # 若提供共享块，则卡片与事实表由共享块提供
+        if not context_blocks:
+            # Add character boundaries / 添加角色边界
+            if character_cards:
+                char_info = ["Character Boundaries:"]
+                for card in character_cards:
+                    char_info.append(f"\n{card.name}:")
+                    char_info.append(f"  Boundaries: {', '.join(card.boundaries)}")
+                    char_info.append(f"  Personality: {', '.join(card.personality)}")
+                context_items.append("".join(char_info))
+            
+            # Add recent facts / 添加最近的事实
+            if facts:
+                recent_facts = facts[-10:]  # Last 10 facts / 最近10条
+                facts_info = ["Recent Facts:"]
+                for fact in recent_facts:
+                    facts_info.append(f"\n- {fact.statement}")
+                context_items.append("".join(facts_info))
+            
+            # Add style requirements / 添加文风要求
+            if style_card:
+                context_items.append(f"""Style Requirements:
 - Pacing: {style_card.pacing}
 - Sentence Structure: {style_card.sentence_structure}""")
         
@@ -207,6 +285,7 @@ overall_assessment: "brief overall evaluation"
 can_proceed: true|false
 ```
 
+Use the [Para N] numbers in `location`, e.g. "paragraph 3".
 Be thorough but concise. Focus on real issues, not nitpicks.
 
 审核这篇草稿并识别问题。
@@ -218,17 +297,141 @@ Be thorough but concise. Focus on real issues, not nitpicks.
 4. 是否遵循文风指南
 5. 是否违反禁区
 
-以 YAML 格式输出，要全面但简洁，关注真正的问题。"""
+以 YAML 格式输出，location 使用 [Para N] 编号（如 "paragraph 3"），要全面但简洁，关注真正的问题。"""
         
         # Call LLM / 调用大模型
         messages = self.build_messages(
             system_prompt=self.get_system_prompt(),
             user_prompt=user_prompt,
-            context_items=context_items
+            context_items=context_items,
+            context_blocks=context_blocks
         )
         
         return await self.call_llm(messages)
     
+    def _diff_paragraphs(
+        self,
+        old_paragraphs: List[str],
+        new_paragraphs: List[str]
+    ) -> Tuple[Dict[int, int], List[int]]:
+        """
+        Diff two paragraph lists
+        比较两个段落列表
+
+        Args:
+            old_paragraphs: Paragraphs of the previously reviewed version / 上次审稿版本的段落
+            new_paragraphs: Paragraphs of the current version / 当前版本的段落
+
+        Returns:
+            (old index -> new index for unchanged paragraphs, changed new indices)
+            (未改动段落的旧索引 -> 新索引, 改动过的新段落索引)
+        """
+        matcher = difflib.SequenceMatcher(None, old_paragraphs, new_paragraphs, autojunk=False)
+        index_map: Dict[int, int] = {}
+        changed: List[int] = []
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                for offset in range(i2 - i1):
+                    index_map[i1 + offset] = j1 + offset
+            else:
+                changed.extend(range(j1, j2))
+        return index_map, changed
+
+    def _format_focus(self, paragraphs: List[str], focus: List[int]) -> str:
+        """
+        Format changed paragraphs with a pointer to the unchanged ones
+        格式化改动段落，并附上未改动段落的简要说明
+
+        Args:
+            paragraphs: All draft paragraphs / 全部草稿段落
+            focus: Changed paragraph indices / 改动段落索引
+
+        Returns:
+            Context item text / 上下文条目文本
+        """
+        focus_set = set(focus)
+        lines = ["Changed Paragraphs (review these only):"]
+        for idx in focus:
+            lines.append(f"[Para {idx}]\n{paragraphs[idx]}")
+
+        # Immediate neighbours give local continuity / 相邻段落提供局部连贯性
+        neighbours = sorted({
+            n for idx in focus for n in (idx - 1, idx + 1)
+            if 0 <= n < len(paragraphs) and n not in focus_set
+        })
+        if neighbours:
+            lines.append("Neighbouring Paragraphs (context only, already reviewed):")
+            for idx in neighbours:
+                para = paragraphs[idx]
+                lines.append(f"[Para {idx}]\n{para[:200]}{'...' if len(para) > 200 else ''}")
+
+        unchanged = [idx for idx in range(len(paragraphs)) if idx not in focus_set]
+        if unchanged:
+            lines.append(
+                f"Paragraphs {self._format_ranges(unchanged)} (of {len(paragraphs)}) are unchanged "
+                "since the previous review; their issues are carried over. "
+                "Only report issues located in the changed paragraphs.\n"
+                "其余段落自上次审稿以来未改动，其问题将沿用；只报告改动段落中的问题。"
+            )
+        return "\n\n".join(lines)
+
+    def _format_ranges(self, indices: List[int]) -> str:
+        """Format sorted indices as ranges, e.g. "0-3, 6" / 将有序索引格式化为区间"""
+        ranges = []
+        start = prev = indices[0]
+        for idx in indices[1:] + [None]:
+            if idx is not None and idx == prev + 1:
+                prev = idx
+                continue
+            ranges.append(str(start) if start == prev else f"{start}-{prev}")
+            if idx is not None:
+                start = prev = idx
+        return ", ".join(ranges)
+
+    def _merge_reviews(
+        self,
+        previous: ReviewResult,
+        current: ReviewResult,
+        index_map: Dict[int, int]
+    ) -> ReviewResult:
+        """
+        Merge a partial review with the previous one
+        将局部审稿结果与上次审稿结果合并
+
+        Previous issues on unchanged paragraphs are carried over with their
+        paragraph index remapped; issues on rewritten or removed paragraphs
+        are dropped because those paragraphs were reviewed again. Issues
+        without a paragraph location are kept. A parse failure of the current
+        review carries over to the merged one.
+        未改动段落上的旧问题沿用并重映射段落索引；改写或删除段落上的旧问题
+        丢弃（这些段落已重新审核）。没有段落位置的问题保留。当前审稿的解析失败
+        标记会带入合并结果。
+
+        Args:
+            previous: Previous review / 上次审稿结果
+            current: Review of the changed paragraphs / 改动段落的审稿结果
+            index_map: Old -> new paragraph index / 旧 -> 新段落索引
+
+        Returns:
+            Merged review / 合并后的审稿结果
+        """
+        carried: List[Issue] = []
+        for issue in previous.issues:
+            old_idx = self._parse_paragraph_index(issue.location)
+            if old_idx is None:
+                carried.append(issue)
+            elif old_idx in index_map:
+                carried.append(issue.model_copy(update={"location": f"paragraph {index_map[old_idx]}"}))
+
+        return ReviewResult(
+            chapter=current.chapter,
+            draft_version=current.draft_version,
+            issues=current.issues + carried,
+            overall_assessment=current.overall_assessment,
+            can_proceed=current.can_proceed and not any(i.severity == "critical" for i in carried),
+            parse_failed=current.parse_failed
+        )
+
     def _parse_review(
         self,
         yaml_content: str,
@@ -286,5 +489,6 @@ Be thorough but concise. Focus on real issues, not nitpicks.
                 draft_version=draft_version,
                 issues=[],
                 overall_assessment="Review parsing failed, manual check recommended.",
-                can_proceed=True
+                can_proceed=True,
+                parse_failed=True
             )
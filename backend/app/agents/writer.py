@@ -4,8 +4,10 @@ Generates draft based on scene brief
 根据场景简报生成草稿
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+from app.config import config
 from app.agents.base import BaseAgent
+from app.context_engine.snapshot import format_snapshot_blocks
 
 
 class WriterAgent(BaseAgent):
@@ -71,7 +73,8 @@ Output Format:
         Args:
             project_id: Project ID / 项目ID
             chapter: Chapter ID / 章节ID
-            context: Context with scene_brief, target_word_count / 包含场景简报和目标字数的上下文
+            context: Context with scene_brief, target_word_count, optional on_delta
+                     包含场景简报、目标字数及可选流式回调的上下文
             
         Returns:
             Result with draft content / 包含草稿内容的结果
@@ -87,31 +90,30 @@ Output Format:
                 "error": "Scene brief not found"
             }
         
-        # Load previous summaries for context / 加载前文摘要作为上下文
-        previous_summaries = await self._load_previous_summaries(project_id, chapter)
-
-        style_card = context.get("style_card")
-        rules_card = context.get("rules_card")
-        character_cards = context.get("character_cards") or []
-        world_cards = context.get("world_cards") or []
-        facts = context.get("facts") or []
-        timeline = context.get("timeline") or []
-        character_states = context.get("character_states") or []
-        chapter_goal = context.get("chapter_goal")
+        # Prefer the shared session snapshot / 优先使用会话共享快照
+        snapshot = context.get("snapshot")
+        if snapshot:
+            context_blocks = snapshot.blocks
+        else:
+            previous_summaries = await self._load_previous_summaries(project_id, chapter)
+            context_blocks = format_snapshot_blocks(
+                style_card=context.get("style_card"),
+                rules_card=context.get("rules_card"),
+                character_cards=context.get("character_cards") or [],
+                world_cards=context.get("world_cards") or [],
+                facts=context.get("facts") or [],
+                timeline=context.get("timeline") or [],
+                character_states=context.get("character_states") or [],
+                previous_summaries=previous_summaries,
+            )
         
         # Generate draft / 生成草稿
         draft_content = await self._generate_draft(
             scene_brief=scene_brief,
             target_word_count=context.get("target_word_count", 3000),
-            previous_summaries=previous_summaries,
-            style_card=style_card,
-            rules_card=rules_card,
-            character_cards=character_cards,
-            world_cards=world_cards,
-            facts=facts,
-            timeline=timeline,
-            character_states=character_states,
-            chapter_goal=chapter_goal,
+            context_blocks=context_blocks,
+            chapter_goal=context.get("chapter_goal"),
+            on_delta=context.get("on_delta"),
         )
         
         # Extract pending confirmations / 提取待确认事项
@@ -164,15 +166,9 @@ Output Format:
         self,
         scene_brief: Any,
         target_word_count: int,
-        previous_summaries: List[str],
-        style_card: Any = None,
-        rules_card: Any = None,
-        character_cards: List[Any] = None,
-        world_cards: List[Any] = None,
-        facts: List[Any] = None,
-        timeline: List[Any] = None,
-        character_states: List[Any] = None,
+        context_blocks: Dict[str, str],
         chapter_goal: str = None,
+        on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
     ) -> str:
         """
         Generate draft using LLM
@@ -181,7 +177,9 @@ Output Format:
         Args:
             scene_brief: Scene brief object / 场景简报对象
             target_word_count: Target word count / 目标字数
-            previous_summaries: Previous chapter summaries / 前文摘要
+            context_blocks: Formatted cards/canon/summaries blocks / 格式化的卡片/事实表/摘要块
+            chapter_goal: Chapter goal / 章节目标
+            on_delta: Optional callback for streamed draft text / 可选的流式草稿文本回调
             
         Returns:
             Generated draft content / 生成的草稿内容
@@ -223,67 +221,6 @@ FORBIDDEN:
 {self._format_list(scene_brief.forbidden)}"""
         context_items.append(brief_text)
 
-        if style_card:
-            try:
-                context_items.append("Style Card:\n" + str(style_card.model_dump()))
-            except Exception:
-                context_items.append("Style Card:\n" + str(style_card))
-
-        if rules_card:
-            try:
-                context_items.append("Rules Card:\n" + str(rules_card.model_dump()))
-            except Exception:
-                context_items.append("Rules Card:\n" + str(rules_card))
-
-        if character_cards:
-            lines = ["Character Cards:"]
-            for c in character_cards[:10]:
-                try:
-                    lines.append(str(c.model_dump()))
-                except Exception:
-                    lines.append(str(c))
-            context_items.append("\n".join(lines))
-
-        if world_cards:
-            lines = ["World Cards:"]
-            for w in world_cards[:10]:
-                try:
-                    lines.append(str(w.model_dump()))
-                except Exception:
-                    lines.append(str(w))
-            context_items.append("\n".join(lines))
-
-        if facts:
-            lines = ["Canon Facts:"]
-            for f in facts[-20:]:
-                try:
-                    lines.append(str(f.model_dump()))
-                except Exception:
-                    lines.append(str(f))
-            context_items.append("\n".join(lines))
-
-        if timeline:
-            lines = ["Canon Timeline:"]
-            for t in timeline[-20:]:
-                try:
-                    lines.append(str(t.model_dump()))
-                except Exception:
-                    lines.append(str(t))
-            context_items.append("\n".join(lines))
-
-        if character_states:
-            lines = ["Character States:"]
-            for s in character_states[:20]:
-                try:
-                    lines.append(str(s.model_dump()))
-                except Exception:
-                    lines.append(str(s))
-            context_items.append("\n".join(lines))
-        
-        # Add previous summaries / 添加前文摘要
-        if previous_summaries:
-            context_items.append("Previous Chapters:\n" + "\n\n".join(previous_summaries))
-        
         # Build user prompt / 构建用户提示
         user_prompt = f"""Write a draft for this chapter.
 
@@ -317,10 +254,38 @@ Write the draft in narrative prose. Be engaging and vivid.
         messages = self.build_messages(
             system_prompt=self.get_system_prompt(),
             user_prompt=user_prompt,
-            context_items=context_items
+            context_items=context_items,
+            context_blocks=context_blocks
         )
         
-        return await self.call_llm(messages)
+        return await self.call_llm(
+            messages,
+            on_delta=on_delta,
+            max_tokens=self._output_token_budget(target_word_count)
+        )
+    
+    def _output_token_budget(self, target_word_count: int) -> int:
+        """
+        max_tokens sized from the target length, capped by the provider limit
+        根据目标字数确定 max_tokens，不超过提供商上限
+        
+        Longer chapters that hit the cap are continued by the gateway
+        (agents.writer.continue_on_length).
+        超出上限的长章节由网关续写（agents.writer.continue_on_length）。
+        
+        Args:
+            target_word_count: Target word count / 目标字数
+            
+        Returns:
+            Max output tokens / 最大输出token数
+        """
+        tokens_per_word = config.get("agents", {}).get("writer", {}).get("max_tokens_per_word", 2.0)
+        budget = int(target_word_count * tokens_per_word)
+        
+        provider = self.gateway.providers.get(self.gateway.get_provider_for_agent(self.get_agent_name()))
+        if provider:
+            budget = min(budget, provider.max_tokens)
+        return max(budget, 256)
     
     def _format_characters(self, characters: List[Dict]) -> str:
         """Format characters for display / 格式化角色信息"""
@@ -4,9 +4,10 @@ Load and manage application configuration / 加载和管理应用配置
 """
 
 import os
+import threading
+from collections.abc import MutableMapping
 from pathlib import Path
-from typing import Dict, Any
-import yaml
+from typing import Dict, Any, Iterator, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv
 
@@ -52,6 +53,9 @@ def load_config(config_path: str = "config.yaml") -> Dict[str, Any]:
     if not config_file.exists():
         raise FileNotFoundError(f"Config file not found: {config_file}")
     
+    # Imported here so that importing this module stays cheap / 在此导入，使导入本模块保持轻量
+    import yaml
+    
     with open(config_file, 'r', encoding='utf-8') as f:
         config = yaml.safe_load(f)
     
@@ -76,15 +80,69 @@ def _replace_env_vars(obj: Any) -> Any:
     return obj
 
 
+class LazyConfig(MutableMapping):
+    """
+    config.yaml, loaded on first access / 首次访问时加载的 config.yaml
+
+    Behaves like the parsed dict. Modules keep a reference to this proxy
+    (from app.config import config), so reload() is seen everywhere.
+    行为与解析后的字典一致。各模块持有的是该代理（from app.config import config），
+    因此 reload() 对所有模块生效。
+    """
+
+    def __init__(self, config_path: str = "config.yaml"):
+        """
+        Initialize without reading the file
+
+        Args:
+            config_path: Path to config file / 配置文件路径
+        """
+        self._config_path = config_path
+        self._data: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Any]:
+        """Parsed config, read on first use / 解析后的配置，首次使用时读取"""
+        data = self._data
+        if data is None:
+            with self._lock:
+                if self._data is None:
+                    self._data = load_config(self._config_path)
+                data = self._data
+        return data
+
+    def reload(self) -> None:
+        """Re-read the file on next access / 下次访问时重新读取文件"""
+        with self._lock:
+            self._data = None
+
+    def __getitem__(self, key: str) -> Any:
+        return self._load()[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._load()[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self._load()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._load())
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def __repr__(self) -> str:
+        return f"LazyConfig({self._data!r})" if self._data is not None else "LazyConfig(<not loaded>)"
+
+
 # Global settings instance / 全局设置实例
 settings = Settings()
-config = load_config()
+config = LazyConfig()
 
 
 def reload_runtime_config() -> None:
     """Reload settings and config from updated environment / 从更新后的环境变量重载配置"""
     global settings
-    global config
 
     settings = Settings()
-    config = load_config()
+    config.reload()
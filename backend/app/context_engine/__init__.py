@@ -5,7 +5,18 @@ Manages context selection, compression, budgeting, and conflict detection
 """
 
 from .selector import ContextSelector
-from .compressor import ContextCompressor
+from .compressor import ContextCompressor, CompressionCache
 from .budgeter import TokenBudgeter
+from .mentions import AhoCorasickAutomaton, EntityMentionDetector, get_mention_detector
+from .snapshot import ContextSnapshot
 
-__all__ = ["ContextSelector", "ContextCompressor", "TokenBudgeter"]
+__all__ = [
+    "ContextSelector",
+    "ContextCompressor",
+    "CompressionCache",
+    "TokenBudgeter",
+    "AhoCorasickAutomaton",
+    "EntityMentionDetector",
+    "get_mention_detector",
+    "ContextSnapshot",
+]
@@ -4,24 +4,179 @@ Compresses context to fit within token budget
 压缩上下文以适应token预算
 """
 
-from typing import List, Dict, Any
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+from app.config import config
 from app.llm_gateway import LLMGateway
 
 
+class CompressionCache:
+    """
+    Persistent LRU/TTL cache for compression outputs
+    压缩结果的持久化 LRU/TTL 缓存
+
+    Entries are keyed by hash(summaries text, target length, model) and
+    stored as a single JSON file, so identical inputs never hit the LLM twice.
+    以 hash(摘要文本, 目标长度, 模型) 为键，存为单个 JSON 文件，相同输入不会重复调用大模型。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 512,
+        ttl_seconds: int = 30 * 24 * 3600
+    ):
+        """
+        Initialize cache
+
+        Args:
+            path: Cache file path / 缓存文件路径
+            max_entries: Maximum entries before LRU eviction / LRU 淘汰前的最大条目数
+            ttl_seconds: Entry time-to-live in seconds (0 = never expire) / 条目存活时间（0 表示不过期）
+        """
+        self.path = Path(path)
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = int(ttl_seconds or 0)
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._loaded = False
+
+    @staticmethod
+    def make_key(summaries_text: str, target_length: int, model: str) -> str:
+        """Build cache key / 构建缓存键"""
+        payload = json.dumps(
+            [summaries_text, int(target_length), model or ""],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Get cached content, refreshing its LRU position
+        获取缓存内容并刷新 LRU 位置
+
+        Args:
+            key: Cache key / 缓存键
+
+        Returns:
+            Cached content or None / 缓存内容或None
+        """
+        self._load()
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        if self._is_expired(entry):
+            del self._entries[key]
+            self._save()
+            return None
+
+        self._entries.move_to_end(key)
+        return entry.get("content")
+
+    def put(self, key: str, content: str) -> None:
+        """
+        Store content and evict least recently used entries
+        存储内容并淘汰最久未使用的条目
+
+        Args:
+            key: Cache key / 缓存键
+            content: Compressed content / 压缩后的内容
+        """
+        self._load()
+        self._entries[key] = {"content": content, "created_at": time.time()}
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+        self._save()
+
+    def _is_expired(self, entry: Dict[str, Any]) -> bool:
+        """Check entry TTL / 检查条目是否过期"""
+        if self.ttl_seconds <= 0:
+            return False
+        return time.time() - float(entry.get("created_at", 0)) > self.ttl_seconds
+
+    def _load(self) -> None:
+        """Load cache file once / 首次使用时加载缓存文件"""
+        if self._loaded:
+            return
+        self._loaded = True
+
+        if not self.path.exists():
+            return
+
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception as e:
+            print(f"[ContextCompressor] Ignoring unreadable cache file {self.path}: {e}")
+            return
+
+        # Stored in LRU order (oldest first) / 按 LRU 顺序存储（最旧在前）
+        for item in data.get("entries", []) if isinstance(data, dict) else []:
+            key = item.get("key")
+            if key and not self._is_expired(item):
+                self._entries[key] = {
+                    "content": item.get("content", ""),
+                    "created_at": item.get("created_at", 0),
+                }
+
+    def _save(self) -> None:
+        """Persist cache atomically / 原子化写入缓存文件"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "entries": [
+                {"key": k, **v} for k, v in self._entries.items()
+            ]
+        }
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
 class ContextCompressor:
     """
     Compresses context items to reduce token usage
     压缩上下文项以减少token使用
     """
     
-    def __init__(self, gateway: LLMGateway):
+    def __init__(
+        self,
+        gateway: LLMGateway,
+        cache: Optional[CompressionCache] = None,
+        agent_name: str = "archivist"
+    ):
         """
         Initialize compressor
         
         Args:
             gateway: LLM gateway instance / 大模型网关实例
+            cache: Optional compression cache / 可选的压缩缓存
+            agent_name: Agent whose provider routing is used / 沿用其供应商路由的 Agent
         """
         self.gateway = gateway
+        self.agent_name = agent_name
+
+        engine_config = config.get("context_engine", {})
+        cache_config = engine_config.get("compression_cache", {})
+        self.cache = cache or CompressionCache(
+            path=cache_config.get("path", "../data/.cache/compression_cache.json"),
+            max_entries=cache_config.get("max_entries", 512),
+            ttl_seconds=cache_config.get("ttl_seconds", 30 * 24 * 3600)
+        )
+
+        # Chapters are grouped into aligned blocks of this size; complete blocks are stable
+        # 章节按固定大小对齐分块；完整的块视为稳定块
+        self.stable_block_size = max(1, int(engine_config.get("stable_block_size", 5)))
+        # Fixed per-block target keeps stable block cache keys independent of chapter count
+        # 固定的块目标长度使稳定块的缓存键与章节总数无关
+        self.stable_block_target = max(50, int(engine_config.get("stable_block_target", 300)))
     
     async def compress_summaries(
         self,
@@ -31,6 +186,15 @@ class ContextCompressor:
         """
         Compress multiple chapter summaries into one
         将多个章节摘要压缩为一个
+
+        Complete blocks of older chapters are compressed independently so their
+        cached results are reused by sessions on adjacent chapters. When the
+        block digests and the recent chapters together exceed target_length,
+        they are compressed once more, so the result stays near target_length
+        however many chapters there are.
+        较早章节的完整块会被单独压缩，相邻章节的会话可直接复用其缓存结果。块摘要与
+        近期章节合计超过 target_length 时再压缩一次，因此无论章节多少，结果长度都
+        保持在 target_length 附近。
         
         Args:
             summaries: List of chapter summaries / 章节摘要列表
@@ -45,17 +209,117 @@ class ContextCompressor:
         # If already short enough, just concatenate / 如果已经足够短，直接拼接
         total_length = sum(len(s.get("summary", "")) for s in summaries)
         if total_length <= target_length:
-            return "\n\n".join([
-                f"Chapter {s['chapter']}: {s['title']}\n{s['summary']}"
-                for s in summaries
-            ])
-        
-        # Otherwise, use LLM to compress / 否则使用大模型压缩
-        summaries_text = "\n\n".join([
-            f"Chapter {s['chapter']}: {s['title']}\n{s['summary']}"
-            for s in summaries
-        ])
-        
+            return self._format_summaries(summaries)
+
+        stable_blocks, recent = self._split_stable_blocks(summaries)
+
+        parts = []
+        for block in stable_blocks:
+            text, _ = await self._compress_cached(block, self.stable_block_target)
+            parts.append(text)
+        if recent:
+            used = sum(len(p) for p in parts)
+            if used < target_length:
+                text, _ = await self._compress_cached(recent, max(50, target_length - used))
+            else:
+                # No budget left; the final pass compresses them with the blocks
+                # 预算已用尽；由最后一轮与各块一起压缩
+                text = self._format_summaries(recent)
+            parts.append(text)
+
+        digest = "\n\n".join(p for p in parts if p)
+        if len(digest) > target_length:
+            digest, _ = await self._compress_text_cached(digest, len(digest), target_length)
+        return digest
+
+    async def precompute_stable_blocks(self, summaries: List[Dict[str, Any]]) -> int:
+        """
+        Precompute compressions of stable older chapter blocks
+        预先计算稳定的早期章节块的压缩结果
+
+        Args:
+            summaries: All chapter summaries of a project / 项目的全部章节摘要
+
+        Returns:
+            Number of blocks compressed by the LLM (cache misses) / 实际调用大模型压缩的块数（缓存未命中）
+        """
+        stable_blocks, _ = self._split_stable_blocks(summaries)
+
+        misses = 0
+        for block in stable_blocks:
+            _, called_llm = await self._compress_cached(block, self.stable_block_target)
+            if called_llm:
+                misses += 1
+        return misses
+
+    async def _compress_cached(
+        self,
+        summaries: List[Dict[str, Any]],
+        target_length: int
+    ) -> Tuple[str, bool]:
+        """
+        Compress summaries through the content-hash cache
+        通过内容哈希缓存压缩摘要
+
+        Args:
+            summaries: Summaries to compress / 待压缩的摘要
+            target_length: Target length in characters / 目标字符长度
+
+        Returns:
+            (compressed text, whether the LLM was called) / （压缩文本, 是否调用了大模型）
+        """
+        return await self._compress_text_cached(
+            self._format_summaries(summaries),
+            sum(len(s.get("summary", "")) for s in summaries),
+            target_length
+        )
+
+    async def _compress_text_cached(
+        self,
+        summaries_text: str,
+        length: int,
+        target_length: int
+    ) -> Tuple[str, bool]:
+        """
+        Compress formatted summaries text through the content-hash cache
+        通过内容哈希缓存压缩格式化的摘要文本
+
+        Args:
+            summaries_text: Text to compress / 待压缩的文本
+            length: Length compared with the target / 与目标比较的长度
+            target_length: Target length in characters / 目标字符长度
+
+        Returns:
+            (compressed text, whether the LLM was called) / （压缩文本, 是否调用了大模型）
+        """
+        if length <= target_length:
+            return summaries_text, False
+
+        provider = self.gateway.get_provider_for_agent(self.agent_name)
+        if provider in ("mock", "simulated"):
+            # Offline providers return canned text; truncate locally instead
+            # 离线提供商返回固定文本，改为本地截断
+            return summaries_text[:target_length], False
+
+        llm_provider = self.gateway.providers.get(provider)
+        model = llm_provider.model if llm_provider else provider
+        key = CompressionCache.make_key(summaries_text, target_length, model)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached, False
+
+        content = await self._compress_with_llm(summaries_text, target_length, provider)
+        self.cache.put(key, content)
+        return content, True
+
+    async def _compress_with_llm(
+        self,
+        summaries_text: str,
+        target_length: int,
+        provider: str
+    ) -> str:
+        """Compress text with LLM / 使用大模型压缩文本"""
         messages = [
             {
                 "role": "system",
@@ -77,8 +341,52 @@ Output only the compressed summary, no explanation.
             }
         ]
         
-        response = await self.gateway.chat(messages, provider="openai", temperature=0.3)
+        response = await self.gateway.chat(
+            messages,
+            provider=provider,
+            temperature=self.gateway.get_temperature_for_agent(self.agent_name),
+            agent=self.agent_name
+        )
         return response["content"]
+
+    def _split_stable_blocks(
+        self,
+        summaries: List[Dict[str, Any]]
+    ) -> Tuple[List[List[Dict[str, Any]]], List[Dict[str, Any]]]:
+        """
+        Split summaries into complete aligned blocks and the recent remainder
+        将摘要拆分为完整的对齐块与剩余的近期部分
+
+        Block k holds chapters [k*size+1, (k+1)*size]; a block is stable only
+        when all of its chapters are present, so its text never changes.
+        第 k 块包含 [k*size+1, (k+1)*size] 章；只有块内章节齐全时才视为稳定，其文本不会再变化。
+        """
+        blocks: Dict[int, List[Dict[str, Any]]] = {}
+        recent: List[Dict[str, Any]] = []
+
+        for s in summaries:
+            m = re.search(r"(\d+)", str(s.get("chapter", "")))
+            if not m or int(m.group(1)) < 1:
+                recent.append(s)
+                continue
+            blocks.setdefault((int(m.group(1)) - 1) // self.stable_block_size, []).append(s)
+
+        stable: List[List[Dict[str, Any]]] = []
+        for index in sorted(blocks):
+            block = blocks[index]
+            if len(block) == self.stable_block_size:
+                stable.append(block)
+            else:
+                recent.extend(block)
+
+        return stable, recent
+
+    def _format_summaries(self, summaries: List[Dict[str, Any]]) -> str:
+        """Format summaries as text / 将摘要格式化为文本"""
+        return "\n\n".join([
+            f"Chapter {s['chapter']}: {s['title']}\n{s['summary']}"
+            for s in summaries
+        ])
     
     def truncate_items(
         self,
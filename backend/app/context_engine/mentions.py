@@ -0,0 +1,214 @@
+"""
+Entity Mention Detector / 实体提及检测器
+Aho-Corasick scan of chapter text for character and world-card mentions
+使用 Aho-Corasick 自动机扫描章节文本中提到的角色与世界观卡
+"""
+
+from collections import deque
+from typing import List, Dict, Any, Optional, Tuple
+from app.storage import CardStorage
+
+
+class AhoCorasickAutomaton:
+    """
+    Multi-pattern string matcher (Aho-Corasick)
+    多模式字符串匹配器（Aho-Corasick）
+
+    Patterns are matched case-insensitively in a single linear pass over the text.
+    对文本进行一次线性扫描即可匹配所有模式（不区分大小写）。
+    """
+
+    def __init__(self):
+        """Initialize empty automaton / 初始化空自动机"""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        self.patterns: List[str] = []
+        self.payloads: List[Any] = []
+        self._built = False
+
+    def add(self, pattern: str, payload: Any) -> None:
+        """
+        Add a pattern / 添加模式串
+
+        Args:
+            pattern: Pattern text / 模式串
+            payload: Value reported on match / 匹配时返回的值
+        """
+        pattern = (pattern or "").strip().lower()
+        if not pattern:
+            return
+
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = nxt
+
+        self._output[state].append(len(self.patterns))
+        self.patterns.append(pattern)
+        self.payloads.append(payload)
+        self._built = False
+
+    def build(self) -> None:
+        """Compute failure links (BFS) / 计算失配指针（广度优先）"""
+        queue = deque()
+        for nxt in self._goto[0].values():
+            self._fail[nxt] = 0
+            queue.append(nxt)
+
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+        self._built = True
+
+    def iter_matches(self, text: str):
+        """
+        Yield all matches in text / 枚举文本中的全部匹配
+
+        Yields:
+            (start, end, pattern_index) with end exclusive / (起点, 终点(不含), 模式下标)
+        """
+        if not self._built:
+            self.build()
+
+        state = 0
+        for i, ch in enumerate(text.lower()):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for idx in self._output[state]:
+                yield i + 1 - len(self.patterns[idx]), i + 1, idx
+
+
+class EntityMentionDetector:
+    """
+    Detect which cards are mentioned in free text
+    检测自由文本中提到了哪些卡片
+
+    Patterns come from character names and aliases, and world-card names
+    (including location cards). Overlapping matches resolve leftmost-longest,
+    so "李明月" is not also counted as "李明".
+    模式来自角色名与别名、世界观卡名称（含地点卡）。重叠匹配按最左最长处理，
+    因此“李明月”不会同时计为“李明”。
+    """
+
+    def __init__(
+        self,
+        character_cards: List[Any],
+        world_cards: List[Any]
+    ):
+        """
+        Build automaton from cards
+
+        Args:
+            character_cards: Character cards / 角色卡列表
+            world_cards: World cards / 世界观卡列表
+        """
+        self.automaton = AhoCorasickAutomaton()
+
+        for card in character_cards:
+            self.automaton.add(card.name, ("characters", card.name))
+            for alias in getattr(card, "aliases", None) or []:
+                self.automaton.add(alias, ("characters", card.name))
+
+        for card in world_cards:
+            self.automaton.add(card.name, ("world", card.name))
+
+        self.automaton.build()
+
+    def scan(self, texts: List[str]) -> Dict[str, Dict[str, int]]:
+        """
+        Scan texts in one pass and count mentions per entity
+        一次扫描所有文本并统计每个实体的提及次数
+
+        Args:
+            texts: Texts to scan (goal, title, summaries, draft) / 待扫描文本
+
+        Returns:
+            {"characters": {name: count}, "world": {name: count}}
+        """
+        # A separator that never occurs inside a pattern keeps texts from joining
+        # 使用不会出现在模式中的分隔符，避免跨文本拼接出匹配
+        text = "\n".join(t for t in texts if t)
+
+        matches: List[Tuple[int, int, int]] = list(self.automaton.iter_matches(text))
+        matches.sort(key=lambda m: (m[0], -(m[1] - m[0])))
+
+        result: Dict[str, Dict[str, int]] = {"characters": {}, "world": {}}
+        covered_until = 0
+        for start, end, idx in matches:
+            if start < covered_until:
+                continue
+            if not self._on_word_boundary(text, start, end, self.automaton.patterns[idx]):
+                continue
+            covered_until = end
+            kind, name = self.automaton.payloads[idx]
+            result[kind][name] = result[kind].get(name, 0) + 1
+
+        return result
+
+    def _on_word_boundary(self, text: str, start: int, end: int, pattern: str) -> bool:
+        """
+        Require word boundaries for Latin names (CJK has no word separators)
+        拉丁字母名称需位于单词边界（中文无词间分隔，不做要求）
+        """
+        if not pattern.isascii():
+            return True
+        before = text[start - 1] if start > 0 else ""
+        after = text[end] if end < len(text) else ""
+        return not (before.isascii() and before.isalnum()) and not (after.isascii() and after.isalnum())
+
+
+# Detectors cached per project, rebuilt when card storage reports a change
+# 按项目缓存检测器，卡片存储发生变更时重建
+_detectors: Dict[str, Tuple[int, EntityMentionDetector]] = {}
+
+
+async def get_mention_detector(
+    card_storage: CardStorage,
+    project_id: str
+) -> EntityMentionDetector:
+    """
+    Get the mention detector for a project, rebuilding it after card saves
+    获取项目的提及检测器，卡片保存后自动重建
+
+    Args:
+        card_storage: Card storage instance / 卡片存储实例
+        project_id: Project ID / 项目ID
+
+    Returns:
+        Entity mention detector / 实体提及检测器
+    """
+    revision = card_storage.get_revision(project_id, "cards")
+    cached: Optional[Tuple[int, EntityMentionDetector]] = _detectors.get(project_id)
+    if cached and cached[0] == revision:
+        return cached[1]
+
+    character_cards = []
+    for name in await card_storage.list_character_cards(project_id):
+        card = await card_storage.get_character_card(project_id, name)
+        if card:
+            character_cards.append(card)
+
+    world_cards = []
+    for name in await card_storage.list_world_cards(project_id):
+        card = await card_storage.get_world_card(project_id, name)
+        if card:
+            world_cards.append(card)
+
+    detector = EntityMentionDetector(character_cards, world_cards)
+    _detectors[project_id] = (revision, detector)
+    return detector
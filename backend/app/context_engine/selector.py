@@ -4,8 +4,13 @@ Selects relevant context items for each agent task
 为每个Agent任务选择相关的上下文项
 """
 
-from typing import List, Dict, Any, Optional
+import re
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable
+from app.config import config
 from app.storage import CardStorage, CanonStorage, DraftStorage
+from app.context_engine.mentions import get_mention_detector
+from app.context_engine.compressor import ContextCompressor
+from app.context_engine.snapshot import ContextSnapshot, format_snapshot_blocks, fingerprint_sources
 
 
 class ContextSelector:
@@ -18,7 +23,8 @@ class ContextSelector:
         self,
         card_storage: CardStorage,
         canon_storage: CanonStorage,
-        draft_storage: DraftStorage
+        draft_storage: DraftStorage,
+        compressor: Optional[ContextCompressor] = None
     ):
         """
         Initialize context selector
@@ -27,25 +33,49 @@ class ContextSelector:
             card_storage: Card storage instance / 卡片存储实例
             canon_storage: Canon storage instance / 事实表存储实例
             draft_storage: Draft storage instance / 草稿存储实例
+            compressor: Compresses far chapter summaries, else they are listed by title / 压缩远章摘要，否则远章只列出标题
         """
         self.card_storage = card_storage
         self.canon_storage = canon_storage
         self.draft_storage = draft_storage
+        self.compressor = compressor
+
+        # Far chapters (older than the mid window) are replaced by one compressed digest
+        # 远章（早于中章窗口）以一段压缩摘要代替
+        engine_config = config.get("context_engine", {})
+        self.mid_window = 5
+        self.far_summary_target = int(engine_config.get("far_summary_target", 600))
+        # Character budget shared by the digest and the tiered summaries
+        # 摘要与分级前文摘要共享的字符预算
+        self.summary_max_chars = int(engine_config.get("summary_max_chars", 6000))
+
+        # Loaded storage views keyed by (project, name), tagged with the
+        # storage revisions they were loaded at
+        # 已加载的存储视图，按 (项目, 名称) 缓存，并记录加载时的存储版本号
+        self._views: Dict[Tuple[str, str], Tuple[Tuple[int, ...], Any]] = {}
     
     async def select_for_chapter(
         self,
         project_id: str,
         chapter: str,
-        character_names: Optional[List[str]] = None
+        character_names: Optional[List[str]] = None,
+        chapter_title: str = "",
+        chapter_goal: str = ""
     ) -> Dict[str, Any]:
         """
         Select all relevant context for a chapter
         为章节选择所有相关上下文
+
+        Character and world cards are restricted to entities mentioned in the
+        chapter text plus any explicitly requested characters.
+        角色卡与世界观卡仅加载章节文本中提到的实体以及显式指定的角色。
         
         Args:
             project_id: Project ID / 项目ID
             chapter: Chapter ID / 章节ID
             character_names: Optional list of character names / 可选的角色名称列表
+            chapter_title: Chapter title / 章节标题
+            chapter_goal: Chapter goal / 章节目标
             
         Returns:
             Dictionary with selected context / 包含选中上下文的字典
@@ -55,31 +85,25 @@ class ContextSelector:
         # Load fixed cards (always included) / 加载固定卡片（始终包含）
         context["style_card"] = await self.card_storage.get_style_card(project_id)
         context["rules_card"] = await self.card_storage.get_rules_card(project_id)
+
+        mentions = await self.detect_mentions(project_id, chapter, chapter_title, chapter_goal)
+        context["mentions"] = mentions
         
         # Load character cards (by need) / 按需加载角色卡
-        if character_names:
-            character_cards = []
-            for name in character_names:
-                card = await self.card_storage.get_character_card(project_id, name)
-                if card:
-                    character_cards.append(card)
-            context["character_cards"] = character_cards
-        else:
-            # Load all if not specified / 如果未指定则加载全部
-            char_names = await self.card_storage.list_character_cards(project_id)
-            character_cards = []
-            for name in char_names:
-                card = await self.card_storage.get_character_card(project_id, name)
-                if card:
-                    character_cards.append(card)
-            context["character_cards"] = character_cards
+        character_cards = []
+        for name in self.rank_characters(mentions, character_names):
+            card = await self.card_storage.get_character_card(project_id, name)
+            if card:
+                character_cards.append(card)
+        context["character_cards"] = character_cards
         
-        # Load world cards / 加载世界观卡
+        # Load mentioned world cards; immutable settings always apply
+        # 加载被提及的世界观卡；不可变设定始终生效
         world_card_names = await self.card_storage.list_world_cards(project_id)
         world_cards = []
         for name in world_card_names:
             card = await self.card_storage.get_world_card(project_id, name)
-            if card:
+            if card and (name in mentions["world"] or card.immutable):
                 world_cards.append(card)
         context["world_cards"] = world_cards
         
@@ -98,6 +122,281 @@ class ContextSelector:
         
         return context
     
+    async def build_snapshot(
+        self,
+        project_id: str,
+        chapter: str,
+        iteration: int = 0,
+        character_names: Optional[List[str]] = None,
+        chapter_title: str = "",
+        chapter_goal: str = ""
+    ) -> ContextSnapshot:
+        """
+        Build the immutable context snapshot shared by all agents
+        构建所有 Agent 共享的不可变上下文快照
+
+        Cards, canon and summaries are reloaded only when the corresponding
+        storage revision has changed since the previous snapshot.
+        仅当对应存储版本号变化时，才重新加载卡片、事实表与摘要。
+
+        Args:
+            project_id: Project ID / 项目ID
+            chapter: Chapter ID / 章节ID
+            iteration: Session iteration / 会话迭代次数
+            character_names: Optional list of character names / 可选的角色名称列表
+            chapter_title: Chapter title / 章节标题
+            chapter_goal: Chapter goal / 章节目标
+
+        Returns:
+            Context snapshot / 上下文快照
+        """
+        cards = await self._get_view(project_id, "cards", ("cards",), self._load_cards)
+        canon = await self._get_view(project_id, "canon", ("canon",), self._load_canon)
+        summaries = await self._get_view(
+            project_id,
+            f"summaries:{chapter}",
+            ("summaries",),
+            lambda p: self._load_summaries(p, chapter)
+        )
+        mentions = await self._get_view(
+            project_id,
+            f"mentions:{chapter}:{chapter_title}:{chapter_goal}",
+            ("cards", "summaries", "drafts"),
+            lambda p: self.detect_mentions(p, chapter, chapter_title, chapter_goal)
+        )
+
+        character_cards = [
+            cards["characters"][name]
+            for name in self.rank_characters(mentions, character_names)
+            if name in cards["characters"]
+        ]
+        world_cards = [
+            card for card in cards["world"]
+            if card.name in mentions["world"] or card.immutable
+        ]
+        # Hashing dumps every source, so it is redone only when one of them changed
+        # 哈希需要序列化全部源材料，仅在其中之一变化时重新计算
+        sources_fingerprint = await self._get_view(
+            project_id,
+            f"fingerprint:{chapter}",
+            ("cards", "canon", "summaries"),
+            lambda p: self._fingerprint(cards, canon, summaries)
+        )
+
+        near_timeline = self.canon_storage.select_events_near_chapter(
+            canon["timeline"],
+            chapter,
+            window=3,
+            max_events=10,
+        )
+
+        return ContextSnapshot(
+            project_id=project_id,
+            chapter=chapter,
+            iteration=iteration,
+            revisions={
+                area: self.card_storage.get_revision(project_id, area)
+                for area in ("cards", "canon", "drafts", "summaries")
+            },
+            style_card=cards["style"],
+            rules_card=cards["rules"],
+            character_cards=tuple(character_cards),
+            world_cards=tuple(world_cards),
+            facts=tuple(canon["facts"]),
+            timeline=tuple(canon["timeline"]),
+            near_timeline=tuple(near_timeline),
+            character_states=tuple(canon["character_states"]),
+            previous_summaries=tuple(summaries),
+            mentions=mentions,
+            blocks=format_snapshot_blocks(
+                style_card=cards["style"],
+                rules_card=cards["rules"],
+                character_cards=character_cards,
+                world_cards=world_cards,
+                facts=canon["facts"],
+                timeline=canon["timeline"],
+                character_states=canon["character_states"],
+                previous_summaries=summaries,
+            ),
+            sources_fingerprint=sources_fingerprint,
+        )
+
+    async def _get_view(
+        self,
+        project_id: str,
+        name: str,
+        areas: Tuple[str, ...],
+        loader: Callable[[str], Awaitable[Any]]
+    ) -> Any:
+        """
+        Return a cached storage view, reloading it if any area changed
+        返回缓存的存储视图；任一相关区域变更时重新加载
+
+        Args:
+            project_id: Project ID / 项目ID
+            name: View name / 视图名称
+            areas: Storage areas the view depends on / 视图依赖的存储区域
+            loader: Async loader called with project_id / 以 project_id 调用的异步加载函数
+
+        Returns:
+            Loaded view / 加载的视图
+        """
+        revision = tuple(self.card_storage.get_revision(project_id, a) for a in areas)
+        cached = self._views.get((project_id, name))
+        if cached and cached[0] == revision:
+            return cached[1]
+
+        value = await loader(project_id)
+        self._views[(project_id, name)] = (revision, value)
+        return value
+
+    async def _fingerprint(self, *sources: Any) -> str:
+        """Loader wrapping fingerprint_sources for _get_view / 供 _get_view 使用的 fingerprint_sources 包装"""
+        return fingerprint_sources(*sources)
+
+    async def _load_summaries(self, project_id: str, chapter: str) -> List[str]:
+        """
+        Distance-tiered previous summaries, far chapters compressed
+        按距离分级的前文摘要，远章经过压缩
+
+        Far chapters go through ContextCompressor.compress_summaries, whose
+        stable blocks are cached, so adjacent chapters reuse the compressions.
+        The digest gets what the tiered summaries leave of summary_max_chars;
+        it is shortened, or dropped, when it does not fit.
+        远章经由 ContextCompressor.compress_summaries 压缩，其稳定块带缓存，
+        相邻章节可直接复用压缩结果。该摘要使用分级摘要剩余的 summary_max_chars
+        预算；放不下时会被缩短或舍弃。
+
+        Args:
+            project_id: Project ID / 项目ID
+            chapter: Chapter ID / 章节ID
+
+        Returns:
+            Formatted summary blocks, oldest first / 格式化的摘要块，最早的在前
+        """
+        if self.compressor is None:
+            return await self.draft_storage.select_previous_summaries(
+                project_id, chapter, mid_window=self.mid_window, max_chars=self.summary_max_chars
+            )
+
+        tiered = await self.draft_storage.select_previous_summaries(
+            project_id, chapter, mid_window=self.mid_window, max_far=0,
+            max_chars=self.summary_max_chars
+        )
+        m = re.search(r"(\d+)", chapter or "")
+        if not m:
+            return tiered
+
+        far = await self.draft_storage.list_chapter_summaries(
+            project_id, before=int(m.group(1)) - self.mid_window
+        )
+        if not far:
+            return tiered
+
+        header = "Earlier Chapters / 更早章节:\n"
+        remaining = self.summary_max_chars - sum(len(block) for block in tiered) - len(header)
+        if remaining < 50:
+            return tiered
+
+        digest = await self.compressor.compress_summaries(far, min(self.far_summary_target, remaining))
+        if not digest:
+            return tiered
+        # LLM output may overshoot its target / 大模型输出可能超出目标长度
+        if len(digest) > remaining:
+            digest = digest[:remaining - 3] + "..."
+        return [header + digest] + tiered
+
+    async def _load_cards(self, project_id: str) -> Dict[str, Any]:
+        """Load all cards of a project / 加载项目的全部卡片"""
+        characters = {}
+        for name in await self.card_storage.list_character_cards(project_id):
+            card = await self.card_storage.get_character_card(project_id, name)
+            if card:
+                characters[name] = card
+
+        world = []
+        for name in await self.card_storage.list_world_cards(project_id):
+            card = await self.card_storage.get_world_card(project_id, name)
+            if card:
+                world.append(card)
+
+        return {
+            "style": await self.card_storage.get_style_card(project_id),
+            "rules": await self.card_storage.get_rules_card(project_id),
+            "characters": characters,
+            "world": world,
+        }
+
+    async def _load_canon(self, project_id: str) -> Dict[str, Any]:
+        """Load facts, timeline and character states / 加载事实、时间线与角色状态"""
+        return {
+            "facts": await self.canon_storage.get_all_facts(project_id),
+            "timeline": await self.canon_storage.get_all_timeline_events(project_id),
+            "character_states": await self.canon_storage.get_all_character_states(project_id),
+        }
+
+    async def detect_mentions(
+        self,
+        project_id: str,
+        chapter: str,
+        chapter_title: str = "",
+        chapter_goal: str = ""
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Detect entities mentioned around a chapter
+        检测章节相关文本中提到的实体
+
+        Scans the chapter goal, title, previous chapter summary and latest
+        draft of the chapter in one pass.
+        一次扫描章节目标、标题、上一章摘要以及本章最新草稿。
+        
+        Args:
+            project_id: Project ID / 项目ID
+            chapter: Chapter ID / 章节ID
+            chapter_title: Chapter title / 章节标题
+            chapter_goal: Chapter goal / 章节目标
+            
+        Returns:
+            {"characters": {name: count}, "world": {name: count}}
+        """
+        texts = [chapter_goal, chapter_title]
+
+        previous = await self._load_previous_summaries(project_id, chapter, count=1)
+        if previous:
+            texts.append(previous[-1]["summary"])
+
+        versions = await self.draft_storage.list_draft_versions(project_id, chapter)
+        if versions:
+            draft = await self.draft_storage.get_draft(project_id, chapter, versions[-1])
+            if draft:
+                texts.append(draft.content)
+
+        detector = await get_mention_detector(self.card_storage, project_id)
+        return detector.scan(texts)
+
+    def rank_characters(
+        self,
+        mentions: Dict[str, Dict[str, int]],
+        character_names: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Explicit characters first, then mentioned ones by mention count
+        显式指定的角色在前，其余按提及次数排序
+
+        Args:
+            mentions: Result of detect_mentions / detect_mentions 的结果
+            character_names: Explicitly requested names / 显式指定的角色名
+
+        Returns:
+            Ordered character names / 排序后的角色名列表
+        """
+        names = list(dict.fromkeys(character_names or []))
+        counts = mentions.get("characters", {})
+        for name in sorted(counts, key=lambda n: -counts[n]):
+            if name not in names:
+                names.append(name)
+        return names
+
     async def _load_previous_summaries(
         self,
         project_id: str,
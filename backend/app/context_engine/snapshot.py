@@ -0,0 +1,178 @@
+"""
+Context Snapshot / 上下文快照
+Immutable per-session view of cards, canon and summaries shared by all agents
+每个会话构建一次、所有 Agent 共享的卡片/事实表/摘要的不可变视图
+"""
+
+import hashlib
+import json
+from typing import List, Dict, Any, Optional, Tuple
+from pydantic import BaseModel, ConfigDict, Field
+from app.schemas.card import CharacterCard, WorldCard, StyleCard, RulesCard
+from app.schemas.canon import Fact, TimelineEvent, CharacterState
+
+
+class ContextSnapshot(BaseModel):
+    """
+    Immutable context snapshot for one session iteration
+    单次会话迭代的不可变上下文快照
+
+    Built once by ContextSelector.build_snapshot and passed to every agent
+    through `context["snapshot"]`, so cards and canon are loaded and
+    formatted only once.
+    由 ContextSelector.build_snapshot 构建一次，并通过 `context["snapshot"]`
+    传给每个 Agent，卡片与事实表只加载、格式化一次。
+    """
+    project_id: str = Field(..., description="Project ID / 项目ID")
+    chapter: str = Field(..., description="Chapter ID / 章节ID")
+    iteration: int = Field(0, description="Session iteration / 会话迭代次数")
+    revisions: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Storage revisions the snapshot was built from / 构建时的存储版本号"
+    )
+    style_card: Optional[StyleCard] = Field(None, description="Style card / 文风卡")
+    rules_card: Optional[RulesCard] = Field(None, description="Rules card / 规则卡")
+    character_cards: Tuple[CharacterCard, ...] = Field(
+        default_factory=tuple,
+        description="Selected character cards / 选中的角色卡"
+    )
+    world_cards: Tuple[WorldCard, ...] = Field(
+        default_factory=tuple,
+        description="Selected world cards / 选中的世界观卡"
+    )
+    facts: Tuple[Fact, ...] = Field(default_factory=tuple, description="All facts / 全部事实")
+    timeline: Tuple[TimelineEvent, ...] = Field(
+        default_factory=tuple,
+        description="All timeline events / 全部时间线事件"
+    )
+    near_timeline: Tuple[TimelineEvent, ...] = Field(
+        default_factory=tuple,
+        description="Timeline events near this chapter / 邻近章节的时间线事件"
+    )
+    character_states: Tuple[CharacterState, ...] = Field(
+        default_factory=tuple,
+        description="Character state history / 角色状态历史"
+    )
+    previous_summaries: Tuple[str, ...] = Field(
+        default_factory=tuple,
+        description="Distance-tiered previous summaries / 按距离分级的前文摘要"
+    )
+    mentions: Dict[str, Dict[str, int]] = Field(
+        default_factory=dict,
+        description="Detected entity mentions / 检测到的实体提及"
+    )
+    blocks: Dict[str, str] = Field(
+        default_factory=dict,
+        description="Precomputed formatted context blocks / 预先格式化的上下文块"
+    )
+    sources_fingerprint: str = Field(
+        "",
+        description="Hash of all cards, canon and summaries, independent of the selection / 全部卡片、事实表与摘要的哈希，与选取结果无关"
+    )
+
+    model_config = ConfigDict(frozen=True)
+
+    def get_character_card(self, name: str) -> Optional[CharacterCard]:
+        """Get a selected character card by name / 按名称获取选中的角色卡"""
+        for card in self.character_cards:
+            if card.name == name:
+                return card
+        return None
+
+    def get_character_state(self, name: str) -> Optional[CharacterState]:
+        """Get latest state of a character / 获取角色的最新状态"""
+        for state in reversed(self.character_states):
+            if state.character == name:
+                return state
+        return None
+
+    def get_block(self, name: str) -> str:
+        """Get a formatted context block ("" if empty) / 获取格式化的上下文块（为空则返回 ""）"""
+        return self.blocks.get(name, "")
+
+
+def fingerprint_sources(*sources: Any) -> str:
+    """
+    Stable hash of source material (models, lists, dicts)
+    源材料（模型、列表、字典）的稳定哈希
+
+    Unlike the blocks, it does not depend on which cards were selected,
+    so it only changes when cards, canon or summaries are edited.
+    与上下文块不同，它不依赖选中了哪些卡片，只在卡片、事实表或摘要被修改时变化。
+
+    Args:
+        sources: Source material / 源材料
+
+    Returns:
+        Hex digest / 十六进制摘要
+    """
+    def plain(value: Any) -> Any:
+        if isinstance(value, BaseModel):
+            return value.model_dump(mode="json")
+        return str(value)
+
+    payload = json.dumps(sources, default=plain, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _dump(item: Any) -> str:
+    """Format a model as text / 将模型格式化为文本"""
+    try:
+        return str(item.model_dump())
+    except Exception:
+        return str(item)
+
+
+def format_snapshot_blocks(
+    style_card: Optional[StyleCard],
+    rules_card: Optional[RulesCard],
+    character_cards: List[CharacterCard],
+    world_cards: List[WorldCard],
+    facts: List[Fact],
+    timeline: List[TimelineEvent],
+    character_states: List[CharacterState],
+    previous_summaries: List[str]
+) -> Dict[str, str]:
+    """
+    Precompute formatted context blocks / 预先计算格式化的上下文块
+
+    Returns:
+        Block name -> text; empty blocks are omitted / 块名 -> 文本；空块省略
+    """
+    blocks: Dict[str, str] = {}
+
+    if style_card:
+        blocks["style"] = "Style Card:\n" + _dump(style_card)
+
+    if rules_card:
+        blocks["rules"] = "Rules Card:\n" + _dump(rules_card)
+
+    if character_cards:
+        blocks["characters"] = "\n".join(
+            ["Character Cards:"] + [_dump(c) for c in character_cards[:10]]
+        )
+
+    if world_cards:
+        blocks["world"] = "\n".join(
+            ["World Cards:"] + [_dump(w) for w in world_cards[:10]]
+        )
+
+    if facts:
+        blocks["facts"] = "\n".join(
+            ["Canon Facts:"] + [_dump(f) for f in facts[-20:]]
+        )
+
+    if timeline:
+        blocks["timeline"] = "\n".join(
+            ["Canon Timeline:"] + [_dump(t) for t in timeline[-20:]]
+        )
+
+    if character_states:
+        blocks["character_states"] = "\n".join(
+            ["Character States:"] + [_dump(s) for s in character_states[:20]]
+        )
+
+    if previous_summaries:
+        blocks["summaries"] = "Previous Chapters:\n" + "\n\n".join(previous_summaries)
+
+    return blocks
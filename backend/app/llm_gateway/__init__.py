@@ -5,5 +5,27 @@ Unified interface for multiple LLM providers
 """
 
 from .gateway import LLMGateway, get_gateway, reset_gateway
+from .streaming import DeltaCoalescer
+from .cache import ResponseCache
+from .singleflight import SingleFlight
+from .http_pool import close_http_clients
+from .ledger import UsageLedger, usage_scope
+from .cassette import Cassette, CassetteMissError
+from .deadline import deadline_scope, remaining_time, DeadlineExceeded
 
-__all__ = ["LLMGateway", "get_gateway", "reset_gateway"]
+__all__ = [
+    "LLMGateway",
+    "get_gateway",
+    "reset_gateway",
+    "DeltaCoalescer",
+    "ResponseCache",
+    "SingleFlight",
+    "close_http_clients",
+    "UsageLedger",
+    "usage_scope",
+    "Cassette",
+    "CassetteMissError",
+    "deadline_scope",
+    "remaining_time",
+    "DeadlineExceeded",
+]
@@ -0,0 +1,205 @@
+"""
+Response Cache / 响应缓存
+Persistent content-addressed cache of LLM responses
+大模型响应的持久化内容寻址缓存
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+
+class ResponseCache:
+    """
+    SQLite-backed LRU cache of LLM responses
+    基于 SQLite 的大模型响应 LRU 缓存
+
+    Entries are keyed by hash(provider, model, messages, temperature,
+    max_tokens) and bounded by entry count and total size; the least recently
+    used entries are evicted first.
+    以 hash(提供商, 模型, 消息, 温度, 最大token数) 为键，按条目数与总大小限制容量，
+    优先淘汰最久未使用的条目。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 2000,
+        max_bytes: int = 64 * 1024 * 1024
+    ):
+        """
+        Initialize cache
+
+        Args:
+            path: SQLite database path / SQLite 数据库路径
+            max_entries: Maximum entries before LRU eviction / LRU 淘汰前的最大条目数
+            max_bytes: Maximum total response size (0 = unbounded) / 响应总大小上限（0 表示不限）
+        """
+        self.path = Path(path)
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = int(max_bytes or 0)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+        provider: str,
+        model: str,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float],
+        max_tokens: Optional[int]
+    ) -> str:
+        """
+        Build cache key / 构建缓存键
+
+        Gateway-only message keys (e.g. cache_breakpoint) do not change the
+        request the provider sees, so only role and content are hashed.
+        仅供网关使用的消息键（如 cache_breakpoint）不影响提供商看到的请求，
+        因此只对 role 与 content 求哈希。
+        """
+        payload = json.dumps(
+            [
+                provider,
+                model or "",
+                [[m.get("role"), m.get("content")] for m in messages],
+                temperature,
+                max_tokens,
+            ],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get cached response, refreshing its LRU position
+        获取缓存响应并刷新 LRU 位置
+
+        Args:
+            key: Cache key / 缓存键
+
+        Returns:
+            Cached response or None / 缓存的响应或None
+        """
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            conn.commit()
+            self.hits += 1
+
+        try:
+            return json.loads(row[0])
+        except Exception:
+            return None
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        """
+        Store response and evict least recently used entries
+        存储响应并淘汰最久未使用的条目
+
+        Args:
+            key: Cache key / 缓存键
+            response: Provider response / 提供商响应
+        """
+        data = json.dumps(response, ensure_ascii=False)
+        now = time.time()
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data.encode("utf-8")), now, now)
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics / 获取缓存统计信息
+
+        Returns:
+            Hits, misses, hit rate, evictions and current size / 命中、未命中、命中率、淘汰数与当前容量
+        """
+        entries, size = 0, 0
+        if self._conn is not None:
+            with self._lock:
+                entries, size = self._conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                ).fetchone()
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self) -> None:
+        """Close database connection / 关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Evict LRU entries beyond the bounds / 淘汰超出容量的 LRU 条目"""
+        count, size = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+
+        if count <= self.max_entries and (self.max_bytes <= 0 or size <= self.max_bytes):
+            return
+
+        # Oldest first; always keep the most recent entry
+        # 最旧的在前；始终保留最新的条目
+        rows = conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall()
+        victims = []
+        for key, entry_size in rows[:-1]:
+            if count <= self.max_entries and (self.max_bytes <= 0 or size <= self.max_bytes):
+                break
+            victims.append((key,))
+            count -= 1
+            size -= entry_size
+
+        conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open database on first use / 首次使用时打开数据库"""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, "
+                "response TEXT NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, "
+                "accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)"
+            )
+            self._conn.commit()
+        return self._conn
@@ -0,0 +1,232 @@
+"""
+Cassette / 录制回放磁带
+Record provider responses of a run and replay them deterministically
+录制一次运行中的提供商响应并确定性地回放
+"""
+
+import difflib
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+
+class CassetteMissError(Exception):
+    """Replayed request not found in the cassette / 回放的请求在磁带中不存在"""
+
+
+class Cassette:
+    """
+    JSONL file of recorded LLM calls / 已录制大模型调用的 JSONL 文件
+
+    Each line holds one call: the hash of its messages, temperature and
+    max_tokens, the full messages, the response and its latency. On replay
+    the calls for a hash are served in recording order, so a prompt asked
+    twice gets the two recorded answers in turn.
+    每行保存一次调用：消息、温度与最大token数的哈希，完整消息，响应及其延迟。
+    回放时同一哈希的调用按录制顺序返回，同一提示请求两次会依次得到两次录制的回答。
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize cassette
+
+        Args:
+            path: JSONL file path / JSONL 文件路径
+        """
+        self.path = Path(path)
+        self.recorded = 0
+        self.replayed = 0
+        self.misses: List[str] = []
+        self._entries: List[Dict[str, Any]] = []
+        self._queues: Dict[str, List[int]] = {}
+        self._consumed: set = set()
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float],
+        max_tokens: Optional[int]
+    ) -> str:
+        """
+        Hash of a request / 请求的哈希
+
+        Provider and model are left out so a recording can be replayed
+        whatever the agent's provider is; only role and content are hashed.
+        不包含提供商与模型，使录制结果可在任意提供商配置下回放；只对 role 与 content 求哈希。
+        """
+        payload = json.dumps(
+            [[[m.get("role"), m.get("content")] for m in messages], temperature, max_tokens],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def record(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        response: Dict[str, Any],
+        agent: Optional[str] = None
+    ) -> None:
+        """
+        Append one call / 追加一次调用
+
+        Args:
+            messages: Request messages / 请求消息
+            temperature: Requested temperature / 请求的温度
+            max_tokens: Requested max tokens / 请求的最大token数
+            response: Gateway response / 网关响应
+            agent: Calling agent / 调用方 Agent
+        """
+        entry = {
+            "key": self.make_key(messages, temperature, max_tokens),
+            "agent": agent,
+            "provider": response.get("provider"),
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "messages": [{"role": m.get("role"), "content": m.get("content")} for m in messages],
+            "response": {
+                k: response.get(k) for k in ("content", "usage", "model", "finish_reason")
+                if k in response
+            },
+            "elapsed_time": response.get("elapsed_time", 0.0),
+        }
+        line = json.dumps(entry, ensure_ascii=False)
+
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self.recorded += 1
+
+    def next_response(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float],
+        max_tokens: Optional[int]
+    ) -> Dict[str, Any]:
+        """
+        Next recorded entry for a request / 请求对应的下一条录制记录
+
+        Args:
+            messages: Request messages / 请求消息
+            temperature: Requested temperature / 请求的温度
+            max_tokens: Requested max tokens / 请求的最大token数
+
+        Returns:
+            Entry with "response" and "elapsed_time" / 包含 "response" 与 "elapsed_time" 的记录
+
+        Raises:
+            CassetteMissError: With the difference to the closest recorded prompt
+                               附带与最接近的录制提示之间的差异
+        """
+        key = self.make_key(messages, temperature, max_tokens)
+        with self._lock:
+            self._load()
+            queue = self._queues.get(key)
+            if queue:
+                index = queue.pop(0)
+                self._consumed.add(index)
+                self.replayed += 1
+                return self._entries[index]
+
+            report = self._miss_report(messages, temperature, max_tokens)
+            self.misses.append(report)
+        raise CassetteMissError(report)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cassette statistics / 获取磁带统计信息
+
+        Returns:
+            Path, recorded/replayed counts and misses / 路径、录制与回放数量以及未命中数
+        """
+        return {
+            "path": str(self.path),
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "misses": len(self.misses),
+            "unused": len(self._entries) - len(self._consumed) if self._loaded else None,
+        }
+
+    def _load(self) -> None:
+        """Read the cassette on first replay / 首次回放时读取磁带"""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path.exists():
+            print(f"[Cassette] {self.path} not found, every request will miss")
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"[Cassette] Skipping unreadable line {line_no} of {self.path}")
+                    continue
+                self._queues.setdefault(entry["key"], []).append(len(self._entries))
+                self._entries.append(entry)
+
+    def _miss_report(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float],
+        max_tokens: Optional[int]
+    ) -> str:
+        """
+        Describe how a request differs from the closest recorded one
+        描述请求与最接近的录制请求之间的差异
+
+        The closest entry is the first unconsumed one with the same system
+        prompt (i.e. the same agent), else the first unconsumed entry.
+        最接近的记录为首个系统提示相同（即同一 Agent）的未使用记录，否则为首个未使用记录。
+        """
+        pending = [i for i in range(len(self._entries)) if i not in self._consumed]
+        if not pending:
+            return "Cassette miss: every recorded call has been replayed"
+
+        system = messages[0].get("content") if messages else None
+        same_agent = [i for i in pending if self._entries[i]["messages"][:1] and
+                      self._entries[i]["messages"][0].get("content") == system]
+        index = (same_agent or pending)[0]
+        entry = self._entries[index]
+        label = f"recorded call #{index + 1}" + (f" ({entry['agent']})" if entry.get("agent") else "")
+
+        if entry.get("temperature") != temperature or entry.get("max_tokens") != max_tokens:
+            return (
+                f"Cassette miss vs {label}: parameters changed "
+                f"(temperature {entry.get('temperature')} -> {temperature}, "
+                f"max_tokens {entry.get('max_tokens')} -> {max_tokens})"
+            )
+
+        recorded = entry["messages"]
+        if len(recorded) != len(messages):
+            return f"Cassette miss vs {label}: {len(recorded)} messages recorded, {len(messages)} sent"
+
+        for position, (old, new) in enumerate(zip(recorded, messages)):
+            if old.get("role") == new.get("role") and old.get("content") == new.get("content"):
+                continue
+            diff = difflib.unified_diff(
+                (old.get("content") or "").splitlines(),
+                (new.get("content") or "").splitlines(),
+                fromfile="recorded",
+                tofile="current",
+                lineterm="",
+                n=1
+            )
+            lines = list(diff)
+            if len(lines) > 40:
+                lines = lines[:40] + [f"... ({len(lines) - 40} more diff lines)"]
+            return (
+                f"Cassette miss vs {label}: message {position} ({new.get('role')}) changed\n"
+                + "\n".join(lines)
+            )
+
+        return f"Cassette miss vs {label}: request differs"
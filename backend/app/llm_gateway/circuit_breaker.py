@@ -0,0 +1,170 @@
+"""
+Circuit Breaker / 熔断器
+Stop sending requests to a failing provider and probe it again after a cooldown
+停止向故障提供商发送请求，并在冷却后重新探测
+"""
+
+import time
+from collections import deque
+from typing import Deque, Dict, Any, Tuple
+
+
+class CircuitOpenError(Exception):
+    """Raised when a provider's circuit is open / 提供商熔断时抛出"""
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker with a sliding error-rate window
+    带滑动错误率窗口的单提供商熔断器
+
+    closed: requests pass; the breaker opens when at least `min_requests`
+    outcomes in the last `window_seconds` have an error rate of at least
+    `error_rate`.
+    open: requests are rejected until `open_seconds` have passed.
+    half_open: up to `half_open_max` probe requests pass; a success closes
+    the breaker, a failure opens it again.
+    closed：请求放行；最近 `window_seconds` 内至少 `min_requests` 次结果的
+    错误率达到 `error_rate` 时熔断。
+    open：在 `open_seconds` 内拒绝请求。
+    half_open：最多放行 `half_open_max` 个探测请求；成功则恢复，失败则再次熔断。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        window_seconds: float = 60.0,
+        min_requests: int = 5,
+        error_rate: float = 0.5,
+        open_seconds: float = 30.0,
+        half_open_max: int = 1
+    ):
+        """
+        Initialize a closed breaker
+
+        Args:
+            name: Provider name / 提供商名称
+            window_seconds: Error-rate window / 错误率统计窗口（秒）
+            min_requests: Minimum outcomes in window before opening / 熔断前窗口内的最少结果数
+            error_rate: Error rate that opens the breaker / 触发熔断的错误率
+            open_seconds: Cooldown before probing / 探测前的冷却时间（秒）
+            half_open_max: Concurrent probes in half-open state / 半开状态下的并发探测数
+        """
+        self.name = name
+        self.window_seconds = float(window_seconds)
+        self.min_requests = max(1, int(min_requests))
+        self.error_rate = float(error_rate)
+        self.open_seconds = float(open_seconds)
+        self.half_open_max = max(1, int(half_open_max))
+
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probes = 0
+        # (timestamp, success) outcomes / (时间戳, 是否成功) 结果
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+
+    def is_available(self) -> bool:
+        """
+        Whether a request would currently be let through, without reserving a probe
+        当前请求是否会被放行（不占用探测名额）
+        """
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            return time.monotonic() - self.opened_at >= self.open_seconds
+        return self._probes < self.half_open_max
+
+    def allow(self) -> bool:
+        """
+        Admit a request, moving open -> half_open after the cooldown
+        放行请求；冷却结束后由 open 转为 half_open
+
+        Returns:
+            True if the request may be sent / 请求可发送时返回 True
+        """
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                self.rejected += 1
+                return False
+            self.state = self.HALF_OPEN
+            self._probes = 0
+
+        if self.state == self.HALF_OPEN:
+            if self._probes >= self.half_open_max:
+                self.rejected += 1
+                return False
+            self._probes += 1
+
+        return True
+
+    def record_success(self) -> None:
+        """Record a successful request / 记录成功的请求"""
+        if self.state == self.HALF_OPEN:
+            print(f"[CircuitBreaker] {self.name} recovered, closing circuit")
+            self.state = self.CLOSED
+            self._probes = 0
+            self._outcomes.clear()
+            return
+        self._record(True)
+
+    def release(self) -> None:
+        """Return a probe slot whose request was cancelled / 归还请求被取消的探测名额"""
+        if self.state == self.HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def record_failure(self) -> None:
+        """Record a failed request / 记录失败的请求"""
+        if self.state == self.HALF_OPEN:
+            self._open("probe failed")
+            return
+        if self.state == self.OPEN:
+            return
+
+        self._record(False)
+        total = len(self._outcomes)
+        errors = sum(1 for _, ok in self._outcomes if not ok)
+        if total >= self.min_requests and errors / total >= self.error_rate:
+            self._open(f"{errors}/{total} errors in {self.window_seconds:.0f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get breaker statistics / 获取熔断器统计信息
+
+        Returns:
+            State, window outcomes, open count and rejected requests
+            状态、窗口内结果、熔断次数与被拒请求数
+        """
+        self._trim()
+        return {
+            "state": self.state,
+            "window_requests": len(self._outcomes),
+            "window_errors": sum(1 for _, ok in self._outcomes if not ok),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+    def _open(self, reason: str) -> None:
+        """Open the circuit / 熔断"""
+        print(f"[CircuitBreaker] Opening circuit for {self.name}: {reason}")
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        self._probes = 0
+        self._outcomes.clear()
+
+    def _record(self, success: bool) -> None:
+        """Add an outcome to the window / 将结果加入窗口"""
+        self._outcomes.append((time.monotonic(), success))
+        self._trim()
+
+    def _trim(self) -> None:
+        """Drop outcomes outside the window / 丢弃窗口外的结果"""
+        cutoff = time.monotonic() - self.window_seconds
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            self._outcomes.popleft()
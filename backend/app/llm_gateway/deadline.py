@@ -0,0 +1,88 @@
+"""
+Deadline / 截止时间
+Deadline scopes propagated to every gateway call through a context variable
+通过上下文变量传递到每次网关调用的截止时间作用域
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Iterator, Optional
+
+_deadline: ContextVar[Optional[float]] = ContextVar("novix_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The deadline of the current scope has passed / 当前作用域的截止时间已过"""
+
+
+@contextmanager
+def deadline_scope(timeout: Optional[float]) -> Iterator[None]:
+    """
+    Bound LLM calls made inside the block by a timeout
+    为代码块内的大模型调用设置超时
+
+    Scopes nest: the effective deadline is the earlier of the enclosing one
+    and now + timeout. Like usage_scope, it follows the calling task and the
+    tasks it spawns. A timeout of None keeps the enclosing deadline.
+    作用域可嵌套：实际截止时间取外层截止时间与 now + timeout 中较早者。与 usage_scope
+    相同，它随调用任务及其派生任务传递。timeout 为 None 时沿用外层截止时间。
+
+    Args:
+        timeout: Seconds from now, or None / 从现在起的秒数，或 None
+    """
+    deadline = _deadline.get()
+    if timeout is not None:
+        candidate = time.monotonic() + max(0.0, float(timeout))
+        deadline = candidate if deadline is None else min(deadline, candidate)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """
+    Seconds left before the current deadline / 距当前截止时间的剩余秒数
+
+    Returns:
+        Remaining seconds (may be negative), or None without a deadline
+        剩余秒数（可能为负），无截止时间时为 None
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+async def within_deadline(awaitable: Awaitable[Any]) -> Any:
+    """
+    Await under the current deadline, cancelling the work when it passes
+    在当前截止时间内等待，超时则取消该任务
+
+    Cancellation reaches the provider's HTTP request, which is closed
+    rather than left running to completion.
+    取消会传递到提供商的 HTTP 请求，使其被关闭而不是继续运行到结束。
+
+    Args:
+        awaitable: Coroutine to run / 要运行的协程
+
+    Returns:
+        Its result / 其结果
+
+    Raises:
+        DeadlineExceeded: If the deadline has passed / 截止时间已过
+    """
+    remaining = remaining_time()
+    if remaining is None:
+        return await awaitable
+    if remaining <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded("Deadline exceeded before the call started")
+    try:
+        return await asyncio.wait_for(awaitable, remaining)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"Deadline exceeded after {remaining:.1f}s")
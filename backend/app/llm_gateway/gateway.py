@@ -7,14 +7,34 @@ Unified interface with retry, rate limiting, and cost tracking
 import asyncio
 import os
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Awaitable
 from app.config import config
-from app.llm_gateway.providers import (
-    BaseLLMProvider,
-    OpenAIProvider,
-    AnthropicProvider,
-    DeepSeekProvider,
-    MockProvider,
+from app.llm_gateway.providers import BaseLLMProvider, get_provider_class
+from app.llm_gateway.cache import ResponseCache
+from app.llm_gateway.singleflight import SingleFlight
+from app.llm_gateway.rate_limit import RateLimiterRegistry, estimate_prompt_tokens, backoff_delay
+from app.llm_gateway.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.llm_gateway.latency import LatencyHistogram
+from app.llm_gateway.http_pool import pool_stats
+from app.llm_gateway.ledger import UsageLedger
+from app.llm_gateway.cassette import Cassette, CassetteMissError
+from app.llm_gateway.deadline import DeadlineExceeded, deadline_scope, remaining_time, within_deadline
+
+
+# finish_reason values meaning the output hit max_tokens (OpenAI-style, Anthropic)
+# 表示输出达到 max_tokens 的 finish_reason 取值（OpenAI 风格、Anthropic）
+TRUNCATED_FINISH_REASONS = ("length", "max_tokens")
+
+# Follow-up prompts for truncated outputs / 截断输出的续写提示
+CONTINUE_NEXT_PARAGRAPH = (
+    "Your previous reply was cut off by the output limit. Continue with the next paragraph; "
+    "do not repeat earlier text or add any commentary.\n"
+    "上一条回复因输出长度限制被截断。请从下一段继续写，不要重复已写内容，也不要添加任何说明。"
+)
+CONTINUE_INLINE = (
+    "Your previous reply was cut off mid-paragraph by the output limit. Continue exactly where it stops; "
+    "do not repeat earlier text or add any commentary.\n"
+    "上一条回复因输出长度限制在段落中间被截断。请从中断处直接续写，不要重复已写内容，也不要添加任何说明。"
 )
 
 
@@ -29,16 +49,99 @@ class LLMGateway:
         self.providers: Dict[str, BaseLLMProvider] = {}
         self._init_providers()
         
-        # Retry configuration / 重试配置
-        self.max_retries = 3
-        self.retry_delays = [1, 2, 4]  # Exponential backoff / 指数退避
+        # Cassette record/replay (llm.cassette.mode: off | record | replay)
+        # 磁带录制/回放（llm.cassette.mode: off | record | replay）
+        cassette_config = config.get("llm", {}).get("cassette", {})
+        self.cassette_mode = cassette_config.get("mode") or "off"
+        self.cassette: Optional[Cassette] = None
+        if self.cassette_mode in ("record", "replay"):
+            self.cassette = Cassette(cassette_config.get("path", "../data/.cache/cassette.jsonl"))
+        if self.cassette_mode == "replay":
+            # Every request is served from the cassette / 所有请求都由磁带返回
+            self.providers["replay"] = get_provider_class("replay")(
+                self.cassette,
+                latency_scale=cassette_config.get("latency_scale", 1.0)
+            )
+        
+        # Retry configuration (full-jitter backoff, Retry-After honored)
+        # 重试配置（完全抖动退避，遵循 Retry-After）
+        retry_config = config.get("llm", {}).get("retry", {})
+        self.max_retries = retry_config.get("max_retries", 3)
+        self.retry_base_delay = retry_config.get("base_delay", 1.0)
+        self.retry_max_delay = retry_config.get("max_delay", 30.0)
+        
+        # Concurrency and RPM/TPM limits from llm.providers.*
+        # 来自 llm.providers.* 的并发与 RPM/TPM 限制
+        self.rate_limits = RateLimiterRegistry(config.get("llm", {}).get("providers", {}))
+        
+        # Circuit breakers per provider, created on first use / 每个提供商的熔断器，首次使用时创建
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        
+        # Latency per "provider/agent", from elapsed_time / 每个 "提供商/Agent" 的延迟，来自 elapsed_time
+        self.latency: Dict[str, LatencyHistogram] = {}
+        
+        # Hedged requests (opt-in) / 对冲请求（需显式开启）
+        hedging_config = config.get("llm", {}).get("hedging", {})
+        self.hedging_enabled = hedging_config.get("enabled", False)
+        self.hedge_quantile = hedging_config.get("quantile", 0.9)
+        self.hedge_min_samples = hedging_config.get("min_samples", 20)
+        self.hedge_max_rate = hedging_config.get("max_hedge_rate", 0.1)
+        self.hedge_target = hedging_config.get("target", "secondary")
+        self.hedge_eligible = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.hedges_over_budget = 0
+        
+        # Continuation of outputs cut off at max_tokens, for agents with continue_on_length: true
+        # 对 continue_on_length: true 的 Agent 续写在 max_tokens 处截断的输出
+        continuation_config = config.get("llm", {}).get("continuation", {})
+        self.max_continuations = continuation_config.get("max_continuations", 2)
+        self.continuations = 0
         
         # Cost tracking / 成本追踪
         self.total_tokens = 0
         self.total_requests = 0
+        
+        # Prompt cache tracking / 提示缓存追踪
+        self.total_prompt_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+        
+        # Response cache (opt-in) / 响应缓存（需显式开启）
+        cache_config = config.get("llm", {}).get("response_cache", {})
+        self.response_cache: Optional[ResponseCache] = None
+        if cache_config.get("enabled", False):
+            self.response_cache = ResponseCache(
+                path=cache_config.get("path", "../data/.cache/llm_responses.sqlite3"),
+                max_entries=cache_config.get("max_entries", 2000),
+                max_bytes=cache_config.get("max_bytes", 64 * 1024 * 1024)
+            )
+        self.cache_max_temperature = cache_config.get("max_temperature", 0.3)
+        
+        # Identical concurrent requests share one provider call
+        # 相同的并发请求共享一次提供商调用
+        flight_config = config.get("llm", {}).get("single_flight", {})
+        self.single_flight: Optional[SingleFlight] = None
+        if flight_config.get("enabled", True):
+            self.single_flight = SingleFlight()
+        
+        # Per-call usage ledger with price table / 带价格表的逐次调用用量账本
+        ledger_config = config.get("llm", {}).get("usage_ledger", {})
+        self.usage_ledger: Optional[UsageLedger] = None
+        if ledger_config.get("enabled", True):
+            self.usage_ledger = UsageLedger(
+                path=ledger_config.get("path", "../data/.cache/llm_usage.sqlite3"),
+                prices=ledger_config.get("prices", {})
+            )
     
     def _init_providers(self) -> None:
-        """Initialize LLM providers from config / 从配置初始化提供商"""
+        """
+        Initialize LLM providers from config / 从配置初始化提供商
+        
+        Provider classes come from the lazy registry, so only the SDKs of
+        providers with a real key are imported.
+        提供商类来自延迟注册表，因此只会导入配置了有效密钥的提供商的 SDK。
+        """
         providers_config = config.get("llm", {}).get("providers", {})
 
         def _has_real_key(value: Optional[str]) -> bool:
@@ -53,99 +156,842 @@ class LLMGateway:
             return not any(v.startswith(p) for p in placeholders)
 
         # Always register Mock provider (no key needed)
-        self.providers["mock"] = MockProvider()
+        self.providers["mock"] = get_provider_class("mock")()
+        
+        # Offline provider with simulated latency and failures (no key needed)
+        # 模拟延迟与故障的离线提供商（无需密钥）
+        self.providers["simulated"] = get_provider_class("simulated").from_config(
+            providers_config.get("simulated", {})
+        )
         
         # Initialize OpenAI / 初始化 OpenAI
         if "openai" in providers_config:
             openai_config = providers_config["openai"]
             if _has_real_key(openai_config.get("api_key")):
-                self.providers["openai"] = OpenAIProvider(
+                self.providers["openai"] = get_provider_class("openai")(
                     api_key=openai_config["api_key"],
                     model=openai_config.get("model", "gpt-4o"),
                     max_tokens=openai_config.get("max_tokens", 8000),
-                    temperature=openai_config.get("temperature", 0.7)
+                    temperature=openai_config.get("temperature", 0.7),
+                    base_url=openai_config.get("base_url")
                 )
         
         # Initialize Anthropic / 初始化 Anthropic
         if "anthropic" in providers_config:
             anthropic_config = providers_config["anthropic"]
             if _has_real_key(anthropic_config.get("api_key")):
-                self.providers["anthropic"] = AnthropicProvider(
+                self.providers["anthropic"] = get_provider_class("anthropic")(
                     api_key=anthropic_config["api_key"],
                     model=anthropic_config.get("model", "claude-3-5-sonnet-20241022"),
                     max_tokens=anthropic_config.get("max_tokens", 8000),
-                    temperature=anthropic_config.get("temperature", 0.7)
+                    temperature=anthropic_config.get("temperature", 0.7),
+                    base_url=anthropic_config.get("base_url")
                 )
         
         # Initialize DeepSeek / 初始化 DeepSeek
         if "deepseek" in providers_config:
             deepseek_config = providers_config["deepseek"]
             if _has_real_key(deepseek_config.get("api_key")):
-                self.providers["deepseek"] = DeepSeekProvider(
+                self.providers["deepseek"] = get_provider_class("deepseek")(
                     api_key=deepseek_config["api_key"],
                     model=deepseek_config.get("model", "deepseek-chat"),
                     max_tokens=deepseek_config.get("max_tokens", 8000),
-                    temperature=deepseek_config.get("temperature", 0.7)
+                    temperature=deepseek_config.get("temperature", 0.7),
+                    base_url=deepseek_config.get("base_url")
                 )
     
     async def chat(
         self,
-        messages: List[Dict[str, str]],
+        messages: List[Dict[str, Any]],
         provider: Optional[str] = None,
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
-        retry: bool = True
+        retry: bool = True,
+        agent: Optional[str] = None,
+        cache: Optional[bool] = None,
+        hedge: Optional[bool] = None,
+        continue_on_length: Optional[bool] = None,
+        timeout: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Send chat request with automatic retry
         发送聊天请求，支持自动重试
         
+        With hedging, a duplicate request is sent when the first one has not
+        returned by the observed latency quantile; the first response wins.
+        启用对冲时，若首个请求在观测到的延迟分位数内未返回，则发送一个重复请求，
+        先返回者胜出。
+        
+        With continue_on_length, an output cut off at max_tokens is continued
+        by follow-up requests and stitched at a paragraph boundary.
+        启用 continue_on_length 时，在 max_tokens 处截断的输出会通过后续请求续写，
+        并在段落边界处拼接。
+        
         Args:
             messages: List of messages / 消息列表
             provider: Provider name (openai, anthropic, deepseek) / 提供商名称
             temperature: Temperature override / 温度覆盖
             max_tokens: Max tokens override / 最大token数覆盖
             retry: Enable retry on failure / 启用失败重试
+            agent: Calling agent, selects the cache policy and fallback chain
+                   调用方 Agent，用于选择缓存策略与降级链
+            cache: Force response caching on/off / 强制开启或关闭响应缓存
+            hedge: Force hedging on/off (default: agents.<name>.hedge)
+                   强制开启或关闭对冲（默认取 agents.<name>.hedge）
+            continue_on_length: Force continuation of truncated outputs on/off
+                                (default: agents.<name>.continue_on_length)
+                                强制开启或关闭截断输出续写（默认取 agents.<name>.continue_on_length）
+            timeout: Seconds for the call, within any enclosing deadline_scope
+                     本次调用的秒数，受外层 deadline_scope 约束
             
         Returns:
             Response dict with content, usage, etc. / 包含内容、使用量等的响应字典
             
         Raises:
             ValueError: If provider not available / 提供商不可用
-            Exception: If all retries failed / 所有重试都失败
+            DeadlineExceeded: If the deadline passed; the request is cancelled
+                              截止时间已过；请求被取消
+            Exception: If all retries and fallbacks failed / 所有重试与降级都失败
         """
-        # Select provider / 选择提供商
-        if provider is None:
-            provider = os.getenv("NOVIX_LLM_PROVIDER") or config.get("llm", {}).get("default_provider", "openai")
+        chain = self._provider_chain(provider, agent)
+        llm_provider = chain[0]
+        wall_start = time.time()
         
-        if provider not in self.providers:
-            raise ValueError(
-                f"Provider '{provider}' not available. "
-                f"Available: {list(self.providers.keys())}"
-            )
+        with deadline_scope(timeout):
+            try:
+                response = await within_deadline(self._serve_chat(
+                    chain, messages, temperature, max_tokens, retry, agent, cache, hedge
+                ))
+            except (Exception, asyncio.CancelledError) as e:
+                # Cancelled calls may still be billed / 被取消的调用仍可能计费
+                self._log_usage("chat", agent, llm_provider, None, wall_start, e)
+                raise
+            
+            self._log_usage("chat", agent, llm_provider, response, wall_start)
+            
+            if self._continues(response, agent, continue_on_length):
+                response = await self._continue_truncated(
+                    "chat",
+                    messages,
+                    response,
+                    lambda follow_up: self._serve_chat(
+                        chain, follow_up, temperature, max_tokens, retry, agent, cache, hedge
+                    ),
+                    agent,
+                    llm_provider
+                )
+            
+            self._record_cassette(messages, temperature, max_tokens, response, agent)
+            return response
+    
+    async def _serve_chat(
+        self,
+        chain: List[BaseLLMProvider],
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        retry: bool,
+        agent: Optional[str],
+        cache: Optional[bool],
+        hedge: Optional[bool]
+    ) -> Dict[str, Any]:
+        """Serve chat() from the response cache or the provider chain / 由响应缓存或提供商链完成 chat()"""
+        llm_provider = chain[0]
         
-        llm_provider = self.providers[provider]
+        cache_key = self._response_cache_key(llm_provider, messages, temperature, max_tokens, agent, cache)
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return self._cached_response(llm_provider, cached)
         
-        # Execute with retry / 执行带重试的请求
-        if retry:
-            return await self._chat_with_retry(
-                llm_provider,
-                messages,
-                temperature,
-                max_tokens
-            )
-        else:
+        async def attempt(candidate: BaseLLMProvider) -> Dict[str, Any]:
+            # Execute with retry / 执行带重试的请求
+            if retry:
+                return await self._chat_with_retry(
+                    candidate,
+                    messages,
+                    temperature,
+                    max_tokens
+                )
             return await self._execute_chat(
-                llm_provider,
+                candidate,
                 messages,
                 temperature,
                 max_tokens
             )
+        
+        async def call(emit: Callable[[str], Awaitable[None]]) -> Dict[str, Any]:
+            hedge_delay = self._hedge_delay(llm_provider, agent, hedge)
+            if hedge_delay is None:
+                response = await self._with_fallback(chain, attempt)
+            else:
+                response = await self._hedged(chain, attempt, hedge_delay)
+            self._observe_latency(response, agent)
+            if cache_key and response["provider"] == llm_provider.get_provider_name():
+                self._store_response(cache_key, response)
+            return response
+        
+        return await self._coalesce(
+            "chat", llm_provider, messages, temperature, max_tokens, call
+        )
+    
+    async def chat_stream(
+        self,
+        messages: List[Dict[str, Any]],
+        provider: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
+        retry: bool = True,
+        agent: Optional[str] = None,
+        cache: Optional[bool] = None,
+        continue_on_length: Optional[bool] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Send streaming chat request, forwarding text deltas as they arrive
+        发送流式聊天请求，文本增量到达时即转发
+
+        Retries follow chat(), but only until the first delta has been
+        forwarded: once text is visible to the caller a retry would repeat it,
+        so later failures are raised. Statistics are tracked as in chat().
+        重试策略与 chat() 相同，但仅限于首个增量转发之前：文本一旦对调用方可见，
+        重试会造成重复，因此之后的失败直接抛出。统计方式与 chat() 相同。
+
+        Truncated outputs are continued as in chat(), except that the
+        continuation picks up mid-paragraph since the cut-off text has
+        already been forwarded.
+        截断输出的续写与 chat() 相同，但由于截断前的文本已转发，续写从段落中间接续。
+
+        Args:
+            messages: List of messages / 消息列表
+            provider: Provider name (openai, anthropic, deepseek) / 提供商名称
+            temperature: Temperature override / 温度覆盖
+            max_tokens: Max tokens override / 最大token数覆盖
+            on_delta: Async callback for each text delta / 每个文本增量的异步回调
+            retry: Enable retry on failure / 启用失败重试
+            agent: Calling agent, selects the cache policy and fallback chain
+                   调用方 Agent，用于选择缓存策略与降级链
+            cache: Force response caching on/off / 强制开启或关闭响应缓存
+            continue_on_length: Force continuation of truncated outputs on/off
+                                强制开启或关闭截断输出续写
+            timeout: Seconds for the call, within any enclosing deadline_scope
+                     本次调用的秒数，受外层 deadline_scope 约束
+
+        Returns:
+            Response dict with the full content, same as chat()
+            与 chat() 相同、包含完整内容的响应字典
+
+        Raises:
+            ValueError: If provider not available / 提供商不可用
+            DeadlineExceeded: If the deadline passed / 截止时间已过
+            Exception: If all retries failed or the stream broke after output
+                       所有重试都失败，或输出开始后流中断
+        """
+        chain = self._provider_chain(provider, agent)
+        llm_provider = chain[0]
+        wall_start = time.time()
+        
+        with deadline_scope(timeout):
+            try:
+                response = await within_deadline(self._serve_stream(
+                    chain, messages, temperature, max_tokens, on_delta, retry, agent, cache
+                ))
+            except (Exception, asyncio.CancelledError) as e:
+                # Cancelled calls may still be billed / 被取消的调用仍可能计费
+                self._log_usage("stream", agent, llm_provider, None, wall_start, e)
+                raise
+            
+            self._log_usage("stream", agent, llm_provider, response, wall_start)
+            
+            if self._continues(response, agent, continue_on_length):
+                response = await self._continue_truncated(
+                    "stream",
+                    messages,
+                    response,
+                    lambda follow_up: self._serve_stream(
+                        chain, follow_up, temperature, max_tokens, on_delta, retry, agent, cache
+                    ),
+                    agent,
+                    llm_provider
+                )
+            
+            self._record_cassette(messages, temperature, max_tokens, response, agent)
+            return response
+    
+    async def _serve_stream(
+        self,
+        chain: List[BaseLLMProvider],
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        on_delta: Optional[Callable[[str], Awaitable[None]]],
+        retry: bool,
+        agent: Optional[str],
+        cache: Optional[bool]
+    ) -> Dict[str, Any]:
+        """Serve chat_stream() from the response cache or the provider chain / 由响应缓存或提供商链完成 chat_stream()"""
+        llm_provider = chain[0]
+        
+        # A cache hit is forwarded as a single delta / 缓存命中时作为单个增量转发
+        cache_key = self._response_cache_key(llm_provider, messages, temperature, max_tokens, agent, cache)
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                if on_delta and cached.get("content"):
+                    await on_delta(cached["content"])
+                return self._cached_response(llm_provider, cached)
+        
+        async def call(emit: Callable[[str], Awaitable[None]]) -> Dict[str, Any]:
+            started = False
+            
+            async def forward(text: str) -> None:
+                nonlocal started
+                started = True
+                await emit(text)
+            
+            async def attempt(candidate: BaseLLMProvider) -> Dict[str, Any]:
+                return await self._stream_with_retry(
+                    candidate,
+                    messages,
+                    temperature,
+                    max_tokens,
+                    forward,
+                    retry
+                )
+            
+            # Fall back only while nothing has been shown / 仅在尚未输出任何内容时降级
+            response = await self._with_fallback(chain, attempt, lambda: not started)
+            self._observe_latency(response, agent)
+            if cache_key and response["provider"] == llm_provider.get_provider_name():
+                self._store_response(cache_key, response)
+            return response
+        
+        return await self._coalesce(
+            "stream", llm_provider, messages, temperature, max_tokens, call, on_delta
+        )
+    
+    def _continues(
+        self,
+        response: Dict[str, Any],
+        agent: Optional[str],
+        continue_on_length: Optional[bool]
+    ) -> bool:
+        """
+        Whether a response is truncated and should be continued
+        响应是否被截断且应当续写
+        
+        Replay never continues: the cassette holds the stitched response.
+        回放模式从不续写：磁带中保存的是拼接后的响应。
+        """
+        if response.get("finish_reason") not in TRUNCATED_FINISH_REASONS:
+            return False
+        if self.max_continuations <= 0 or self.cassette_mode == "replay":
+            return False
+        if continue_on_length is None:
+            agent_config = config.get("agents", {}).get(agent, {}) if agent else {}
+            continue_on_length = agent_config.get("continue_on_length", False)
+        return bool(continue_on_length)
+    
+    async def _continue_truncated(
+        self,
+        mode: str,
+        messages: List[Dict[str, Any]],
+        response: Dict[str, Any],
+        serve: Callable[[List[Dict[str, Any]]], Awaitable[Dict[str, Any]]],
+        agent: Optional[str],
+        primary: BaseLLMProvider
+    ) -> Dict[str, Any]:
+        """
+        Continue a truncated output and stitch the segments
+        续写被截断的输出并拼接各段
+        
+        Each follow-up repeats the original messages unchanged, so their
+        cached prompt prefix is reused, then appends the text so far as an
+        assistant message. In "chat" mode the unfinished last paragraph is
+        dropped and rewritten by the follow-up; in "stream" mode it has
+        already been forwarded, so the follow-up continues it inline.
+        Usage is summed over all segments, each of which is also logged.
+        A failed follow-up returns the text so far, still marked truncated;
+        an expired deadline is raised instead, so the stage fails as it would
+        on its first request.
+        每次续写请求原样重复原始消息以复用已缓存的提示前缀，再将已有文本作为
+        assistant 消息追加。"chat" 模式下丢弃未写完的最后一段，由续写重写；
+        "stream" 模式下该段已转发，续写直接接着写。用量按所有分段累加，
+        每个分段也会单独记账。续写失败时返回已有文本，仍标记为截断；截止时间
+        已过时则抛出异常，使阶段与首个请求超时一样失败。
+        
+        Args:
+            mode: "chat" or "stream" / "chat" 或 "stream"
+            messages: Original messages / 原始消息
+            response: Truncated first response / 被截断的首个响应
+            serve: Serves one follow-up request / 执行一次续写请求
+            agent: Calling agent / 调用方 Agent
+            primary: First provider of the chain / 链中首个提供商
+            
+        Returns:
+            Stitched response with "segments" / 带 "segments" 的拼接后响应
+            
+        Raises:
+            DeadlineExceeded: If the deadline passed during a follow-up / 续写期间截止时间已过
+        """
+        text = response.get("content") or ""
+        segments = [response]
+        
+        while (
+            len(segments) <= self.max_continuations
+            and segments[-1].get("finish_reason") in TRUNCATED_FINISH_REASONS
+        ):
+            cut = len(text) if mode == "stream" else _paragraph_cut(text)
+            inline = cut >= len(text)
+            prefix = text if inline else text[:cut].rstrip()
+            if not prefix.strip():
+                break
+            
+            follow_up = list(messages) + [
+                {"role": "assistant", "content": prefix},
+                {"role": "user", "content": CONTINUE_INLINE if inline else CONTINUE_NEXT_PARAGRAPH},
+            ]
+            
+            self.continuations += 1
+            wall_start = time.time()
+            try:
+                segment = await within_deadline(serve(follow_up))
+            except DeadlineExceeded as e:
+                # The stage ran out of time; do not pass the partial text off as its result
+                # 阶段已超时；不要把部分文本当作其结果
+                self._log_usage(mode, agent, primary, None, wall_start, e)
+                raise
+            except Exception as e:
+                self._log_usage(mode, agent, primary, None, wall_start, e)
+                print(f"[LLMGateway] Continuation of truncated output failed: {str(e)}")
+                break
+            self._log_usage(mode, agent, primary, segment, wall_start)
+            
+            segments.append(segment)
+            addition = segment.get("content") or ""
+            text = prefix + addition if inline else prefix + "\n\n" + addition.lstrip()
+        
+        if len(segments) == 1:
+            return response
+        
+        print(f"[LLMGateway] Continued truncated output in {len(segments)} segments")
+        stitched = dict(response)
+        usage_keys = ("prompt_tokens", "completion_tokens", "total_tokens", "cache_read_tokens", "cache_write_tokens")
+        stitched["usage"] = {
+            key: sum((segment.get("usage") or {}).get(key, 0) for segment in segments)
+            for key in usage_keys
+        }
+        stitched["content"] = text
+        stitched["finish_reason"] = segments[-1].get("finish_reason")
+        stitched["elapsed_time"] = sum(segment.get("elapsed_time", 0.0) for segment in segments)
+        stitched["retries"] = sum(segment.get("retries", 0) for segment in segments)
+        stitched["segments"] = len(segments)
+        return stitched
+    
+    async def _coalesce(
+        self,
+        mode: str,
+        provider: BaseLLMProvider,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        call: Callable[[Callable[[str], Awaitable[None]]], Awaitable[Dict[str, Any]]],
+        on_delta: Optional[Callable[[str], Awaitable[None]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run call, sharing it with identical in-flight requests
+        执行调用，并与相同的进行中请求共享
+        
+        Streaming and non-streaming requests are keyed separately so that
+        streaming callers always receive deltas.
+        流式与非流式请求分开计键，保证流式调用方总能收到增量。
+        
+        Args:
+            mode: "chat" or "stream" / "chat" 或 "stream"
+            provider: LLM provider instance / 提供商实例
+            messages: Messages list / 消息列表
+            temperature: Temperature / 温度
+            max_tokens: Max tokens / 最大token数
+            call: Request factory receiving the delta emitter / 接收增量分发函数的请求工厂
+            on_delta: Optional async callback for text deltas / 可选的文本增量异步回调
+            
+        Returns:
+            Response dict / 响应字典
+        """
+        if self.single_flight is None:
+            return await call(on_delta or _ignore_delta)
+        
+        key = mode + ":" + ResponseCache.make_key(
+            provider.get_provider_name(),
+            provider.model,
+            messages,
+            temperature,
+            max_tokens
+        )
+        return await self.single_flight.do(key, call, on_delta)
+    
+    async def _stream_with_retry(
+        self,
+        provider: BaseLLMProvider,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        on_delta: Callable[[str], Awaitable[None]],
+        retry: bool
+    ) -> Dict[str, Any]:
+        """
+        Execute streaming request, retrying only before the first delta
+        执行流式请求，仅在首个增量之前重试
+        
+        Args:
+            provider: LLM provider instance / 提供商实例
+            messages: Messages list / 消息列表
+            temperature: Temperature / 温度
+            max_tokens: Max tokens / 最大token数
+            on_delta: Async callback for each text delta / 每个文本增量的异步回调
+            retry: Enable retry on failure / 启用失败重试
+            
+        Returns:
+            Response dict / 响应字典
+            
+        Raises:
+            Exception: If all retries failed or the stream broke after output
+                       所有重试都失败，或输出开始后流中断
+        """
+        attempts = self.max_retries if retry else 1
+        last_exception = None
+
+        for attempt in range(attempts):
+            started = False
+
+            async def forward(text: str) -> None:
+                nonlocal started
+                started = True
+                await on_delta(text)
+
+            try:
+                response = await self._execute_stream(
+                    provider,
+                    messages,
+                    temperature,
+                    max_tokens,
+                    forward
+                )
+                response["retries"] = attempt
+                return response
+            except CircuitOpenError:
+                raise last_exception or CircuitOpenError(provider.get_provider_name())
+            except CassetteMissError:
+                raise
+            except Exception as e:
+                last_exception = e
+
+                if started:
+                    print(f"[LLMGateway] Stream interrupted after output, not retrying: {str(e)}")
+                    raise
+                if not self._breaker(provider.get_provider_name()).is_available():
+                    raise
+                if attempt < attempts - 1:
+                    delay = self._retry_delay(attempt, e)
+                    if not self._retry_fits_deadline(delay):
+                        raise
+                    print(
+                        f"[LLMGateway] Stream retry {attempt + 1}/{attempts} "
+                        f"after {delay:.1f}s due to: {str(e)}"
+                    )
+                    await asyncio.sleep(delay)
+                elif retry:
+                    print(f"[LLMGateway] All retries failed: {str(e)}")
+
+        raise last_exception
+    
+    def _provider_chain(
+        self,
+        provider: Optional[str],
+        agent: Optional[str] = None
+    ) -> List[BaseLLMProvider]:
+        """
+        Ordered providers to try: requested provider, then the agent's chain
+        按顺序尝试的提供商：先是指定的提供商，然后是 Agent 的降级链
+        
+        Args:
+            provider: Requested provider name / 指定的提供商名称
+            agent: Calling agent / 调用方 Agent
+            
+        Returns:
+            Available provider instances / 可用的提供商实例
+            
+        Raises:
+            ValueError: If no provider in the chain is available / 链中没有可用的提供商
+        """
+        if self.cassette_mode == "replay":
+            return [self.providers["replay"]]
+        
+        names: List[str] = [provider] if provider else []
+        if agent:
+            names += self.get_provider_chain_for_agent(agent)
+        if not names:
+            names.append(
+                os.getenv("NOVIX_LLM_PROVIDER") or config.get("llm", {}).get("default_provider", "openai")
+            )
+        
+        chain: List[BaseLLMProvider] = []
+        for name in dict.fromkeys(names):
+            if name in self.providers:
+                chain.append(self.providers[name])
+        
+        if not chain:
+            raise ValueError(
+                f"Provider '{names[0]}' not available. "
+                f"Available: {list(self.providers.keys())}"
+            )
+        if names[0] not in self.providers:
+            print(f"[LLMGateway] Provider '{names[0]}' not available, using '{chain[0].get_provider_name()}'")
+        
+        return chain
+    
+    async def _with_fallback(
+        self,
+        chain: List[BaseLLMProvider],
+        attempt: Callable[[BaseLLMProvider], Awaitable[Dict[str, Any]]],
+        can_fall_back: Optional[Callable[[], bool]] = None
+    ) -> Dict[str, Any]:
+        """
+        Try providers in order until one succeeds
+        按顺序尝试提供商直到成功
+        
+        Providers whose circuit is open are skipped without a request.
+        熔断中的提供商直接跳过，不发送请求。
+        
+        Args:
+            chain: Ordered providers / 有序的提供商列表
+            attempt: Request for one provider (with its retries) / 对单个提供商的请求（含重试）
+            can_fall_back: Returns False when falling back is no longer allowed
+                           不再允许降级时返回 False
+            
+        Returns:
+            Response dict / 响应字典
+            
+        Raises:
+            Exception: Last failure when every provider failed / 全部失败时抛出最后一个异常
+        """
+        last_exception: Optional[Exception] = None
+        
+        for index, candidate in enumerate(chain):
+            name = candidate.get_provider_name()
+            if not self._breaker(name).is_available():
+                last_exception = CircuitOpenError(f"Circuit open for provider '{name}'")
+                continue
+            
+            try:
+                return await attempt(candidate)
+            except Exception as e:
+                last_exception = e
+                if can_fall_back is not None and not can_fall_back():
+                    raise
+                if index < len(chain) - 1:
+                    print(
+                        f"[LLMGateway] Provider '{name}' failed, "
+                        f"falling back to '{chain[index + 1].get_provider_name()}': {str(e)}"
+                    )
+        
+        raise last_exception
+    
+    def _hedge_delay(
+        self,
+        provider: BaseLLMProvider,
+        agent: Optional[str],
+        hedge: Optional[bool]
+    ) -> Optional[float]:
+        """
+        Seconds to wait before hedging, None if the request is not hedged
+        发送对冲请求前的等待秒数；不对冲时为 None
+        
+        Hedging needs llm.hedging.enabled, the agent's (or explicit) opt-in and
+        at least min_samples observed latencies for the provider and agent.
+        对冲需要 llm.hedging.enabled、Agent（或显式参数）开启，且该提供商与 Agent
+        已观测到至少 min_samples 个延迟样本。
+        """
+        if not self.hedging_enabled or self.cassette_mode == "replay":
+            return None
+        if hedge is None:
+            hedge = bool(agent) and config.get("agents", {}).get(agent, {}).get("hedge", False)
+        if not hedge:
+            return None
+        
+        histogram = self.latency.get(self._latency_key(provider.get_provider_name(), agent))
+        if histogram is None or histogram.observed < self.hedge_min_samples:
+            return None
+        return histogram.quantile(self.hedge_quantile)
+    
+    async def _hedged(
+        self,
+        chain: List[BaseLLMProvider],
+        attempt: Callable[[BaseLLMProvider], Awaitable[Dict[str, Any]]],
+        delay: float
+    ) -> Dict[str, Any]:
+        """
+        Run request, sending a hedge if it is slower than delay
+        执行请求，若慢于 delay 则发送对冲请求
+        
+        The hedge goes to the next provider in the chain (llm.hedging.target:
+        secondary) or the same one (same). Hedges are capped at max_hedge_rate
+        of eligible requests. The first successful response wins and the other
+        request is cancelled.
+        对冲请求发往链中的下一个提供商（llm.hedging.target: secondary）或同一提供商
+        （same）。对冲数量不超过可对冲请求的 max_hedge_rate。先成功的响应胜出，
+        另一个请求被取消。
+        
+        Args:
+            chain: Ordered providers / 有序的提供商列表
+            attempt: Request for one provider / 对单个提供商的请求
+            delay: Seconds before hedging / 对冲前的等待秒数
+            
+        Returns:
+            Response dict / 响应字典
+        """
+        self.hedge_eligible += 1
+        primary = asyncio.ensure_future(self._with_fallback(chain, attempt))
+        tasks = {primary}
+        
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+            
+            if self.hedges_sent + 1 > self.hedge_max_rate * self.hedge_eligible:
+                self.hedges_over_budget += 1
+                return await primary
+            
+            self.hedges_sent += 1
+            hedge_chain = chain
+            if self.hedge_target == "secondary" and len(chain) > 1:
+                hedge_chain = chain[1:] + chain[:1]
+            secondary = asyncio.ensure_future(self._with_fallback(hedge_chain, attempt))
+            tasks.add(secondary)
+            
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is secondary:
+                            self.hedges_won += 1
+                        return task.result()
+            
+            # Both failed; report the primary's error / 两者都失败，报告主请求的错误
+            return primary.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    def _observe_latency(self, response: Dict[str, Any], agent: Optional[str]) -> None:
+        """Record elapsed_time of a fresh response / 记录新响应的 elapsed_time"""
+        key = self._latency_key(response.get("provider", ""), agent)
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = LatencyHistogram()
+            self.latency[key] = histogram
+        histogram.observe(response.get("elapsed_time", 0.0))
+    
+    @staticmethod
+    def _latency_key(provider_name: str, agent: Optional[str]) -> str:
+        """Histogram key / 直方图键"""
+        return f"{provider_name}/{agent or '*'}"
+    
+    def _breaker(self, provider_name: str) -> CircuitBreaker:
+        """Get or create a provider's circuit breaker / 获取或创建提供商的熔断器"""
+        breaker = self.breakers.get(provider_name)
+        if breaker is None:
+            breaker_config = config.get("llm", {}).get("circuit_breaker", {})
+            breaker = CircuitBreaker(
+                provider_name,
+                window_seconds=breaker_config.get("window_seconds", 60),
+                min_requests=breaker_config.get("min_requests", 5),
+                error_rate=breaker_config.get("error_rate", 0.5),
+                open_seconds=breaker_config.get("open_seconds", 30),
+                half_open_max=breaker_config.get("half_open_max", 1)
+            )
+            self.breakers[provider_name] = breaker
+        return breaker
+    
+    def _response_cache_key(
+        self,
+        provider: BaseLLMProvider,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        agent: Optional[str],
+        cache: Optional[bool]
+    ) -> Optional[str]:
+        """
+        Cache key if the request may use the response cache, else None
+        请求可使用响应缓存时返回缓存键，否则返回 None
+        
+        An explicit `cache` flag wins; otherwise the agent's policy applies
+        (agents.<name>.cache: always | never | auto). "auto" caches when the
+        effective temperature is at most llm.response_cache.max_temperature.
+        显式的 `cache` 参数优先；否则采用 Agent 的策略
+        （agents.<name>.cache: always | never | auto）。"auto" 在实际温度
+        不超过 llm.response_cache.max_temperature 时缓存。
+        """
+        if self.response_cache is None or self.cassette_mode == "replay":
+            return None
+        
+        if cache is None:
+            policy = "auto"
+            if agent:
+                policy = config.get("agents", {}).get(agent, {}).get("cache", "auto")
+            if policy == "always":
+                cache = True
+            elif policy == "never":
+                cache = False
+        
+        # Same fallback the providers apply; an explicit 0.0 is a real setting
+        # 与提供商相同的回退规则；显式的 0.0 是有效设置
+        effective = temperature if temperature is not None else provider.temperature
+        if cache is None:
+            cache = effective <= self.cache_max_temperature
+        
+        if not cache:
+            return None
+        
+        return ResponseCache.make_key(
+            provider.get_provider_name(),
+            provider.model,
+            messages,
+            effective,
+            max_tokens
+        )
+    
+    def _cached_response(
+        self,
+        provider: BaseLLMProvider,
+        cached: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Mark a cached response / 标记缓存命中的响应"""
+        response = dict(cached)
+        response["provider"] = provider.get_provider_name()
+        response["elapsed_time"] = 0.0
+        response["cached"] = True
+        return response
+    
+    def _store_response(self, key: str, response: Dict[str, Any]) -> None:
+        """Store a fresh response in the cache / 将新响应写入缓存"""
+        if not response.get("content"):
+            return
+        entry = {k: v for k, v in response.items() if k not in ("provider", "elapsed_time", "retries")}
+        try:
+            self.response_cache.put(key, entry)
+        except Exception as e:
+            print(f"[LLMGateway] Failed to write response cache: {str(e)}")
     
     async def _chat_with_retry(
         self,
         provider: BaseLLMProvider,
-        messages: List[Dict[str, str]],
+        messages: List[Dict[str, Any]],
         temperature: Optional[float],
         max_tokens: Optional[int]
     ) -> Dict[str, Any]:
@@ -169,20 +1015,35 @@ class LLMGateway:
         
         for attempt in range(self.max_retries):
             try:
-                return await self._execute_chat(
+                response = await self._execute_chat(
                     provider,
                     messages,
                     temperature,
                     max_tokens
                 )
+                response["retries"] = attempt
+                return response
+            except CircuitOpenError:
+                # Circuit opened during retries; let the caller fall back
+                # 重试过程中熔断，交由调用方降级
+                raise last_exception or CircuitOpenError(provider.get_provider_name())
+            except CassetteMissError:
+                # Replaying again would miss again / 再次回放仍会未命中
+                raise
             except Exception as e:
                 last_exception = e
                 
+                if not self._breaker(provider.get_provider_name()).is_available():
+                    # No point waiting for a retry that would be rejected
+                    # 重试会被拒绝，无需等待
+                    raise
                 if attempt < self.max_retries - 1:
-                    delay = self.retry_delays[attempt]
+                    delay = self._retry_delay(attempt, e)
+                    if not self._retry_fits_deadline(delay):
+                        raise
                     print(
                         f"[LLMGateway] Retry {attempt + 1}/{self.max_retries} "
-                        f"after {delay}s due to: {str(e)}"
+                        f"after {delay:.1f}s due to: {str(e)}"
                     )
                     await asyncio.sleep(delay)
                 else:
@@ -193,7 +1054,7 @@ class LLMGateway:
     async def _execute_chat(
         self,
         provider: BaseLLMProvider,
-        messages: List[Dict[str, str]],
+        messages: List[Dict[str, Any]],
         temperature: Optional[float],
         max_tokens: Optional[int]
     ) -> Dict[str, Any]:
@@ -210,19 +1071,137 @@ class LLMGateway:
         Returns:
             Response dict / 响应字典
         """
-        start_time = time.time()
+        breaker = self._admit(provider)
+        try:
+            async with self.rate_limits.limit(
+                provider.get_provider_name(),
+                provider.model,
+                estimate_prompt_tokens(messages)
+            ) as usage:
+                # Queue wait is not part of the request latency / 排队等待不计入请求延迟
+                start_time = time.time()
+                
+                response = await provider.chat(
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+                usage["total_tokens"] = response.get("usage", {}).get("total_tokens")
+        except CassetteMissError:
+            # A changed prompt is not a provider failure / 提示变化不属于提供商故障
+            breaker.release()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
         
-        response = await provider.chat(
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens
-        )
+        breaker.record_success()
+        return self._record_response(provider, response, start_time)
+    
+    async def _execute_stream(
+        self,
+        provider: BaseLLMProvider,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        on_delta: Callable[[str], Awaitable[None]]
+    ) -> Dict[str, Any]:
+        """
+        Execute single streaming request
+        执行单次流式请求
         
+        Args:
+            provider: LLM provider instance / 提供商实例
+            messages: Messages list / 消息列表
+            temperature: Temperature / 温度
+            max_tokens: Max tokens / 最大token数
+            on_delta: Async callback for each text delta / 每个文本增量的异步回调
+            
+        Returns:
+            Response dict / 响应字典
+        """
+        response = None
+        
+        breaker = self._admit(provider)
+        try:
+            async with self.rate_limits.limit(
+                provider.get_provider_name(),
+                provider.model,
+                estimate_prompt_tokens(messages)
+            ) as usage:
+                start_time = time.time()
+                
+                async for event in provider.stream(
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                ):
+                    if event["type"] == "delta":
+                        await on_delta(event["text"])
+                    elif event["type"] == "final":
+                        response = event["response"]
+                
+                if response is None:
+                    raise RuntimeError("Stream ended without a final response")
+                usage["total_tokens"] = response.get("usage", {}).get("total_tokens")
+        except CassetteMissError:
+            # A changed prompt is not a provider failure / 提示变化不属于提供商故障
+            breaker.release()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        
+        breaker.record_success()
+        
+        return self._record_response(provider, response, start_time)
+    
+    def _admit(self, provider: BaseLLMProvider) -> CircuitBreaker:
+        """
+        Pass a request through the provider's circuit breaker
+        让请求通过提供商的熔断器
+        
+        Raises:
+            CircuitOpenError: If the circuit is open / 熔断中
+        """
+        name = provider.get_provider_name()
+        breaker = self._breaker(name)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for provider '{name}'")
+        return breaker
+    
+    def _record_response(
+        self,
+        provider: BaseLLMProvider,
+        response: Dict[str, Any],
+        start_time: float
+    ) -> Dict[str, Any]:
+        """
+        Track statistics and add metadata / 追踪统计信息并添加元数据
+        
+        Args:
+            provider: LLM provider instance / 提供商实例
+            response: Provider response / 提供商响应
+            start_time: Request start time / 请求开始时间
+            
+        Returns:
+            Response dict / 响应字典
+        """
         elapsed_time = time.time() - start_time
         
         # Track statistics / 追踪统计信息
+        usage = response.get("usage", {})
         self.total_requests += 1
-        self.total_tokens += response.get("usage", {}).get("total_tokens", 0)
+        self.total_tokens += usage.get("total_tokens", 0)
+        self.total_prompt_tokens += usage.get("prompt_tokens", 0)
+        self.cache_read_tokens += usage.get("cache_read_tokens", 0)
+        self.cache_write_tokens += usage.get("cache_write_tokens", 0)
         
         # Add metadata / 添加元数据
         response["provider"] = provider.get_provider_name()
@@ -230,6 +1209,104 @@ class LLMGateway:
         
         return response
     
+    def _log_usage(
+        self,
+        mode: str,
+        agent: Optional[str],
+        primary: BaseLLMProvider,
+        response: Optional[Dict[str, Any]],
+        wall_start: float,
+        error: Optional[BaseException] = None
+    ) -> None:
+        """
+        Append a finished chat()/chat_stream() call to the usage ledger
+        将已结束的 chat()/chat_stream() 调用写入用量账本
+        
+        Args:
+            mode: "chat" or "stream" / "chat" 或 "stream"
+            agent: Calling agent / 调用方 Agent
+            primary: First provider of the chain (used for failures) / 链中首个提供商（用于失败记录）
+            response: Response dict, None on failure / 响应字典，失败时为 None
+            wall_start: Time the caller started waiting / 调用方开始等待的时间
+            error: Exception of a failed or cancelled call / 失败或被取消调用的异常
+        """
+        if self.usage_ledger is None:
+            return
+        
+        wall_time = time.time() - wall_start
+        try:
+            if response is None:
+                self.usage_ledger.record(
+                    agent=agent,
+                    provider=primary.get_provider_name(),
+                    model=primary.model,
+                    mode=mode,
+                    source="provider",
+                    status="error",
+                    wall_time=wall_time,
+                    error=str(error) or type(error).__name__
+                )
+                return
+            
+            name = response.get("provider") or primary.get_provider_name()
+            answered = self.providers.get(name, primary)
+            if response.get("cached"):
+                source = "cache"
+            elif response.get("coalesced"):
+                source = "coalesced"
+            else:
+                source = "provider"
+            self.usage_ledger.record(
+                agent=agent,
+                provider=name,
+                # Configured model, so dated model ids still match the price table
+                # 使用配置的模型名，使带日期的模型ID仍能匹配价格表
+                model=answered.model,
+                mode=mode,
+                source=source,
+                status="ok",
+                usage=response.get("usage"),
+                latency=response.get("elapsed_time", 0.0),
+                wall_time=wall_time,
+                retries=response.get("retries", 0) if source == "provider" else 0
+            )
+        except Exception as e:
+            # Accounting must never fail a request / 记账失败不应影响请求
+            print(f"[LLMGateway] Failed to write usage ledger: {str(e)}")
+    
+    def _record_cassette(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        response: Dict[str, Any],
+        agent: Optional[str]
+    ) -> None:
+        """
+        Append a call to the cassette when recording
+        录制模式下将调用追加到磁带
+        
+        Coalesced followers are skipped: on replay they coalesce again and
+        share the leader's entry.
+        被合并的跟随者不录制：回放时它们会再次合并并共享领导者的记录。
+        """
+        if self.cassette_mode != "record" or response.get("coalesced"):
+            return
+        try:
+            self.cassette.record(messages, temperature, max_tokens, response, agent)
+        except Exception as e:
+            print(f"[LLMGateway] Failed to write cassette: {str(e)}")
+    
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        """Delay before the next attempt / 下次尝试前的延迟"""
+        return backoff_delay(attempt, error, self.retry_base_delay, self.retry_max_delay)
+    
+    @staticmethod
+    def _retry_fits_deadline(delay: float) -> bool:
+        """Whether a retry after delay can start before the deadline / 延迟后的重试能否在截止时间前开始"""
+        remaining = remaining_time()
+        return remaining is None or delay < remaining
+    
     def get_stats(self) -> Dict[str, Any]:
         """
         Get gateway statistics
@@ -241,13 +1318,57 @@ class LLMGateway:
         return {
             "total_requests": self.total_requests,
             "total_tokens": self.total_tokens,
+            "prompt_cache": {
+                "prompt_tokens": self.total_prompt_tokens,
+                "read_tokens": self.cache_read_tokens,
+                "write_tokens": self.cache_write_tokens,
+                "hit_rate": (
+                    self.cache_read_tokens / self.total_prompt_tokens
+                    if self.total_prompt_tokens else 0.0
+                )
+            },
+            "response_cache": {
+                "enabled": self.response_cache is not None,
+                **(self.response_cache.stats() if self.response_cache else {})
+            },
+            "single_flight": {
+                "enabled": self.single_flight is not None,
+                **(self.single_flight.stats() if self.single_flight else {})
+            },
+            "rate_limits": self.rate_limits.stats(),
+            "latency": {
+                key: histogram.stats() for key, histogram in self.latency.items()
+            },
+            "continuations": self.continuations,
+            "hedging": {
+                "enabled": self.hedging_enabled,
+                "eligible": self.hedge_eligible,
+                "sent": self.hedges_sent,
+                "won": self.hedges_won,
+                "over_budget": self.hedges_over_budget,
+                "hedge_rate": (
+                    self.hedges_sent / self.hedge_eligible if self.hedge_eligible else 0.0
+                )
+            },
+            "circuit_breakers": {
+                name: breaker.stats() for name, breaker in self.breakers.items()
+            },
+            "http_pool": pool_stats(),
+            "cassette": {
+                "mode": self.cassette_mode,
+                **(self.cassette.stats() if self.cassette else {})
+            },
+            "usage_ledger": {
+                "enabled": self.usage_ledger is not None,
+                **(self.usage_ledger.stats() if self.usage_ledger else {})
+            },
             "available_providers": list(self.providers.keys())
         }
     
     def get_provider_for_agent(self, agent_name: str) -> str:
         """
-        Get configured provider for specific agent
-        获取特定 Agent 的配置提供商
+        Get provider for specific agent, skipping providers whose circuit is open
+        获取特定 Agent 的提供商，跳过熔断中的提供商
         
         Args:
             agent_name: Agent name (archivist, writer, reviewer, editor)
@@ -256,6 +1377,31 @@ class LLMGateway:
         Returns:
             Provider name / 提供商名称
         """
+        chain = self.get_provider_chain_for_agent(agent_name)
+        for name in chain:
+            if name in self.providers and self._breaker(name).is_available():
+                return name
+        return chain[0]
+    
+    def get_provider_chain_for_agent(self, agent_name: str) -> List[str]:
+        """
+        Ordered provider chain for an agent: configured provider, then agents.<name>.fallback
+        Agent 的有序提供商链：配置的提供商，然后是 agents.<name>.fallback
+        
+        Args:
+            agent_name: Agent name / Agent 名称
+            
+        Returns:
+            Provider names without duplicates / 去重后的提供商名称列表
+        """
+        fallback = config.get("agents", {}).get(agent_name, {}).get("fallback") or []
+        return list(dict.fromkeys([self._configured_provider_for_agent(agent_name)] + list(fallback)))
+    
+    def _configured_provider_for_agent(self, agent_name: str) -> str:
+        """
+        Configured primary provider for an agent
+        Agent 配置的首选提供商
+        """
         env_key = f"NOVIX_AGENT_{agent_name.upper()}_PROVIDER"
         env_provider = os.getenv(env_key)
         if env_provider:
@@ -290,6 +1436,26 @@ class LLMGateway:
         return agent_config.get("temperature", 0.7)
 
 
+def _paragraph_cut(text: str) -> int:
+    """
+    Offset where the unfinished last paragraph of a truncated text starts
+    截断文本中未写完的最后一段的起始位置
+    
+    Returns len(text) when there is no paragraph break in the second half,
+    so long single paragraphs are continued inline rather than discarded.
+    后半部分没有段落分隔时返回 len(text)，使超长单段直接续写而不是被丢弃。
+    """
+    cut = text.rstrip().rfind("\n")
+    if cut < len(text) // 2:
+        return len(text)
+    return cut + 1
+
+
+async def _ignore_delta(text: str) -> None:
+    """Delta sink for non-streaming calls / 非流式调用的增量空接收器"""
+    return None
+
+
 # Global gateway instance / 全局网关实例
 _gateway_instance: Optional[LLMGateway] = None
 
@@ -309,6 +1475,13 @@ def get_gateway() -> LLMGateway:
 
 
 def reset_gateway() -> None:
-    """Reset global gateway instance so new config takes effect / 重置全局网关实例以应用新配置"""
+    """
+    Reset global gateway instance so new config takes effect
+    重置全局网关实例以应用新配置
+    
+    Pooled HTTP/SDK clients are kept; providers whose credentials did not
+    change reuse their warm connections.
+    连接池中的 HTTP/SDK 客户端会保留；凭据未变化的提供商继续复用已建立的连接。
+    """
     global _gateway_instance
     _gateway_instance = None
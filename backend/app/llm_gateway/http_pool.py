@@ -0,0 +1,201 @@
+"""
+HTTP Connection Pool / HTTP 连接池
+Process-wide httpx client and provider SDK clients shared across gateway reloads
+进程级共享的 httpx 客户端与提供商 SDK 客户端，网关重载后仍可复用
+"""
+
+import hashlib
+import importlib
+import json
+from types import ModuleType
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from app.config import config
+
+
+# httpx clients by (client class, pool settings) / 按 (客户端类, 连接池设置) 索引的 httpx 客户端
+_http_clients: Dict[Tuple[str, str], Any] = {}
+
+# SDK clients by (kind, credential fingerprint, base_url, pooled client)
+# 按 (类型, 凭据指纹, base_url, 连接池客户端) 索引的 SDK 客户端
+_sdk_clients: Dict[Tuple[str, str, str, str], Any] = {}
+
+_warned_http2 = False
+
+
+def _http_settings() -> Dict[str, Any]:
+    """Read llm.http settings with defaults / 读取 llm.http 设置（含默认值）"""
+    http_config = config.get("llm", {}).get("http", {}) or {}
+    timeouts = http_config.get("timeouts", {}) or {}
+    return {
+        "http2": bool(http_config.get("http2", True)),
+        "max_connections": http_config.get("max_connections", 100),
+        "max_keepalive_connections": http_config.get("max_keepalive_connections", 20),
+        "keepalive_expiry": http_config.get("keepalive_expiry", 30.0),
+        "connect": timeouts.get("connect", 10.0),
+        "read": timeouts.get("read", 600.0),
+        "write": timeouts.get("write", 30.0),
+        "pool": timeouts.get("pool", 30.0),
+    }
+
+
+def _http2_available() -> bool:
+    """Whether the optional h2 package is installed / 是否安装了可选的 h2 包"""
+    global _warned_http2
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        if not _warned_http2:
+            print("[HTTPPool] h2 not installed, using HTTP/1.1 (pip install httpx[http2] to enable HTTP/2)")
+            _warned_http2 = True
+        return False
+
+
+def _httpx_module(client_class: type) -> ModuleType:
+    """
+    HTTP package a client class comes from / 客户端类所属的 HTTP 包
+
+    Newer provider SDKs ship their own httpx fork, so Limits and Timeout
+    must come from the same package as the client.
+    较新的提供商 SDK 自带 httpx 分支，因此 Limits 与 Timeout 必须来自与客户端相同的包。
+    """
+    for base in client_class.__mro__:
+        if base.__name__ == "AsyncClient":
+            return importlib.import_module(base.__module__.split(".")[0])
+    return httpx
+
+
+def get_timeout(client_class: Optional[type] = None) -> Any:
+    """
+    Explicit connect/read/write/pool timeouts from config
+    来自配置的显式 connect/read/write/pool 超时
+
+    Args:
+        client_class: Client class the timeout is for (default httpx.AsyncClient)
+                      超时所属的客户端类（默认 httpx.AsyncClient）
+
+    Returns:
+        Timeout of the client's HTTP package / 客户端所属 HTTP 包的超时设置
+    """
+    module = _httpx_module(client_class or httpx.AsyncClient)
+    settings = _http_settings()
+    return module.Timeout(
+        connect=settings["connect"],
+        read=settings["read"],
+        write=settings["write"],
+        pool=settings["pool"],
+    )
+
+
+def get_http_client(client_class: Optional[type] = None) -> Any:
+    """
+    Get the shared client for a client class and the current pool settings
+    获取指定客户端类与当前连接池设置对应的共享客户端
+
+    A client is created once per class and distinct llm.http configuration
+    and kept until close_http_clients(), so warm connections survive
+    gateway resets.
+    每个客户端类与每种 llm.http 配置只创建一个客户端并保留到 close_http_clients()，
+    网关重置后已建立的连接仍可复用。
+
+    Args:
+        client_class: AsyncClient class, e.g. an SDK's DefaultAsyncHttpxClient
+                      (default httpx.AsyncClient)
+                      AsyncClient 类，如 SDK 的 DefaultAsyncHttpxClient（默认 httpx.AsyncClient）
+
+    Returns:
+        Shared async client / 共享的异步客户端
+    """
+    client_class = client_class or httpx.AsyncClient
+    module = _httpx_module(client_class)
+    settings = _http_settings()
+    key = (f"{client_class.__module__}.{client_class.__qualname__}", json.dumps(settings, sort_keys=True))
+
+    client = _http_clients.get(key)
+    if client is None or client.is_closed:
+        client = client_class(
+            http2=settings["http2"] and _http2_available(),
+            limits=module.Limits(
+                max_connections=settings["max_connections"],
+                max_keepalive_connections=settings["max_keepalive_connections"],
+                keepalive_expiry=settings["keepalive_expiry"],
+            ),
+            timeout=get_timeout(client_class),
+        )
+        _http_clients[key] = client
+    return client
+
+
+def get_sdk_client(
+    kind: str,
+    api_key: str,
+    base_url: Optional[str],
+    factory: Callable[..., Any],
+    http_client_class: Optional[type] = None
+) -> Any:
+    """
+    Get a provider SDK client, reusing it while credentials are unchanged
+    获取提供商 SDK 客户端，凭据未变化时复用
+
+    Args:
+        kind: Client kind, e.g. "openai", "anthropic" / 客户端类型
+        api_key: API key / API密钥
+        base_url: Endpoint override, None for the SDK default / 端点覆盖，None 表示 SDK 默认值
+        factory: SDK class, called with api_key, base_url, http_client and timeout
+                 SDK 类，以 api_key、base_url、http_client 与 timeout 调用
+        http_client_class: The SDK's AsyncClient class (default httpx.AsyncClient)
+                           SDK 使用的 AsyncClient 类（默认 httpx.AsyncClient）
+
+    Returns:
+        SDK client sharing the pooled HTTP client / 共享连接池 HTTP 客户端的 SDK 客户端
+    """
+    http_client = get_http_client(http_client_class)
+    fingerprint = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+    key = (kind, fingerprint, base_url or "", str(id(http_client)))
+
+    client = _sdk_clients.get(key)
+    if client is None:
+        kwargs: Dict[str, Any] = {
+            "api_key": api_key,
+            "http_client": http_client,
+            "timeout": get_timeout(http_client_class),
+        }
+        if base_url:
+            kwargs["base_url"] = base_url
+        client = factory(**kwargs)
+        _sdk_clients[key] = client
+    return client
+
+
+async def close_http_clients() -> None:
+    """
+    Close all pooled clients (application shutdown) / 关闭所有连接池客户端（应用关闭时）
+
+    SDK clients are only dropped: closing them would close the shared httpx
+    client they wrap, which is closed here once.
+    SDK 客户端只做丢弃：关闭它们会关闭其封装的共享 httpx 客户端，后者在此统一关闭一次。
+    """
+    _sdk_clients.clear()
+    clients = list(_http_clients.values())
+    _http_clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception as e:
+            print(f"[HTTPPool] Error closing HTTP client: {e}")
+
+
+def pool_stats() -> Dict[str, Any]:
+    """
+    Get pool statistics / 获取连接池统计信息
+
+    Returns:
+        Number of HTTP and SDK clients / HTTP 与 SDK 客户端数量
+    """
+    return {
+        "http_clients": len(_http_clients),
+        "sdk_clients": len(_sdk_clients),
+    }
@@ -0,0 +1,94 @@
+"""
+Latency Histograms / 延迟直方图
+Observed request latency per provider and agent, used to time hedged requests
+按提供商与 Agent 统计的请求延迟，用于决定对冲请求的发送时机
+"""
+
+import bisect
+from typing import List, Dict, Any, Optional
+
+
+def _bucket_bounds(low: float = 0.05, high: float = 600.0, factor: float = 1.25) -> List[float]:
+    """Log-spaced bucket upper bounds in seconds / 按对数间隔的桶上界（秒）"""
+    bounds = []
+    value = low
+    while value < high:
+        bounds.append(round(value, 4))
+        value *= factor
+    bounds.append(high)
+    return bounds
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram with decay
+    带衰减的对数分桶延迟直方图
+
+    Once `window` samples have accumulated all counts are halved, so the
+    quantiles follow recent behaviour instead of the whole process lifetime.
+    累计 `window` 个样本后所有计数减半，使分位数反映近期表现而非整个进程生命周期。
+    """
+
+    BOUNDS = _bucket_bounds()
+
+    def __init__(self, window: int = 500):
+        """
+        Initialize empty histogram
+
+        Args:
+            window: Samples before counts decay / 计数衰减前的样本数
+        """
+        self.window = max(10, int(window))
+        self.counts = [0.0] * (len(self.BOUNDS) + 1)
+        self.count = 0.0
+        self.observed = 0
+
+    def observe(self, seconds: float) -> None:
+        """
+        Record one latency / 记录一次延迟
+
+        Args:
+            seconds: Request latency / 请求延迟（秒）
+        """
+        self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.observed += 1
+
+        if self.count >= self.window:
+            self.counts = [c / 2 for c in self.counts]
+            self.count /= 2
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Approximate quantile (bucket upper bound) / 近似分位数（桶上界）
+
+        Args:
+            q: Quantile in [0, 1] / 分位数
+
+        Returns:
+            Latency in seconds, None if empty / 延迟（秒），无样本时为 None
+        """
+        if self.count <= 0:
+            return None
+
+        target = q * self.count
+        running = 0.0
+        for index, c in enumerate(self.counts):
+            running += c
+            if running >= target and c > 0:
+                return self.BOUNDS[min(index, len(self.BOUNDS) - 1)]
+        return self.BOUNDS[-1]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get summary / 获取汇总
+
+        Returns:
+            Sample count and p50/p90/p99 / 样本数与 p50/p90/p99
+        """
+        return {
+            "observed": self.observed,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
@@ -0,0 +1,369 @@
+"""
+Usage Ledger / 用量账本
+Append-only record of every LLM call with token, latency and cost aggregation
+逐次记录大模型调用的追加式账本，支持按token、延迟与成本汇总
+"""
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+
+# (project_id, chapter) of the work being done in the current task
+# 当前任务所处理工作的 (项目ID, 章节ID)
+_usage_scope: ContextVar[Tuple[Optional[str], Optional[str]]] = ContextVar(
+    "novix_usage_scope", default=(None, None)
+)
+
+
+@contextmanager
+def usage_scope(project_id: Optional[str], chapter: Optional[str] = None) -> Iterator[None]:
+    """
+    Attribute LLM calls made inside the block to a project and chapter
+    将代码块内的大模型调用归属到指定项目与章节
+
+    The scope is a context variable, so it follows the calling task and the
+    tasks it spawns (single-flight leaders, hedges) without being passed
+    through every agent.
+    作用域是上下文变量，会随调用任务及其派生的任务（请求合并、对冲）传递，
+    无需经由每个 Agent 逐层传参。
+
+    Args:
+        project_id: Project ID / 项目ID
+        chapter: Chapter ID / 章节ID
+    """
+    token = _usage_scope.set((project_id, chapter))
+    try:
+        yield
+    finally:
+        _usage_scope.reset(token)
+
+
+def current_usage_scope() -> Tuple[Optional[str], Optional[str]]:
+    """Current (project_id, chapter) / 当前的 (项目ID, 章节ID)"""
+    return _usage_scope.get()
+
+
+def _percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of sorted values / 已排序数值的最近秩百分位数"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class UsageLedger:
+    """
+    SQLite-backed append-only ledger of LLM calls
+    基于 SQLite 的大模型调用追加式账本
+
+    One row per gateway call: project, chapter, agent, provider, model,
+    prompt/completion tokens, latency, retries and outcome. Cost is computed
+    at query time from the price table, so repricing applies to history.
+    每次网关调用一行：项目、章节、Agent、提供商、模型、提示/生成token、延迟、
+    重试次数与结果。成本在查询时按价格表计算，因此调价会作用于历史记录。
+    """
+
+    COLUMNS = (
+        "ts", "project_id", "chapter", "agent", "provider", "model", "mode",
+        "source", "status", "prompt_tokens", "completion_tokens",
+        "cache_read_tokens", "cache_write_tokens", "latency", "wall_time",
+        "retries", "error",
+    )
+
+    def __init__(self, path: str, prices: Optional[Dict[str, Any]] = None):
+        """
+        Initialize ledger
+
+        Args:
+            path: SQLite database path / SQLite 数据库路径
+            prices: Price table, USD per million tokens, as
+                    {provider: {model: {input, output, cache_read, cache_write}}}
+                    价格表（每百万token美元），格式同上
+        """
+        self.path = Path(path)
+        self.prices = prices or {}
+        self.recorded = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        agent: Optional[str],
+        provider: str,
+        model: str,
+        mode: str,
+        source: str,
+        status: str,
+        usage: Optional[Dict[str, Any]] = None,
+        latency: float = 0.0,
+        wall_time: float = 0.0,
+        retries: int = 0,
+        error: Optional[str] = None
+    ) -> None:
+        """
+        Append one call, attributed to the current usage scope
+        追加一次调用，归属到当前用量作用域
+
+        Args:
+            agent: Calling agent / 调用方 Agent
+            provider: Provider that answered (or failed) / 响应（或失败）的提供商
+            model: Model name / 模型名称
+            mode: "chat" or "stream" / "chat" 或 "stream"
+            source: "provider", "cache" or "coalesced"; only "provider" is billed
+                    "provider"、"cache" 或 "coalesced"；仅 "provider" 计费
+            status: "ok" or "error" / "ok" 或 "error"
+            usage: Token usage of the response / 响应的token用量
+            latency: Provider latency in seconds / 提供商延迟（秒）
+            wall_time: Caller wait including queueing and retries / 含排队与重试的调用方等待时间
+            retries: Retries on the answering provider / 在响应提供商上的重试次数
+            error: Error message for failed calls / 失败调用的错误信息
+        """
+        usage = usage if source == "provider" else None
+        usage = usage or {}
+        project_id, chapter = current_usage_scope()
+        row = (
+            time.time(), project_id, chapter, agent, provider, model or "", mode,
+            source, status,
+            int(usage.get("prompt_tokens") or 0),
+            int(usage.get("completion_tokens") or 0),
+            int(usage.get("cache_read_tokens") or 0),
+            int(usage.get("cache_write_tokens") or 0),
+            float(latency or 0.0), float(wall_time or 0.0), int(retries or 0),
+            (error or "")[:500] or None,
+        )
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                f"INSERT INTO calls ({', '.join(self.COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in self.COLUMNS)})",
+                row
+            )
+            conn.commit()
+            self.recorded += 1
+
+    def cost(
+        self,
+        provider: str,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cache_read_tokens: int = 0,
+        cache_write_tokens: int = 0
+    ) -> Optional[float]:
+        """
+        Estimated cost in USD, None if the model has no price
+        估算成本（美元）；模型无价格时为 None
+
+        prompt_tokens includes cached tokens; cache reads and writes fall
+        back to the input price when not listed.
+        prompt_tokens 包含缓存token；未列出缓存读写价格时按输入价格计算。
+        """
+        provider_prices = self.prices.get(provider) or {}
+        price = provider_prices.get(model) or provider_prices.get("default")
+        if not price:
+            return None
+
+        input_price = float(price.get("input", 0.0))
+        uncached = max(0, prompt_tokens - cache_read_tokens - cache_write_tokens)
+        total = (
+            uncached * input_price
+            + cache_read_tokens * float(price.get("cache_read", input_price))
+            + cache_write_tokens * float(price.get("cache_write", input_price))
+            + completion_tokens * float(price.get("output", 0.0))
+        )
+        return total / 1_000_000
+
+    def cost_by_chapter(self, project_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Tokens and cost per chapter of a project / 项目各章节的token与成本
+
+        Args:
+            project_id: Project ID / 项目ID
+
+        Returns:
+            {chapter: {calls, prompt_tokens, completion_tokens, cost, unpriced_calls}}
+        """
+        return self._grouped_cost("chapter", project_id)
+
+    def tokens_by_agent(self, project_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Tokens and cost per agent / 各 Agent 的token与成本
+
+        Args:
+            project_id: Restrict to a project (None = all) / 限定项目（None 表示全部）
+
+        Returns:
+            {agent: {calls, prompt_tokens, completion_tokens, cost, unpriced_calls}}
+        """
+        return self._grouped_cost("agent", project_id)
+
+    def latency_by_provider(self, project_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Latency percentiles and error counts per provider / 各提供商的延迟分位数与错误数
+
+        Only calls answered by the provider count towards latency; cache hits
+        and coalesced followers are excluded.
+        只有由提供商实际响应的调用计入延迟；缓存命中与被合并的调用不计入。
+
+        Args:
+            project_id: Restrict to a project (None = all) / 限定项目（None 表示全部）
+
+        Returns:
+            {provider: {calls, errors, retries, p50, p95, max}}
+        """
+        where, params = self._project_filter(project_id, "source = 'provider'")
+        rows = self._query(
+            f"SELECT provider, status, latency, retries FROM calls {where} ORDER BY provider",
+            params
+        )
+
+        result: Dict[str, Dict[str, Any]] = {}
+        latencies: Dict[str, List[float]] = {}
+        for provider, status, latency, retries in rows:
+            entry = result.setdefault(provider, {"calls": 0, "errors": 0, "retries": 0})
+            entry["calls"] += 1
+            entry["retries"] += retries
+            if status == "ok":
+                latencies.setdefault(provider, []).append(latency)
+            else:
+                entry["errors"] += 1
+
+        for provider, entry in result.items():
+            values = sorted(latencies.get(provider, []))
+            entry["p50"] = _percentile(values, 0.5)
+            entry["p95"] = _percentile(values, 0.95)
+            entry["max"] = values[-1] if values else None
+        return result
+
+    def summary(self, project_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Totals plus the per-agent and per-provider breakdowns / 总计及按 Agent、提供商的明细
+
+        Args:
+            project_id: Restrict to a project (None = all) / 限定项目（None 表示全部）
+
+        Returns:
+            Summary dict / 汇总字典
+        """
+        agents = self.tokens_by_agent(project_id)
+        where, params = self._project_filter(project_id)
+        calls, cached, coalesced, errors = self._query(
+            "SELECT COUNT(*), "
+            "COALESCE(SUM(source = 'cache'), 0), "
+            "COALESCE(SUM(source = 'coalesced'), 0), "
+            f"COALESCE(SUM(status = 'error'), 0) FROM calls {where}",
+            params
+        )[0]
+        return {
+            "calls": calls,
+            "cache_hits": cached,
+            "coalesced": coalesced,
+            "errors": errors,
+            "prompt_tokens": sum(a["prompt_tokens"] for a in agents.values()),
+            "completion_tokens": sum(a["completion_tokens"] for a in agents.values()),
+            "cost": round(sum(a["cost"] for a in agents.values()), 6),
+            "by_agent": agents,
+            "by_provider": self.latency_by_provider(project_id),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get ledger statistics / 获取账本统计信息
+
+        Returns:
+            Database path and rows recorded by this process / 数据库路径与本进程写入的行数
+        """
+        return {
+            "path": str(self.path),
+            "recorded": self.recorded,
+        }
+
+    def close(self) -> None:
+        """Close database connection / 关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _grouped_cost(self, column: str, project_id: Optional[str]) -> Dict[str, Dict[str, Any]]:
+        """Token sums and cost grouped by a column / 按列分组的token总数与成本"""
+        where, params = self._project_filter(project_id, "source = 'provider'")
+        rows = self._query(
+            f"SELECT {column}, provider, model, COUNT(*), "
+            "SUM(prompt_tokens), SUM(completion_tokens), "
+            "SUM(cache_read_tokens), SUM(cache_write_tokens) "
+            f"FROM calls {where} GROUP BY {column}, provider, model",
+            params
+        )
+
+        result: Dict[str, Dict[str, Any]] = {}
+        for key, provider, model, calls, prompt, completion, cache_read, cache_write in rows:
+            entry = result.setdefault(key or "", {
+                "calls": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "cost": 0.0,
+                "unpriced_calls": 0,
+            })
+            entry["calls"] += calls
+            entry["prompt_tokens"] += prompt
+            entry["completion_tokens"] += completion
+            cost = self.cost(provider, model, prompt, completion, cache_read, cache_write)
+            if cost is None:
+                entry["unpriced_calls"] += calls
+            else:
+                entry["cost"] = round(entry["cost"] + cost, 6)
+        return result
+
+    @staticmethod
+    def _project_filter(project_id: Optional[str], *conditions: str) -> Tuple[str, List[Any]]:
+        """WHERE clause for optional project and extra conditions / 可选项目与附加条件的 WHERE 子句"""
+        clauses = list(conditions)
+        params: List[Any] = []
+        if project_id is not None:
+            clauses.append("project_id = ?")
+            params.append(project_id)
+        return ("WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _query(self, sql: str, params: List[Any]) -> List[Tuple]:
+        """Run a read query / 执行只读查询"""
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open database on first use / 首次使用时打开数据库"""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS calls ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "ts REAL NOT NULL, "
+                "project_id TEXT, "
+                "chapter TEXT, "
+                "agent TEXT, "
+                "provider TEXT NOT NULL, "
+                "model TEXT NOT NULL, "
+                "mode TEXT NOT NULL, "
+                "source TEXT NOT NULL, "
+                "status TEXT NOT NULL, "
+                "prompt_tokens INTEGER NOT NULL, "
+                "completion_tokens INTEGER NOT NULL, "
+                "cache_read_tokens INTEGER NOT NULL, "
+                "cache_write_tokens INTEGER NOT NULL, "
+                "latency REAL NOT NULL, "
+                "wall_time REAL NOT NULL, "
+                "retries INTEGER NOT NULL, "
+                "error TEXT)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_calls_project ON calls (project_id, chapter)"
+            )
+            self._conn.commit()
+        return self._conn
@@ -1,17 +1,64 @@
 """
 LLM Provider Adapters / 大模型提供商适配器
+
+Provider modules are imported on first use, so an SDK (openai, anthropic) is
+only loaded when a provider that needs it is instantiated.
+提供商模块在首次使用时才导入，只有实例化需要某个 SDK（openai、anthropic）的
+提供商时才会加载该 SDK。
 """
 
+from importlib import import_module
+from typing import Any, Dict, Tuple, Type
+
 from .base import BaseLLMProvider
-from .openai_provider import OpenAIProvider
-from .anthropic_provider import AnthropicProvider
-from .deepseek_provider import DeepSeekProvider
-from .mock_provider import MockProvider
+
+# Provider name -> (module, class) / 提供商名称 -> (模块, 类)
+PROVIDER_CLASSES: Dict[str, Tuple[str, str]] = {
+    "openai": ("openai_provider", "OpenAIProvider"),
+    "anthropic": ("anthropic_provider", "AnthropicProvider"),
+    "deepseek": ("deepseek_provider", "DeepSeekProvider"),
+    "mock": ("mock_provider", "MockProvider"),
+    "simulated": ("simulated_provider", "SimulatedProvider"),
+    "replay": ("replay_provider", "ReplayProvider"),
+}
+
+
+def get_provider_class(name: str) -> Type[BaseLLMProvider]:
+    """
+    Import and return the class of a provider / 导入并返回提供商类
+
+    Args:
+        name: Provider name (openai, anthropic, deepseek, mock, simulated, replay)
+              提供商名称
+
+    Returns:
+        Provider class / 提供商类
+
+    Raises:
+        ValueError: If the provider is unknown / 未知提供商
+    """
+    if name not in PROVIDER_CLASSES:
+        raise ValueError(f"Unknown provider: {name}")
+    module_name, class_name = PROVIDER_CLASSES[name]
+    return getattr(import_module(f".{module_name}", __name__), class_name)
+
+
+def __getattr__(name: str) -> Any:
+    """Resolve provider classes on attribute access (PEP 562) / 访问属性时解析提供商类（PEP 562）"""
+    for provider, (_module_name, class_name) in PROVIDER_CLASSES.items():
+        if class_name == name:
+            return get_provider_class(provider)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "BaseLLMProvider",
+    "PROVIDER_CLASSES",
+    "get_provider_class",
     "OpenAIProvider",
     "AnthropicProvider",
     "DeepSeekProvider",
     "MockProvider",
+    "SimulatedProvider",
+    "ReplayProvider",
 ]
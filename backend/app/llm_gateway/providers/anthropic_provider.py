@@ -2,23 +2,41 @@
 Anthropic (Claude) Provider / Anthropic (Claude) 适配器
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
+import anthropic
 from anthropic import AsyncAnthropic
 from app.llm_gateway.providers.base import BaseLLMProvider
+from app.llm_gateway.http_pool import get_sdk_client
 
 
 class AnthropicProvider(BaseLLMProvider):
     """Anthropic API provider / Anthropic API 提供商"""
+
+    # Prompt caching via explicit cache_control breakpoints
+    # 通过显式 cache_control 断点启用提示缓存
+    supports_prompt_cache = True
+
+    # Anthropic accepts at most 4 cache breakpoints per request
+    # Anthropic 每个请求最多接受 4 个缓存断点
+    MAX_CACHE_BREAKPOINTS = 4
     
     def __init__(
         self,
         api_key: str,
         model: str = "claude-3-5-sonnet-20241022",
         max_tokens: int = 8000,
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        base_url: Optional[str] = None
     ):
         super().__init__(api_key, model, max_tokens, temperature)
-        self.client = AsyncAnthropic(api_key=api_key)
+        # Shared pooled client, reused while the key is unchanged / 共享连接池客户端，密钥不变时复用
+        self.client = get_sdk_client(
+            "anthropic",
+            api_key,
+            base_url,
+            AsyncAnthropic,
+            getattr(anthropic, "DefaultAsyncHttpxClient", None)
+        )
     
     async def chat(
         self,
@@ -38,40 +56,127 @@ class AnthropicProvider(BaseLLMProvider):
         Returns:
             Response dict / 响应字典
         """
-        # Extract system message if present / 提取系统消息
-        system_message = None
-        filtered_messages = []
+        # Anthropic API call / Anthropic API 调用
+        kwargs = self._build_request_kwargs(messages, temperature, max_tokens)
+        response = await self.client.messages.create(**kwargs)
+        return self._to_response(response)
+    
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream chat response from Anthropic
+        从 Anthropic 流式获取聊天响应
         
-        for msg in messages:
-            if msg["role"] == "system":
-                system_message = msg["content"]
-            else:
-                filtered_messages.append(msg)
+        Args:
+            messages: List of messages / 消息列表
+            temperature: Override temperature / 覆盖温度
+            max_tokens: Override max tokens / 覆盖最大token数
+            
+        Yields:
+            Delta events, then the final response / 增量事件，最后是完整响应
+        """
+        kwargs = self._build_request_kwargs(messages, temperature, max_tokens)
+        
+        async with self.client.messages.stream(**kwargs) as stream:
+            async for text in stream.text_stream:
+                if text:
+                    yield {"type": "delta", "text": text}
+            final_message = await stream.get_final_message()
+        
+        yield {"type": "final", "response": self._to_response(final_message)}
+    
+    def _build_request_kwargs(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float],
+        max_tokens: Optional[int]
+    ) -> Dict[str, Any]:
+        """Build messages.create/stream arguments / 构建 messages.create/stream 参数"""
+        system_blocks, filtered_messages = self._build_request_messages(messages)
         
-        # Anthropic API call / Anthropic API 调用
         kwargs = {
             "model": self.model,
             "messages": filtered_messages,
-            "temperature": temperature or self.temperature,
+            "temperature": temperature if temperature is not None else self.temperature,
             "max_tokens": max_tokens or self.max_tokens
         }
         
-        if system_message:
-            kwargs["system"] = system_message
+        if system_blocks:
+            kwargs["system"] = system_blocks
         
-        response = await self.client.messages.create(**kwargs)
+        return kwargs
+    
+    def _to_response(self, message: Any) -> Dict[str, Any]:
+        """Convert an Anthropic message to gateway format / 将 Anthropic 消息转换为网关格式"""
+        usage = message.usage
+        cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+        prompt_tokens = usage.input_tokens + cache_read + cache_write
         
         return {
-            "content": response.content[0].text,
+            "content": "".join(
+                block.text for block in message.content if getattr(block, "type", "") == "text"
+            ),
             "usage": {
-                "prompt_tokens": response.usage.input_tokens,
-                "completion_tokens": response.usage.output_tokens,
-                "total_tokens": response.usage.input_tokens + response.usage.output_tokens
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": usage.output_tokens,
+                "total_tokens": prompt_tokens + usage.output_tokens,
+                "cache_read_tokens": cache_read,
+                "cache_write_tokens": cache_write
             },
-            "model": response.model,
-            "finish_reason": response.stop_reason
+            "model": message.model,
+            "finish_reason": message.stop_reason
         }
     
+    def _build_request_messages(
+        self,
+        messages: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Convert gateway messages into Anthropic system/content blocks
+        将网关消息转换为 Anthropic 的 system 与内容块
+
+        Consecutive messages of the same role are merged into one message
+        with several text blocks; messages marked with "cache_breakpoint"
+        get an ephemeral cache_control on their block.
+        相邻同角色消息合并为一条包含多个文本块的消息；带 "cache_breakpoint"
+        标记的消息对应的文本块会加上临时 cache_control。
+
+        Args:
+            messages: Gateway messages / 网关消息列表
+
+        Returns:
+            (system blocks, messages) / (系统块, 消息列表)
+        """
+        breakpoints_left = self.MAX_CACHE_BREAKPOINTS
+
+        def to_block(msg: Dict[str, Any]) -> Dict[str, Any]:
+            nonlocal breakpoints_left
+            block: Dict[str, Any] = {"type": "text", "text": msg["content"]}
+            if msg.get("cache_breakpoint") and breakpoints_left > 0:
+                block["cache_control"] = {"type": "ephemeral"}
+                breakpoints_left -= 1
+            return block
+
+        system_blocks: List[Dict[str, Any]] = []
+        result: List[Dict[str, Any]] = []
+
+        for msg in messages:
+            if not msg.get("content"):
+                continue
+            if msg["role"] == "system":
+                system_blocks.append(to_block(msg))
+            elif result and result[-1]["role"] == msg["role"]:
+                result[-1]["content"].append(to_block(msg))
+            else:
+                result.append({"role": msg["role"], "content": [to_block(msg)]})
+
+        return system_blocks, result
+    
     def get_provider_name(self) -> str:
         """Get provider name / 获取提供商名称"""
         return "anthropic"
@@ -3,11 +3,14 @@ Base LLM Provider Interface / 基础大模型提供商接口
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
 
 
 class BaseLLMProvider(ABC):
     """Abstract base class for LLM providers / 大模型提供商抽象基类"""
+
+    # Whether the provider reuses cached prompt prefixes / 提供商是否复用已缓存的提示前缀
+    supports_prompt_cache: bool = False
     
     def __init__(
         self,
@@ -53,7 +56,49 @@ class BaseLLMProvider(ABC):
         """
         pass
     
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream chat response as text deltas
+        以文本增量的形式流式返回聊天响应
+
+        Yields {"type": "delta", "text": ...} events followed by exactly one
+        {"type": "final", "response": ...} event whose response has the same
+        shape as chat(). Providers without native streaming emit the whole
+        content as a single delta.
+        依次产出 {"type": "delta", "text": ...} 事件，最后产出一个
+        {"type": "final", "response": ...} 事件，其 response 与 chat() 格式相同。
+        不支持原生流式的提供商将全部内容作为单个增量产出。
+
+        Args:
+            messages: List of messages / 消息列表
+            temperature: Override temperature / 覆盖温度设置
+            max_tokens: Override max tokens / 覆盖最大token数
+
+        Yields:
+            Stream events / 流式事件
+        """
+        response = await self.chat(
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        if response.get("content"):
+            yield {"type": "delta", "text": response["content"]}
+        yield {"type": "final", "response": response}
+    
     @abstractmethod
     def get_provider_name(self) -> str:
         """Get provider name / 获取提供商名称"""
         pass
+
+    def _plain_messages(self, messages: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """
+        Strip gateway-only keys (e.g. cache_breakpoint) from messages
+        移除仅供网关使用的键（如 cache_breakpoint）
+        """
+        return [{"role": m["role"], "content": m["content"]} for m in messages]
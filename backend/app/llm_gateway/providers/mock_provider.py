@@ -1,4 +1,5 @@
-from typing import List, Dict, Any, Optional
+import asyncio
+from typing import List, Dict, Any, Optional, AsyncIterator
 from app.llm_gateway.providers.base import BaseLLMProvider
 
 
@@ -32,5 +33,19 @@ class MockProvider(BaseLLMProvider):
             "finish_reason": "stop",
         }
 
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        response = await self.chat(messages, temperature, max_tokens)
+        content = response["content"]
+        # Emit token-sized pieces so streaming paths are exercised in demo mode
+        for i in range(0, len(content), 8):
+            yield {"type": "delta", "text": content[i:i + 8]}
+            await asyncio.sleep(0)
+        yield {"type": "final", "response": response}
+
     def get_provider_name(self) -> str:
         return "mock"
@@ -2,23 +2,36 @@
 OpenAI Provider / OpenAI 适配器
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
+import openai
 from openai import AsyncOpenAI
 from app.llm_gateway.providers.base import BaseLLMProvider
+from app.llm_gateway.http_pool import get_sdk_client
 
 
 class OpenAIProvider(BaseLLMProvider):
     """OpenAI API provider / OpenAI API 提供商"""
+
+    # Prefix caching is automatic / 前缀缓存由服务端自动完成
+    supports_prompt_cache = True
     
     def __init__(
         self,
         api_key: str,
         model: str = "gpt-4o",
         max_tokens: int = 8000,
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        base_url: Optional[str] = None
     ):
         super().__init__(api_key, model, max_tokens, temperature)
-        self.client = AsyncOpenAI(api_key=api_key)
+        # Shared pooled client, reused while the key is unchanged / 共享连接池客户端，密钥不变时复用
+        self.client = get_sdk_client(
+            "openai",
+            api_key,
+            base_url,
+            AsyncOpenAI,
+            getattr(openai, "DefaultAsyncHttpxClient", None)
+        )
     
     async def chat(
         self,
@@ -40,22 +53,102 @@ class OpenAIProvider(BaseLLMProvider):
         """
         response = await self.client.chat.completions.create(
             model=self.model,
-            messages=messages,
-            temperature=temperature or self.temperature,
+            messages=self._plain_messages(messages),
+            temperature=temperature if temperature is not None else self.temperature,
             max_tokens=max_tokens or self.max_tokens
         )
+
+        # Prompt tokens served from the prefix cache / 命中前缀缓存的提示token数
+        details = getattr(response.usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None) or 0
         
         return {
             "content": response.choices[0].message.content,
             "usage": {
                 "prompt_tokens": response.usage.prompt_tokens,
                 "completion_tokens": response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens
+                "total_tokens": response.usage.total_tokens,
+                "cache_read_tokens": cached_tokens,
+                "cache_write_tokens": 0
             },
             "model": response.model,
             "finish_reason": response.choices[0].finish_reason
         }
     
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream chat response from OpenAI
+        从 OpenAI 流式获取聊天响应
+        
+        Args:
+            messages: List of messages / 消息列表
+            temperature: Override temperature / 覆盖温度
+            max_tokens: Override max tokens / 覆盖最大token数
+            
+        Yields:
+            Delta events, then the final response / 增量事件，最后是完整响应
+        """
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=self._plain_messages(messages),
+            temperature=temperature if temperature is not None else self.temperature,
+            max_tokens=max_tokens or self.max_tokens,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+
+        parts: List[str] = []
+        model = self.model
+        finish_reason = None
+        usage = None
+
+        async for chunk in stream:
+            model = chunk.model or model
+            # The usage chunk arrives last with no choices / 用量块最后到达且不含 choices
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.finish_reason:
+                finish_reason = choice.finish_reason
+            text = choice.delta.content if choice.delta else None
+            if text:
+                parts.append(text)
+                yield {"type": "delta", "text": text}
+
+        yield {"type": "final", "response": {
+            "content": "".join(parts),
+            "usage": self._stream_usage(usage),
+            "model": model,
+            "finish_reason": finish_reason
+        }}
+
+    def _stream_usage(self, usage: Any) -> Dict[str, int]:
+        """Convert streamed usage to gateway format / 将流式用量转换为网关格式"""
+        if usage is None:
+            return {
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "total_tokens": 0,
+                "cache_read_tokens": 0,
+                "cache_write_tokens": 0
+            }
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None) or 0
+        return {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
+            "cache_read_tokens": cached_tokens,
+            "cache_write_tokens": 0
+        }
+    
     def get_provider_name(self) -> str:
         """Get provider name / 获取提供商名称"""
         return "openai"
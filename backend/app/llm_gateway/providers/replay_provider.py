@@ -0,0 +1,85 @@
+"""
+Replay Provider / 回放提供商
+Serves responses recorded in a cassette with their original latency
+以原始延迟返回磁带中录制的响应
+"""
+
+import asyncio
+from typing import List, Dict, Any, Optional, AsyncIterator
+from app.llm_gateway.providers.base import BaseLLMProvider
+from app.llm_gateway.cassette import Cassette
+
+
+class ReplayProvider(BaseLLMProvider):
+    """
+    Provider backed by a recorded cassette / 基于录制磁带的提供商
+
+    Each request waits for the recorded latency times latency_scale
+    (0 replays instantly) and returns the recorded response. Requests not
+    in the cassette raise CassetteMissError describing the changed prompt.
+    每个请求等待录制延迟乘以 latency_scale（0 表示立即回放）后返回录制的响应。
+    磁带中不存在的请求会抛出 CassetteMissError，并说明提示的变化。
+    """
+
+    def __init__(self, cassette: Cassette, latency_scale: float = 1.0):
+        """
+        Initialize provider
+
+        Args:
+            cassette: Cassette to replay / 要回放的磁带
+            latency_scale: Multiplier for recorded latencies / 录制延迟的倍数
+        """
+        super().__init__("", "replay", max_tokens=8000, temperature=0.0)
+        self.cassette = cassette
+        self.latency_scale = max(0.0, float(latency_scale))
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Replay a recorded chat response / 回放录制的聊天响应
+
+        Args:
+            messages: List of messages / 消息列表
+            temperature: Requested temperature (part of the key) / 请求的温度（键的一部分）
+            max_tokens: Requested max tokens (part of the key) / 请求的最大token数（键的一部分）
+
+        Returns:
+            Recorded response dict / 录制的响应字典
+        """
+        entry = self.cassette.next_response(messages, temperature, max_tokens)
+        await asyncio.sleep(entry.get("elapsed_time", 0.0) * self.latency_scale)
+        return dict(entry["response"])
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Replay a recorded response as evenly paced deltas / 以均匀节奏的增量回放录制的响应
+
+        Args:
+            messages: List of messages / 消息列表
+            temperature: Requested temperature (part of the key) / 请求的温度（键的一部分）
+            max_tokens: Requested max tokens (part of the key) / 请求的最大token数（键的一部分）
+        """
+        entry = self.cassette.next_response(messages, temperature, max_tokens)
+        response = dict(entry["response"])
+        content = response.get("content") or ""
+
+        chunks = [content[i:i + 64] for i in range(0, len(content), 64)] or [""]
+        pause = entry.get("elapsed_time", 0.0) * self.latency_scale / len(chunks)
+        for chunk in chunks:
+            await asyncio.sleep(pause)
+            if chunk:
+                yield {"type": "delta", "text": chunk}
+        yield {"type": "final", "response": response}
+
+    def get_provider_name(self) -> str:
+        """Get provider name / 获取提供商名称"""
+        return "replay"
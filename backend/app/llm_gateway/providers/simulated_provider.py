@@ -0,0 +1,377 @@
+"""
+Simulated Provider / 模拟提供商
+Offline provider with realistic latency, output length and injected failures
+离线提供商，模拟真实的延迟、输出长度与故障注入
+"""
+
+import asyncio
+import random
+import re
+from typing import List, Dict, Any, Optional, AsyncIterator
+from app.llm_gateway.providers.base import BaseLLMProvider
+from app.llm_gateway.rate_limit import estimate_prompt_tokens
+
+
+# Canned outputs per pipeline step; each parses with the matching agent
+# 各流水线步骤的预设输出；均可被对应 Agent 正确解析
+SCENE_BRIEF = """```yaml
+chapter: {chapter}
+title: {title}
+goal: {goal}
+characters:
+  - name: {character}
+    current_state: 心事重重，仍在寻找线索
+    relevant_traits: 谨慎、执着
+timeline_context:
+  before: 上一章结尾的线索指向山中
+  current: 清晨
+  after: 山中将有新的发现
+world_constraints:
+  - 山路只在白天开放
+style_reminder: 保持紧凑的节奏与近距离叙事
+forbidden:
+  - 不得提前揭示真相
+```"""
+
+REVIEW = """```yaml
+issues:
+  - severity: minor
+    category: style
+    location: "paragraph 1"
+    problem: "开头节奏略慢"
+    suggestion: "压缩环境描写，尽快进入行动"
+
+overall_assessment: "整体连贯，可以继续"
+can_proceed: true
+```"""
+
+EDIT_INSTRUCTIONS = """```yaml
+edit_instructions:
+  - operation: replace
+    paragraph_index: 1
+    reason: "fix minor style issue: tighten the opening"
+    new_text: |
+      {paragraph}
+```"""
+
+CANON_UPDATES = """```yaml
+facts:
+  - statement: {character}已抵达山中
+    confidence: 0.9
+timeline_events:
+  - time: 清晨
+    event: {character}进山寻找线索
+    participants: [{character}]
+    location: 山中
+character_states:
+  - character: {character}
+    goals: [找到线索]
+    injuries: []
+    inventory: []
+    relationships: {{}}
+    location: 山中
+    emotional_state: 紧张
+```"""
+
+CHAPTER_SUMMARY = """```yaml
+chapter: {chapter}
+title: {title}
+word_count: {word_count}
+key_events:
+  - {character}进山寻找线索
+new_facts:
+  - {character}已抵达山中
+character_state_changes:
+  - {character}由犹豫转为坚定
+open_loops:
+  - 线索的真正来源尚未揭晓
+brief_summary: {character}清晨进山，循着线索深入，决心查明真相。
+```"""
+
+# Prose sentences cycled to build drafts of the requested length
+# 循环拼接的正文句子，用于生成指定长度的草稿
+PROSE = (
+    "晨雾还没有散尽，山路上的石阶湿漉漉的，踩上去发出细微的声响。",
+    "{character}停下脚步，回头望了一眼来时的方向，那里只剩下一片灰白。",
+    "风从林间穿过，带来松脂和泥土混杂的气味，也带来一丝说不清的不安。",
+    "他想起临行前那句叮嘱，心里默念了一遍，又把手按在怀里的信上。",
+    "远处传来几声鸟鸣，随即又归于寂静，仿佛整座山都在屏息等待。",
+    "他深吸一口气，继续向上走去，脚步比先前更快，也更坚定。",
+)
+
+
+class SimulatedRateLimitError(Exception):
+    """Injected 429 with a Retry-After header / 注入的 429 错误（带 Retry-After 头）"""
+
+    status_code = 429
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Simulated rate limit, retry after {retry_after:.1f}s")
+        # Same shape as SDK errors, read by retry_after_seconds()
+        # 与 SDK 异常结构一致，供 retry_after_seconds() 读取
+        self.response = type("SimulatedResponse", (), {
+            "status_code": 429,
+            "headers": {"retry-after": str(retry_after)},
+        })()
+
+
+class SimulatedProviderError(Exception):
+    """Injected provider failure / 注入的提供商故障"""
+
+    status_code = 500
+
+
+class SimulatedProvider(BaseLLMProvider):
+    """
+    Provider that simulates a real model without network access
+    无需网络即可模拟真实模型的提供商
+
+    Latency is time-to-first-token plus output tokens / tokens_per_second.
+    The output depends on the prompt: scene briefs, reviews, edit
+    instructions, canon updates and chapter summaries are canned YAML that
+    the agents parse; anything else is prose of the length the prompt asks
+    for (output_tokens by default).
+    延迟为首token时间加上 输出token数 / tokens_per_second。输出取决于提示：
+    场景简报、审稿意见、编辑指令、事实更新与章节摘要为可被 Agent 解析的预设 YAML，
+    其余为提示所要求长度的正文（默认 output_tokens）。
+    """
+
+    # Constructor options accepted from config / 可从配置读取的构造参数
+    OPTIONS = (
+        "model", "max_tokens", "temperature", "ttft", "ttft_jitter", "tokens_per_second",
+        "output_tokens", "error_rate", "rate_limit_rate", "retry_after", "seed",
+    )
+
+    def __init__(
+        self,
+        model: str = "simulated",
+        max_tokens: int = 8000,
+        temperature: float = 0.7,
+        ttft: float = 0.8,
+        ttft_jitter: float = 0.3,
+        tokens_per_second: float = 40.0,
+        output_tokens: int = 1500,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize provider
+
+        Args:
+            model: Model name reported in responses / 响应中报告的模型名称
+            max_tokens: Maximum tokens to generate / 最大生成token数
+            temperature: Temperature (unused) / 温度（不使用）
+            ttft: Mean time to first token in seconds / 平均首token时间（秒）
+            ttft_jitter: Uniform jitter added to ttft (±) / 首token时间的均匀抖动（±）
+            tokens_per_second: Generation speed / 生成速度
+            output_tokens: Prose length in tokens / 正文长度（token）
+            error_rate: Share of requests failing with a server error / 以服务端错误失败的请求比例
+            rate_limit_rate: Share of requests rejected with 429 / 以 429 拒绝的请求比例
+            retry_after: Retry-After of injected 429s in seconds / 注入 429 的 Retry-After（秒）
+            seed: Random seed for reproducible runs / 随机种子，用于可复现的运行
+        """
+        super().__init__("", model, max_tokens, temperature)
+        self.ttft = float(ttft)
+        self.ttft_jitter = float(ttft_jitter)
+        self.tokens_per_second = max(1.0, float(tokens_per_second))
+        self.output_tokens = int(output_tokens)
+        self.error_rate = float(error_rate)
+        self.rate_limit_rate = float(rate_limit_rate)
+        self.retry_after = float(retry_after)
+        self.random = random.Random(seed)
+
+    @classmethod
+    def from_config(cls, options: Dict[str, Any]) -> "SimulatedProvider":
+        """
+        Build from a llm.providers.simulated section, ignoring unknown keys
+        根据 llm.providers.simulated 配置段构建，忽略未知键
+
+        Args:
+            options: Config section / 配置段
+
+        Returns:
+            Provider instance / 提供商实例
+        """
+        return cls(**{k: v for k, v in (options or {}).items() if k in cls.OPTIONS})
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Simulated chat request / 模拟聊天请求
+
+        Args:
+            messages: List of messages / 消息列表
+            temperature: Override temperature (unused) / 覆盖温度（不使用）
+            max_tokens: Override max tokens / 覆盖最大token数
+
+        Returns:
+            Response dict / 响应字典
+        """
+        self.inject_failure()
+        response = self.build_response(messages, max_tokens)
+        await asyncio.sleep(self.first_token_delay())
+        await asyncio.sleep(response["usage"]["completion_tokens"] / self.tokens_per_second)
+        return response
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Simulated streaming request, paced at tokens_per_second
+        模拟流式请求，按 tokens_per_second 控制节奏
+
+        Args:
+            messages: List of messages / 消息列表
+            temperature: Override temperature (unused) / 覆盖温度（不使用）
+            max_tokens: Override max tokens / 覆盖最大token数
+        """
+        self.inject_failure()
+        response = self.build_response(messages, max_tokens)
+        await asyncio.sleep(self.first_token_delay())
+
+        async for text in self.paced_chunks(response["content"]):
+            yield {"type": "delta", "text": text}
+        yield {"type": "final", "response": response}
+
+    def get_provider_name(self) -> str:
+        """Get provider name / 获取提供商名称"""
+        return "simulated"
+
+    def build_response(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Build the response for a prompt without waiting
+        为提示构建响应（不等待）
+
+        Args:
+            messages: List of messages / 消息列表
+            max_tokens: Override max tokens / 覆盖最大token数
+
+        Returns:
+            Response dict with content, usage and finish_reason
+            包含内容、用量与结束原因的响应字典
+        """
+        limit = max_tokens or self.max_tokens
+        content = self._render(messages)
+        finish_reason = "stop"
+        if len(content) // 2 > limit:
+            content = content[:limit * 2]
+            finish_reason = "length"
+
+        prompt_tokens = estimate_prompt_tokens(messages)
+        completion_tokens = len(content) // 2
+        return {
+            "content": content,
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "cache_read_tokens": 0,
+                "cache_write_tokens": 0,
+            },
+            "model": self.model,
+            "finish_reason": finish_reason,
+        }
+
+    def _render(self, messages: List[Dict[str, str]]) -> str:
+        """Pick and fill the canned output for a prompt / 为提示选择并填充预设输出"""
+        system = "\n".join(m.get("content") or "" for m in messages if m.get("role") == "system")
+        prompt = "\n".join(m.get("content") or "" for m in messages if m.get("role") != "system")
+        fields = {
+            "chapter": _field(prompt, r"^chapter:\s*(\S+)", r"Chapter:\s*(\S+)") or "ch01",
+            "title": _field(prompt, r"^title:\s*(.+)$", r"Title:\s*(.+)$") or "未命名",
+            "goal": _field(prompt, r"^goal:\s*(.+)$") or "推进主线",
+            "character": _field(prompt, r"^\s*-?\s*name:\s*(\S+)", r"Name:\s*(\S+)") or "李明",
+        }
+
+        if "Output the scene brief" in prompt:
+            return SCENE_BRIEF.format(**fields)
+        if "Extract canon updates" in prompt:
+            return CANON_UPDATES.format(**fields)
+        if "key_events:" in prompt:
+            return CHAPTER_SUMMARY.format(word_count=self.output_tokens * 2, **fields)
+        if "edit_instructions:" in prompt:
+            return EDIT_INSTRUCTIONS.format(paragraph=self._prose(120, fields).replace("\n\n", ""))
+        if "Review this draft" in prompt or "Reviewer" in system:
+            return REVIEW
+
+        # Summary compression asks for "约N字", drafts for "目标字数：约 N 字"; a
+        # continuation only writes what is left after the assistant turns. Prose
+        # over the limit is cut by build_response with finish_reason "length".
+        # 摘要压缩要求“约N字”，草稿要求“目标字数：约 N 字”；续写只生成 assistant
+        # 轮次之后剩余的部分。超出上限的正文由 build_response 截断，finish_reason 为 "length"。
+        target = _field(prompt, r"压缩到约\s*(\d+)\s*字", r"目标字数：约\s*(\d+)\s*字")
+        chars = int(target) if target else self.output_tokens * 2
+        written = sum(len(m.get("content") or "") for m in messages if m.get("role") == "assistant")
+        return self._prose(max(chars - written, 60), fields)
+
+    def _prose(self, chars: int, fields: Dict[str, str]) -> str:
+        """Paragraphs of prose totalling about chars characters / 约 chars 字符的多段正文"""
+        paragraphs: List[str] = []
+        paragraph = ""
+        total = 0
+        index = 0
+        while total < chars:
+            sentence = PROSE[index % len(PROSE)].format(**fields)
+            paragraph += sentence
+            total += len(sentence)
+            index += 1
+            if index % 3 == 0:
+                paragraphs.append(paragraph)
+                paragraph = ""
+        if paragraph:
+            paragraphs.append(paragraph)
+        return "\n\n".join(paragraphs)
+
+    async def paced_chunks(self, content: str) -> AsyncIterator[str]:
+        """
+        Yield content in chunks at tokens_per_second / 按 tokens_per_second 分块产出内容
+
+        Chunks are ~8 tokens; 1 token ≈ 2 characters.
+        每块约 8 个token；1 token ≈ 2 字符。
+        """
+        chunk_chars = 16
+        for i in range(0, len(content), chunk_chars):
+            yield content[i:i + chunk_chars]
+            await asyncio.sleep((chunk_chars / 2) / self.tokens_per_second)
+
+    def first_token_delay(self) -> float:
+        """ttft with jitter / 带抖动的首token时间"""
+        return max(0.0, self.ttft + self.random.uniform(-self.ttft_jitter, self.ttft_jitter))
+
+    def inject_failure(self) -> None:
+        """
+        Raise an injected 429 or server error / 抛出注入的 429 或服务端错误
+
+        Raises:
+            SimulatedRateLimitError: With probability rate_limit_rate / 以 rate_limit_rate 的概率
+            SimulatedProviderError: With probability error_rate / 以 error_rate 的概率
+        """
+        roll = self.random.random()
+        if roll < self.rate_limit_rate:
+            raise SimulatedRateLimitError(self.retry_after)
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise SimulatedProviderError("Simulated provider error")
+
+
+def _field(text: str, *patterns: str) -> Optional[str]:
+    """First match of any pattern (multiline) / 任一模式的首个匹配（多行模式）"""
+    for pattern in patterns:
+        match = re.search(pattern, text, re.MULTILINE)
+        if match:
+            # Keep the value a plain YAML scalar / 保证取值是普通的 YAML 标量
+            value = re.sub(r"[:#\[\]{}\"'|>&*!%@`,]", " ", match.group(1)).strip()
+            return value or None
+    return None
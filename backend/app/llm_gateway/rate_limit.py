@@ -0,0 +1,333 @@
+"""
+Rate Limiting / 限流
+Per-provider and per-model concurrency limits, RPM/TPM token buckets and retry backoff
+按提供商与模型的并发限制、RPM/TPM 令牌桶以及重试退避
+"""
+
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, AsyncIterator
+
+
+def estimate_prompt_tokens(messages: List[Dict[str, Any]]) -> int:
+    """
+    Estimate prompt tokens before dispatch / 发送前估算提示token数
+
+    Uses the same rough rule as TokenBudgeter: 1 token ≈ 2 characters.
+    与 TokenBudgeter 使用相同的粗略规则：1 token ≈ 2 字符。
+    """
+    return sum(len(m.get("content") or "") for m in messages) // 2
+
+
+class TokenBucket:
+    """
+    Continuously refilled token bucket / 连续补充的令牌桶
+
+    The balance may go negative when actual usage exceeds the estimate that
+    was acquired; later callers then wait for the debt to be refilled.
+    当实际用量超过预先申请的估算值时余额可以为负，之后的调用方会等待欠额补足。
+    """
+
+    def __init__(self, per_minute: float):
+        """
+        Initialize a full bucket
+
+        Args:
+            per_minute: Capacity and refill rate per minute / 每分钟容量与补充速率
+        """
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float) -> None:
+        """
+        Wait until amount is available, then take it / 等待额度可用后扣除
+
+        Requests larger than the capacity are clamped so they can still pass.
+        超过容量的请求会被截断为容量，保证仍能通过。
+
+        Args:
+            amount: Tokens to take / 要扣除的令牌数
+        """
+        amount = min(float(amount), self.capacity)
+        # FIFO: one waiter at a time / 先进先出：同一时间只有一个等待方
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def debit(self, amount: float) -> None:
+        """
+        Take tokens without waiting (usage reconciliation) / 不等待直接扣除（用量校正）
+
+        Args:
+            amount: Tokens to take, negative to refund / 要扣除的令牌数，负数表示退还
+        """
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+    def _refill(self) -> None:
+        """Add tokens for elapsed time / 按经过的时间补充令牌"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class RateLimiter:
+    """
+    Concurrency semaphore plus optional RPM/TPM buckets for one scope
+    单个作用域（提供商或模型）的并发信号量与可选的 RPM/TPM 令牌桶
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: Optional[int] = None,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None
+    ):
+        """
+        Initialize limiter
+
+        Args:
+            name: Scope name, e.g. "openai" or "openai/gpt-4o" / 作用域名称
+            max_concurrency: Maximum in-flight requests (None = unlimited) / 最大并发请求数
+            rpm: Requests per minute (None = unlimited) / 每分钟请求数
+            tpm: Tokens per minute (None = unlimited) / 每分钟token数
+        """
+        self.name = name
+        self.semaphore = asyncio.Semaphore(int(max_concurrency)) if max_concurrency else None
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+
+        # Queue statistics / 排队统计
+        self.queued = 0
+        self.max_queued = 0
+        self.in_flight = 0
+        self.acquired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def acquire(self, estimated_tokens: int) -> None:
+        """
+        Wait for a concurrency slot and rate budget / 等待并发名额与速率额度
+
+        Args:
+            estimated_tokens: Estimated tokens of the request / 请求的估算token数
+        """
+        start = time.monotonic()
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            if self.semaphore:
+                await self.semaphore.acquire()
+            try:
+                if self.requests:
+                    await self.requests.acquire(1)
+                if self.tokens:
+                    await self.tokens.acquire(estimated_tokens)
+            except BaseException:
+                if self.semaphore:
+                    self.semaphore.release()
+                raise
+        finally:
+            self.queued -= 1
+
+        waited = time.monotonic() - start
+        self.acquired += 1
+        self.in_flight += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+    def release(self, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        """
+        Free the concurrency slot and reconcile token usage / 释放并发名额并校正token用量
+
+        Args:
+            estimated_tokens: Tokens taken in acquire / acquire 时扣除的token数
+            actual_tokens: Actual total tokens, None if unknown / 实际总token数，未知时为 None
+        """
+        self.in_flight -= 1
+        if self.semaphore:
+            self.semaphore.release()
+        if self.tokens and actual_tokens:
+            self.tokens.debit(actual_tokens - estimated_tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get queue statistics / 获取排队统计信息
+
+        Returns:
+            Queue depth, in-flight count and wait times / 队列深度、进行中数量与等待时间
+        """
+        return {
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "in_flight": self.in_flight,
+            "acquired": self.acquired,
+            "avg_wait": self.total_wait / self.acquired if self.acquired else 0.0,
+            "max_wait": self.max_wait,
+        }
+
+
+class RateLimiterRegistry:
+    """
+    Limiters per provider and per provider model, built from config
+    根据配置为每个提供商及其模型构建的限流器
+
+    Limits are read from llm.providers.<name> (max_concurrency, rpm, tpm) and
+    llm.providers.<name>.models.<model> for model-specific limits.
+    限制读取自 llm.providers.<name>（max_concurrency、rpm、tpm），
+    模型专属限制读取自 llm.providers.<name>.models.<model>。
+    """
+
+    def __init__(self, providers_config: Dict[str, Any]):
+        """
+        Initialize registry
+
+        Args:
+            providers_config: The llm.providers config section / llm.providers 配置段
+        """
+        self.providers_config = providers_config or {}
+        self._limiters: Dict[str, Optional[RateLimiter]] = {}
+
+    def limiters_for(self, provider: str, model: str) -> List[RateLimiter]:
+        """
+        Limiters applying to a provider and model, provider first
+        适用于提供商与模型的限流器（提供商在前）
+
+        Args:
+            provider: Provider name / 提供商名称
+            model: Model name / 模型名称
+
+        Returns:
+            Configured limiters / 已配置的限流器
+        """
+        provider_config = self.providers_config.get(provider, {}) or {}
+        model_config = (provider_config.get("models", {}) or {}).get(model, {}) or {}
+
+        result = []
+        for name, scope_config in ((provider, provider_config), (f"{provider}/{model}", model_config)):
+            if name not in self._limiters:
+                self._limiters[name] = self._build(name, scope_config)
+            if self._limiters[name] is not None:
+                result.append(self._limiters[name])
+        return result
+
+    @asynccontextmanager
+    async def limit(
+        self,
+        provider: str,
+        model: str,
+        estimated_tokens: int
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Hold all applicable limits for one request / 在一次请求期间持有所有适用的限制
+
+        The yielded dict accepts "total_tokens" so actual usage can be
+        reconciled against the estimate on exit.
+        产出的字典可写入 "total_tokens"，退出时据此用实际用量校正估算值。
+
+        Args:
+            provider: Provider name / 提供商名称
+            model: Model name / 模型名称
+            estimated_tokens: Estimated tokens of the request / 请求的估算token数
+        """
+        acquired: List[RateLimiter] = []
+        usage: Dict[str, Any] = {}
+        try:
+            for limiter in self.limiters_for(provider, model):
+                await limiter.acquire(estimated_tokens)
+                acquired.append(limiter)
+            yield usage
+        finally:
+            for limiter in reversed(acquired):
+                limiter.release(estimated_tokens, usage.get("total_tokens"))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Queue statistics per scope / 各作用域的排队统计"""
+        return {
+            name: limiter.stats()
+            for name, limiter in self._limiters.items()
+            if limiter is not None
+        }
+
+    @staticmethod
+    def _build(name: str, scope_config: Dict[str, Any]) -> Optional[RateLimiter]:
+        """Build limiter if any limit is configured / 配置了任一限制时构建限流器"""
+        max_concurrency = scope_config.get("max_concurrency")
+        rpm = scope_config.get("rpm")
+        tpm = scope_config.get("tpm")
+        if not (max_concurrency or rpm or tpm):
+            return None
+        return RateLimiter(name, max_concurrency=max_concurrency, rpm=rpm, tpm=tpm)
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Read Retry-After from an SDK exception, if present
+    从 SDK 异常中读取 Retry-After（如有）
+
+    The OpenAI and Anthropic SDKs attach the HTTP response to API errors;
+    both "retry-after-ms" and "retry-after" (seconds) are honored.
+    OpenAI 与 Anthropic SDK 会在 API 错误上附带 HTTP 响应；
+    同时支持 "retry-after-ms" 与 "retry-after"（秒）。
+
+    Args:
+        error: Exception raised by a provider / 提供商抛出的异常
+
+    Returns:
+        Seconds to wait, or None / 需等待的秒数，或 None
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    try:
+        value = headers.get("retry-after-ms")
+        if value is not None:
+            return max(0.0, float(value) / 1000.0)
+        value = headers.get("retry-after")
+        if value is not None:
+            return max(0.0, float(value))
+    except (TypeError, ValueError):
+        # HTTP-date form is not used by these providers / 这些提供商不使用 HTTP 日期格式
+        return None
+    return None
+
+
+def backoff_delay(
+    attempt: int,
+    error: Exception,
+    base_delay: float,
+    max_delay: float
+) -> float:
+    """
+    Retry delay: Retry-After if given, otherwise full jitter
+    重试延迟：有 Retry-After 时使用该值，否则使用完全抖动
+
+    Full jitter draws uniformly from [0, min(max_delay, base * 2^attempt)] so
+    concurrent retries do not stall in lockstep.
+    完全抖动在 [0, min(max_delay, base * 2^attempt)] 内均匀取值，避免并发重试同步卡顿。
+
+    Args:
+        attempt: Zero-based attempt that failed / 失败的尝试序号（从0开始）
+        error: Exception raised by the attempt / 该次尝试抛出的异常
+        base_delay: Base delay in seconds / 基础延迟（秒）
+        max_delay: Delay cap in seconds / 延迟上限（秒）
+
+    Returns:
+        Seconds to wait / 需等待的秒数
+    """
+    retry_after = retry_after_seconds(error)
+    if retry_after is not None:
+        return min(retry_after, max_delay)
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
@@ -0,0 +1,151 @@
+"""
+Single Flight / 请求合并
+Coalesce identical in-flight LLM requests into one provider call
+将相同的进行中大模型请求合并为一次提供商调用
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+DeltaCallback = Callable[[str], Awaitable[None]]
+
+
+class _Listener:
+    """Delta subscriber of a flight / 请求的增量订阅者"""
+
+    def __init__(self, callback: DeltaCallback):
+        self.callback = callback
+        # Keeps the catch-up text ahead of live deltas / 保证补发文本先于实时增量
+        self.lock = asyncio.Lock()
+
+    async def send(self, text: str) -> None:
+        async with self.lock:
+            await self.callback(text)
+
+
+class _Flight:
+    """One shared in-flight call / 一次共享的进行中调用"""
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+        self.listeners: List[_Listener] = []
+        self.text: List[str] = []
+        # Set once the task is cancelled; new callers start a fresh flight
+        # 任务被取消后置位；新的调用方会发起新的请求
+        self.abandoned = False
+
+    async def emit(self, text: str) -> None:
+        """Fan a delta out to all listeners / 将增量分发给所有订阅者"""
+        self.text.append(text)
+        for listener in list(self.listeners):
+            try:
+                await listener.send(text)
+            except Exception as e:
+                # One broken subscriber must not fail the shared call
+                # 单个订阅者出错不应导致共享调用失败
+                print(f"[LLMGateway] Dropping stream listener after error: {str(e)}")
+                if listener in self.listeners:
+                    self.listeners.remove(listener)
+
+
+class SingleFlight:
+    """
+    Share one in-flight call among identical concurrent requests
+    在相同的并发请求之间共享一次进行中的调用
+
+    The first caller for a key (the leader) starts the call as a separate task;
+    later callers (followers) await the same task. The task is cancelled only
+    when every waiter has been cancelled, so a cancelled leader does not fail
+    its followers. Streaming followers first receive the text produced so far,
+    then live deltas.
+    某个键的第一个调用方（领导者）以独立任务启动调用；之后的调用方（跟随者）
+    等待同一任务。只有当所有等待方都被取消时才取消该任务，因此领导者被取消
+    不会导致跟随者失败。流式跟随者先收到已生成的文本，再接收实时增量。
+    """
+
+    def __init__(self):
+        """Initialize with no flights / 初始化（无进行中请求）"""
+        self._flights: Dict[str, _Flight] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(
+        self,
+        key: str,
+        call: Callable[[DeltaCallback], Awaitable[Dict[str, Any]]],
+        on_delta: Optional[DeltaCallback] = None
+    ) -> Dict[str, Any]:
+        """
+        Run call once per key among concurrent callers
+        对并发调用方按键只执行一次调用
+
+        Args:
+            key: Request key / 请求键
+            call: Factory receiving the delta emitter / 接收增量分发函数的调用工厂
+            on_delta: Optional callback for streamed text / 可选的流式文本回调
+
+        Returns:
+            Response dict (a copy per caller; followers get "coalesced": True)
+            响应字典（每个调用方一份副本；跟随者带 "coalesced": True）
+        """
+        flight = self._flights.get(key)
+        leader = flight is None or flight.abandoned
+
+        if leader:
+            flight = _Flight()
+            self._flights[key] = flight
+            # The task starts running only at the next suspension point
+            # 任务在下一个挂起点才开始运行
+            flight.task = asyncio.ensure_future(call(flight.emit))
+            flight.task.add_done_callback(lambda _t: self._forget(key, flight))
+            self.leaders += 1
+        else:
+            self.followers += 1
+
+        flight.waiters += 1
+        listener = None
+        try:
+            if on_delta:
+                listener = _Listener(on_delta)
+                async with listener.lock:
+                    flight.listeners.append(listener)
+                    if flight.text:
+                        await on_delta("".join(flight.text))
+
+            response = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.done() and flight.waiters == 1:
+                # Last waiter gone; nobody needs the result
+                # 最后一个等待方离开，结果已无人需要
+                flight.abandoned = True
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+            if listener in flight.listeners:
+                flight.listeners.remove(listener)
+
+        result = dict(response)
+        if not leader:
+            result["coalesced"] = True
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get coalescing statistics / 获取合并统计信息
+
+        Returns:
+            Leader calls, coalesced followers and flights in progress
+            领导者调用数、被合并的跟随者数与进行中的请求数
+        """
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.followers,
+            "in_flight": len(self._flights),
+        }
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        """Remove a finished flight / 移除已结束的请求"""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
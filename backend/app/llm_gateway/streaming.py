@@ -0,0 +1,78 @@
+"""
+Streaming Helpers / 流式输出辅助
+Coalesce token deltas into larger frames before they are sent to clients
+在发送给客户端前将 token 增量合并为较大的帧
+"""
+
+import time
+from typing import Awaitable, Callable, List
+
+
+class DeltaCoalescer:
+    """
+    Batch streamed text deltas by time and size
+    按时间与大小批量合并流式文本增量
+
+    The first delta is flushed immediately so the first visible text is not
+    delayed; later deltas are buffered until `interval` seconds have passed
+    since the previous flush or `max_chars` characters are pending.
+    第一个增量立即发送，保证首段可见文本不被延迟；之后的增量会缓冲，
+    直到距上次发送超过 `interval` 秒或累计 `max_chars` 个字符。
+    """
+
+    def __init__(
+        self,
+        on_flush: Callable[[str], Awaitable[None]],
+        interval: float = 0.1,
+        max_chars: int = 200
+    ):
+        """
+        Initialize coalescer
+
+        Args:
+            on_flush: Async callback receiving merged text / 接收合并文本的异步回调
+            interval: Minimum seconds between frames / 帧之间的最小间隔（秒）
+            max_chars: Flush when this many characters are pending / 累计字符数达到此值时发送
+        """
+        self.on_flush = on_flush
+        self.interval = interval
+        self.max_chars = max_chars
+        self.frames = 0
+        self._buffer: List[str] = []
+        self._pending = 0
+        self._last_flush = 0.0
+
+    async def push(self, text: str) -> None:
+        """
+        Add a delta, flushing when due / 添加增量，到期时发送
+
+        Args:
+            text: Text delta / 文本增量
+        """
+        if not text:
+            return
+        self._buffer.append(text)
+        self._pending += len(text)
+
+        now = time.monotonic()
+        if (
+            self.frames == 0
+            or self._pending >= self.max_chars
+            or now - self._last_flush >= self.interval
+        ):
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Send buffered text as one frame / 将缓冲文本作为一帧发送"""
+        if not self._buffer:
+            return
+        text = "".join(self._buffer)
+        self._buffer = []
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self.frames += 1
+        await self.on_flush(text)
+
+    async def close(self) -> None:
+        """Flush remaining text at end of stream / 流结束时发送剩余文本"""
+        await self.flush()
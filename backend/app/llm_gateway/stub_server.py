@@ -0,0 +1,263 @@
+"""
+LLM Stub Server / 大模型桩服务器
+Local OpenAI- and Anthropic-compatible HTTP server backed by SimulatedProvider
+由 SimulatedProvider 驱动、兼容 OpenAI 与 Anthropic 的本地 HTTP 服务器
+
+Point the real providers at it with llm.providers.<name>.base_url to exercise
+the SDK clients, connection pool, streaming and retry paths without network:
+通过 llm.providers.<name>.base_url 将真实提供商指向它，无需网络即可覆盖
+SDK 客户端、连接池、流式与重试路径：
+
+    python -m app.llm_gateway.stub_server --port 8765
+    openai / deepseek:  base_url: http://127.0.0.1:8765/v1
+    anthropic:          base_url: http://127.0.0.1:8765
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import List, Dict, Any, Optional, AsyncIterator
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.config import config
+from app.llm_gateway.providers.simulated_provider import (
+    SimulatedProvider,
+    SimulatedRateLimitError,
+    SimulatedProviderError,
+)
+
+
+def create_stub_app(provider: Optional[SimulatedProvider] = None) -> FastAPI:
+    """
+    Create the stub server application / 创建桩服务器应用
+
+    Args:
+        provider: Simulated provider producing the responses
+                  (default: built from llm.providers.simulated)
+                  生成响应的模拟提供商（默认根据 llm.providers.simulated 构建）
+
+    Returns:
+        FastAPI application / FastAPI 应用
+    """
+    provider = provider or _provider_from_config()
+    app = FastAPI(title="NOVIX LLM Stub", docs_url=None, redoc_url=None)
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        """OpenAI Chat Completions / OpenAI 聊天补全接口"""
+        body = await request.json()
+        messages = [
+            {"role": m.get("role", "user"), "content": _text(m.get("content"))}
+            for m in body.get("messages", [])
+        ]
+        error = _injected_error(provider, "openai")
+        if error is not None:
+            return error
+
+        response = provider.build_response(messages, body.get("max_tokens"))
+        model = body.get("model") or provider.model
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        usage = {
+            "prompt_tokens": response["usage"]["prompt_tokens"],
+            "completion_tokens": response["usage"]["completion_tokens"],
+            "total_tokens": response["usage"]["total_tokens"],
+        }
+
+        if not body.get("stream"):
+            await _generate(provider, response)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": response["content"]},
+                    "finish_reason": response["finish_reason"],
+                }],
+                "usage": usage,
+            }
+
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+
+        async def events() -> AsyncIterator[str]:
+            def chunk(choices: List[Dict[str, Any]], **extra: Any) -> str:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": choices,
+                    **extra,
+                }
+                return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+            await _first_token(provider)
+            yield chunk([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+            async for text in provider.paced_chunks(response["content"]):
+                yield chunk([{"index": 0, "delta": {"content": text}, "finish_reason": None}])
+            yield chunk([{"index": 0, "delta": {}, "finish_reason": response["finish_reason"]}])
+            if include_usage:
+                # Usage arrives last with no choices, as from OpenAI / 与 OpenAI 一致：用量最后到达且不含 choices
+                yield chunk([], usage=usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/v1/messages")
+    async def messages_endpoint(request: Request):
+        """Anthropic Messages / Anthropic 消息接口"""
+        body = await request.json()
+        messages: List[Dict[str, str]] = []
+        if body.get("system"):
+            messages.append({"role": "system", "content": _text(body["system"])})
+        messages += [
+            {"role": m.get("role", "user"), "content": _text(m.get("content"))}
+            for m in body.get("messages", [])
+        ]
+        error = _injected_error(provider, "anthropic")
+        if error is not None:
+            return error
+
+        response = provider.build_response(messages, body.get("max_tokens"))
+        model = body.get("model") or provider.model
+        message_id = f"msg_{uuid.uuid4().hex[:24]}"
+        stop_reason = "max_tokens" if response["finish_reason"] == "length" else "end_turn"
+        input_tokens = response["usage"]["prompt_tokens"]
+        output_tokens = response["usage"]["completion_tokens"]
+
+        if not body.get("stream"):
+            await _generate(provider, response)
+            return {
+                "id": message_id,
+                "type": "message",
+                "role": "assistant",
+                "model": model,
+                "content": [{"type": "text", "text": response["content"]}],
+                "stop_reason": stop_reason,
+                "stop_sequence": None,
+                "usage": {
+                    "input_tokens": input_tokens,
+                    "output_tokens": output_tokens,
+                    "cache_read_input_tokens": 0,
+                    "cache_creation_input_tokens": 0,
+                },
+            }
+
+        async def events() -> AsyncIterator[str]:
+            def event(name: str, payload: Dict[str, Any]) -> str:
+                return f"event: {name}\ndata: {json.dumps({'type': name, **payload}, ensure_ascii=False)}\n\n"
+
+            await _first_token(provider)
+            yield event("message_start", {"message": {
+                "id": message_id,
+                "type": "message",
+                "role": "assistant",
+                "model": model,
+                "content": [],
+                "stop_reason": None,
+                "stop_sequence": None,
+                "usage": {"input_tokens": input_tokens, "output_tokens": 0},
+            }})
+            yield event("content_block_start", {"index": 0, "content_block": {"type": "text", "text": ""}})
+            async for text in provider.paced_chunks(response["content"]):
+                yield event("content_block_delta", {"index": 0, "delta": {"type": "text_delta", "text": text}})
+            yield event("content_block_stop", {"index": 0})
+            yield event("message_delta", {
+                "delta": {"stop_reason": stop_reason, "stop_sequence": None},
+                "usage": {"output_tokens": output_tokens},
+            })
+            yield event("message_stop", {})
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/health")
+    async def health():
+        """Health check / 健康检查"""
+        return {"status": "ok", "model": provider.model}
+
+    return app
+
+
+def _provider_from_config(**overrides: Any) -> SimulatedProvider:
+    """SimulatedProvider from llm.providers.simulated plus overrides / 按配置与覆盖项构建模拟提供商"""
+    options = dict(config.get("llm", {}).get("providers", {}).get("simulated", {}) or {})
+    options.update({k: v for k, v in overrides.items() if v is not None})
+    return SimulatedProvider.from_config(options)
+
+
+def _text(content: Any) -> str:
+    """Flatten string or content-block message content / 展平字符串或内容块形式的消息内容"""
+    if isinstance(content, list):
+        return "\n".join(
+            block.get("text", "") for block in content
+            if isinstance(block, dict) and block.get("type") == "text"
+        )
+    return content or ""
+
+
+def _injected_error(provider: SimulatedProvider, api: str) -> Optional[JSONResponse]:
+    """Injected failure as an API error response / 以 API 错误响应返回注入的故障"""
+    try:
+        provider.inject_failure()
+    except SimulatedRateLimitError as e:
+        kind = "rate_limit_error"
+        status, message = 429, str(e)
+        headers = {"retry-after": e.response.headers["retry-after"]}
+    except SimulatedProviderError as e:
+        kind = "api_error"
+        status, message, headers = 500, str(e), {}
+    else:
+        return None
+
+    if api == "anthropic":
+        body = {"type": "error", "error": {"type": kind, "message": message}}
+    else:
+        body = {"error": {"message": message, "type": kind, "code": None}}
+    return JSONResponse(body, status_code=status, headers=headers)
+
+
+async def _first_token(provider: SimulatedProvider) -> None:
+    """Wait for the simulated time to first token / 等待模拟的首token时间"""
+    await asyncio.sleep(provider.first_token_delay())
+
+
+async def _generate(provider: SimulatedProvider, response: Dict[str, Any]) -> None:
+    """Wait for a full non-streamed generation / 等待完整的非流式生成"""
+    await _first_token(provider)
+    await asyncio.sleep(response["usage"]["completion_tokens"] / provider.tokens_per_second)
+
+
+def main() -> None:
+    """Run the stub server / 运行桩服务器"""
+    parser = argparse.ArgumentParser(description="NOVIX OpenAI/Anthropic-compatible LLM stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttft", type=float, help="seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float)
+    parser.add_argument("--output-tokens", type=int)
+    parser.add_argument("--error-rate", type=float)
+    parser.add_argument("--rate-limit-rate", type=float)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    provider = _provider_from_config(
+        ttft=args.ttft,
+        tokens_per_second=args.tokens_per_second,
+        output_tokens=args.output_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed,
+    )
+
+    import uvicorn
+    uvicorn.run(create_stub_app(provider), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
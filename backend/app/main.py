@@ -3,6 +3,7 @@ NOVIX FastAPI Application Entry Point
 FastAPI 应用入口
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
@@ -12,16 +13,29 @@ from app.routers import (
     canon_router,
     drafts_router,
     session_router,
+    sessions_router,
+    jobs_router,
     config_router
 )
 from app.routers.websocket import router as websocket_router
+from app.llm_gateway import close_http_clients
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application lifespan / 应用生命周期"""
+    yield
+    # Close pooled provider connections on shutdown / 关闭时释放提供商连接池
+    await close_http_clients()
+
 
 # Create FastAPI application / 创建 FastAPI 应用
 app = FastAPI(
     title="NOVIX API",
     description="Multi-Agent Novel Writing System / 多智能体小说写作系统",
     version="0.1.0",
-    debug=settings.debug
+    debug=settings.debug,
+    lifespan=lifespan
 )
 
 # Configure CORS / 配置跨域
@@ -39,6 +53,8 @@ app.include_router(cards_router)
 app.include_router(canon_router)
 app.include_router(drafts_router)
 app.include_router(session_router)
+app.include_router(sessions_router)
+app.include_router(jobs_router)
 app.include_router(config_router)
 app.include_router(websocket_router)
 
@@ -5,5 +5,16 @@ Coordinates multi-agent workflow for chapter writing
 """
 
 from .orchestrator import Orchestrator
+from .session_manager import SessionManager
+from .job_queue import JobQueue, Job, JobStatus, JobQueueFull
+from .stage_policy import StagePolicy
 
-__all__ = ["Orchestrator"]
+__all__ = [
+    "Orchestrator",
+    "SessionManager",
+    "JobQueue",
+    "Job",
+    "JobStatus",
+    "JobQueueFull",
+    "StagePolicy",
+]
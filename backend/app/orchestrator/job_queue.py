@@ -0,0 +1,373 @@
+"""
+Job Queue / 任务队列
+Background jobs for session work, run by a bounded asyncio worker pool
+会话工作的后台任务，由有界的 asyncio 工作协程池执行
+"""
+
+import asyncio
+import itertools
+import time
+import uuid
+from typing import Dict, Any, Optional, Callable, Awaitable, List
+from app.config import config
+
+
+class JobStatus:
+    """Job status values / 任务状态取值"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobQueueFull(Exception):
+    """The queue already holds session.jobs.max_queue jobs / 队列已达 session.jobs.max_queue 上限"""
+
+
+class Job:
+    """
+    One unit of background work and its outcome
+    一项后台工作及其结果
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        project_id: str,
+        chapter: Optional[str],
+        priority: int,
+        work: Callable[[], Awaitable[Dict[str, Any]]],
+        key: Optional[str] = None
+    ):
+        """
+        Initialize a queued job
+
+        Args:
+            kind: Job kind (start, feedback, finalize, resume) / 任务类型
+            project_id: Project ID / 项目ID
+            chapter: Chapter ID / 章节ID
+            priority: Lower runs first / 数值越小越先运行
+            work: Factory of the coroutine to run / 待运行协程的工厂函数
+            key: Idempotency key; duplicates join the unfinished job / 幂等键；重复提交并入未结束的任务
+        """
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.kind = kind
+        self.project_id = project_id
+        self.chapter = chapter
+        self.priority = priority
+        self.work = work
+        self.status = JobStatus.QUEUED
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_requested = False
+        self.done = asyncio.Event()
+
+    def is_finished(self) -> bool:
+        """Whether the job has reached a final status / 任务是否已结束"""
+        return self.status in JobStatus.FINISHED
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        """
+        Job as a response dict / 转为响应字典
+
+        Args:
+            include_result: Include the work result / 是否包含工作结果
+
+        Returns:
+            Job dict / 任务字典
+        """
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "project_id": self.project_id,
+            "chapter": self.chapter,
+            "priority": self.priority,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if include_result:
+            data["result"] = self.result
+        return data
+
+
+class JobQueue:
+    """
+    Priority queue of session jobs drained by a fixed number of workers
+    由固定数量工作协程消费的会话任务优先级队列
+
+    Jobs of equal priority run in submission order. Workers start with the
+    first job; running sessions still take a SessionManager slot, so the
+    pool bounds requests in progress while the slots bound LLM stages.
+    Finished jobs are kept for session.jobs.retention_seconds.
+    相同优先级的任务按提交顺序运行。工作协程在首个任务提交时启动；运行中的会话仍需
+    占用 SessionManager 槽位，因此工作池限制进行中的请求数，而槽位限制大模型阶段数。
+    已结束的任务保留 session.jobs.retention_seconds 秒。
+    """
+
+    def __init__(
+        self,
+        notify: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+    ):
+        """
+        Initialize queue from session.jobs config
+
+        Args:
+            notify: Awaited with a job event on every status change / 每次状态变化时以任务事件调用
+        """
+        self.notify = notify
+
+        jobs_config = config.get("session", {}).get("jobs", {}) or {}
+        self.worker_count = max(1, int(jobs_config.get("workers", 8)))
+        self.max_queue = int(jobs_config.get("max_queue", 100))
+        self.retention = jobs_config.get("retention_seconds", 3600)
+        self.priorities: Dict[str, int] = {
+            "feedback": 0,
+            "finalize": 0,
+            "resume": 5,
+            "start": 10,
+            **(jobs_config.get("priorities") or {}),
+        }
+
+        self.jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._workers: List[asyncio.Task] = []
+        self._sequence = itertools.count()
+        self.busy = 0
+        self.counts = {status: 0 for status in JobStatus.FINISHED}
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.started = 0
+
+    def submit(
+        self,
+        kind: str,
+        project_id: str,
+        chapter: Optional[str],
+        work: Callable[[], Awaitable[Dict[str, Any]]],
+        priority: Optional[int] = None,
+        key: Optional[str] = None
+    ) -> Job:
+        """
+        Queue a job / 将任务加入队列
+
+        A job whose key matches a queued or running job is not queued again:
+        the existing job is returned, so a double submit neither repeats the
+        LLM work nor supersedes the session already running it.
+        键与排队中或运行中任务相同的任务不会再次入队，而是返回已有任务；
+        重复提交既不会重复大模型工作，也不会取代正在运行的会话。
+
+        Args:
+            kind: Job kind (start, feedback, finalize, resume) / 任务类型
+            project_id: Project ID / 项目ID
+            chapter: Chapter ID / 章节ID
+            work: Factory of the coroutine to run / 待运行协程的工厂函数
+            priority: Overrides session.jobs.priorities / 覆盖 session.jobs.priorities
+            key: Idempotency key / 幂等键
+
+        Returns:
+            The queued job, or the unfinished job with the same key / 已入队的任务，或键相同的未结束任务
+
+        Raises:
+            JobQueueFull: If max_queue jobs are already waiting / 等待中的任务已达 max_queue
+        """
+        self._prune()
+        self._ensure_workers()
+
+        if key:
+            for existing in self.jobs.values():
+                if existing.key == key and not existing.is_finished() and not existing.cancel_requested:
+                    print(f"[JobQueue] Coalesced duplicate {kind} job for {project_id}/{chapter} onto {existing.id}")
+                    return existing
+
+        if self.max_queue and self.depth() >= self.max_queue:
+            raise JobQueueFull(f"Job queue is full ({self.max_queue} jobs waiting)")
+
+        if priority is None:
+            priority = self.priorities.get(kind, 10)
+        job = Job(kind, project_id, chapter, priority, work, key=key)
+        self.jobs[job.id] = job
+        self._queue.put_nowait((job.priority, next(self._sequence), job.id))
+        print(f"[JobQueue] Queued {kind} job {job.id} for {project_id}/{chapter} (depth {self.depth()})")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Job by ID / 按ID获取任务"""
+        return self.jobs.get(job_id)
+
+    def cancel(self, project_id: str, chapter: Optional[str] = None) -> int:
+        """
+        Cancel the unfinished jobs of a project, or of one chapter
+        取消项目（或某一章节）未结束的任务
+
+        Queued jobs are dropped. Running jobs are only marked: their session
+        is aborted by SessionManager.cancel, and the job then ends as cancelled.
+        排队中的任务直接丢弃；运行中的任务仅做标记：其会话由 SessionManager.cancel
+        中止，之后任务以已取消状态结束。
+
+        Args:
+            project_id: Project ID / 项目ID
+            chapter: Only this chapter / 仅此章节
+
+        Returns:
+            Number of jobs cancelled / 被取消的任务数
+        """
+        cancelled = 0
+        for job in list(self.jobs.values()):
+            if job.project_id != project_id or (chapter and job.chapter != chapter):
+                continue
+            if job.status == JobStatus.QUEUED:
+                self._finish(job, JobStatus.CANCELLED, error="Job cancelled")
+                cancelled += 1
+            elif job.status == JobStatus.RUNNING:
+                job.cancel_requested = True
+                cancelled += 1
+        return cancelled
+
+    def depth(self) -> int:
+        """Jobs waiting for a worker / 等待工作协程的任务数"""
+        return sum(1 for job in self.jobs.values() if job.status == JobStatus.QUEUED)
+
+    def list_jobs(self, project_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Jobs, newest first, with the queue metrics / 任务列表（最新在前）及队列指标
+
+        Args:
+            project_id: Only jobs of this project / 仅此项目的任务
+
+        Returns:
+            Listing dict / 列表字典
+        """
+        self._prune()
+        jobs = [
+            job.to_dict(include_result=False)
+            for job in self.jobs.values()
+            if project_id is None or job.project_id == project_id
+        ]
+        jobs.sort(key=lambda j: j["created_at"], reverse=True)
+        return {"jobs": jobs, "metrics": self.stats()}
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Queue depth, worker usage and outcome counts / 队列深度、工作协程使用情况与结果计数
+
+        Returns:
+            Metrics dict / 指标字典
+        """
+        depth_by_kind: Dict[str, int] = {}
+        for job in self.jobs.values():
+            if job.status == JobStatus.QUEUED:
+                depth_by_kind[job.kind] = depth_by_kind.get(job.kind, 0) + 1
+        return {
+            "workers": self.worker_count,
+            "busy": self.busy,
+            "queue_depth": sum(depth_by_kind.values()),
+            "queue_depth_by_kind": depth_by_kind,
+            "max_queue": self.max_queue,
+            **self.counts,
+            "avg_wait_seconds": round(self.total_wait / self.started, 3) if self.started else 0.0,
+            "max_wait_seconds": round(self.max_wait, 3),
+        }
+
+    def _ensure_workers(self) -> None:
+        """
+        Start the workers on the running event loop / 在当前事件循环上启动工作协程
+
+        A new loop (e.g. after a test client restart) gets a fresh queue
+        holding the jobs still queued.
+        新的事件循环（如测试客户端重启后）会获得新队列，并带上仍在排队的任务。
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._workers:
+            return
+
+        self._loop = loop
+        self._queue = asyncio.PriorityQueue()
+        for job in self.jobs.values():
+            if job.status == JobStatus.QUEUED:
+                self._queue.put_nowait((job.priority, next(self._sequence), job.id))
+        self._workers = [
+            loop.create_task(self._worker(index)) for index in range(self.worker_count)
+        ]
+        print(f"[JobQueue] Started {self.worker_count} workers")
+
+    async def _worker(self, index: int) -> None:
+        """Run queued jobs one at a time / 逐个运行排队的任务"""
+        queue = self._queue
+        while True:
+            _priority, _sequence, job_id = await queue.get()
+            job = self.jobs.get(job_id)
+            if job is None or job.status != JobStatus.QUEUED:
+                continue  # cancelled while queued / 排队期间已被取消
+
+            job.status = JobStatus.RUNNING
+            job.started_at = time.time()
+            wait = job.started_at - job.created_at
+            self.started += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.busy += 1
+            await self._notify(job)
+
+            try:
+                result = await job.work()
+            except asyncio.CancelledError:
+                self._finish(job, JobStatus.CANCELLED, error="Job cancelled")
+                self.busy -= 1
+                raise
+            except Exception as e:
+                print(f"[JobQueue] Worker {index}: {job.kind} job {job.id} failed: {e}")
+                self._finish(job, JobStatus.FAILED, error=str(e) or type(e).__name__)
+            else:
+                if job.cancel_requested:
+                    self._finish(job, JobStatus.CANCELLED, result=result, error="Job cancelled")
+                elif isinstance(result, dict) and result.get("success") is False:
+                    self._finish(job, JobStatus.FAILED, result=result, error=result.get("error"))
+                else:
+                    self._finish(job, JobStatus.SUCCEEDED, result=result)
+            self.busy -= 1
+            await self._notify(job)
+
+    def _finish(
+        self,
+        job: Job,
+        status: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ) -> None:
+        """Record the final status of a job / 记录任务的最终状态"""
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        job.work = None
+        self.counts[status] += 1
+        job.done.set()
+
+    async def _notify(self, job: Job) -> None:
+        """Send a job event to the notify callback / 将任务事件发送给通知回调"""
+        if not self.notify:
+            return
+        try:
+            await self.notify({"type": "job", **job.to_dict(include_result=False)})
+        except Exception as e:
+            print(f"[JobQueue] Notify failed: {e}")
+
+    def _prune(self) -> None:
+        """Drop finished jobs older than the retention / 移除超过保留期的已结束任务"""
+        if not self.retention:
+            return
+        cutoff = time.time() - self.retention
+        for job_id, job in list(self.jobs.items()):
+            if job.is_finished() and job.finished_at < cutoff:
+                del self.jobs[job_id]
@@ -4,12 +4,19 @@ Coordinates the multi-agent writing workflow
 协调多智能体写作工作流
 """
 
-from typing import Dict, Any, Optional, Callable
+import asyncio
+import hashlib
+import json
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Callable, Awaitable, Iterator, Coroutine, AsyncContextManager
 from enum import Enum
-from app.llm_gateway import LLMGateway, get_gateway
-from app.storage import CardStorage, CanonStorage, DraftStorage
+from app.config import config
+from app.llm_gateway import LLMGateway, get_gateway, usage_scope, deadline_scope, DeadlineExceeded
+from app.storage import CardStorage, CanonStorage, DraftStorage, SessionStateStorage
 from app.agents import ArchivistAgent, WriterAgent, ReviewerAgent, EditorAgent
-from app.context_engine import ContextSelector
+from app.context_engine import ContextSelector, ContextSnapshot, ContextCompressor
+from app.orchestrator.stage_policy import StagePolicy
 
 
 class SessionStatus(str, Enum):
@@ -20,10 +27,29 @@ class SessionStatus(str, Enum):
     REVIEWING = "reviewing"
     EDITING = "editing"
     WAITING_FEEDBACK = "waiting_feedback"
+    QUEUED = "queued"
     COMPLETED = "completed"
     ERROR = "error"
 
 
+# Session inputs stored in checkpoints / 存入检查点的会话输入
+CHECKPOINT_INPUTS = ("chapter_title", "chapter_goal", "target_word_count", "character_names")
+
+
+def _fingerprint(*parts: Any) -> str:
+    """
+    Stable hash of stage inputs / 阶段输入的稳定哈希
+    
+    Args:
+        parts: JSON-serializable inputs / 可 JSON 序列化的输入
+        
+    Returns:
+        Hex digest / 十六进制摘要
+    """
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
 class Orchestrator:
     """
     Orchestrates the multi-agent writing workflow
@@ -33,19 +59,34 @@ class Orchestrator:
     def __init__(
         self,
         data_dir: str = "../data",
-        progress_callback: Optional[Callable] = None
+        progress_callback: Optional[Callable] = None,
+        card_storage: Optional[CardStorage] = None,
+        canon_storage: Optional[CanonStorage] = None,
+        draft_storage: Optional[DraftStorage] = None,
+        context_selector: Optional[ContextSelector] = None,
+        session_state_storage: Optional[SessionStateStorage] = None
     ):
         """
         Initialize orchestrator
         
+        Storage and the context selector can be shared between sessions
+        (see SessionManager); missing ones are created here.
+        存储与上下文选择器可在会话之间共享（见 SessionManager）；未传入的在此创建。
+        
         Args:
             data_dir: Data directory path / 数据目录路径
             progress_callback: Optional callback for progress updates / 可选的进度更新回调
+            card_storage: Shared card storage / 共享的卡片存储
+            canon_storage: Shared canon storage / 共享的事实表存储
+            draft_storage: Shared draft storage / 共享的草稿存储
+            context_selector: Shared context selector / 共享的上下文选择器
+            session_state_storage: Shared checkpoint storage / 共享的检查点存储
         """
         # Initialize storage / 初始化存储
-        self.card_storage = CardStorage(data_dir)
-        self.canon_storage = CanonStorage(data_dir)
-        self.draft_storage = DraftStorage(data_dir)
+        self.card_storage = card_storage or CardStorage(data_dir)
+        self.canon_storage = canon_storage or CanonStorage(data_dir)
+        self.draft_storage = draft_storage or DraftStorage(data_dir)
+        self.session_state_storage = session_state_storage or SessionStateStorage(data_dir)
         
         # Initialize LLM gateway / 初始化大模型网关
         self.gateway = get_gateway()
@@ -77,10 +118,11 @@ class Orchestrator:
         )
         
         # Initialize context engine / 初始化上下文引擎
-        self.context_selector = ContextSelector(
+        self.context_selector = context_selector or ContextSelector(
             self.card_storage,
             self.canon_storage,
-            self.draft_storage
+            self.draft_storage,
+            compressor=ContextCompressor(self.gateway)
         )
         
         # Progress callback / 进度回调
@@ -92,6 +134,56 @@ class Orchestrator:
         self.current_chapter: Optional[str] = None
         self.iteration_count = 0
         self.max_iterations = 5
+        
+        # Inputs of the current session, used to rebuild the context snapshot
+        # 当前会话的输入，用于重建上下文快照
+        self.session_inputs: Dict[str, Any] = {}
+        
+        # Checkpoint of the current round, saved after every stage so that
+        # resume_session() only redoes the interrupted stage
+        # 当前轮次的检查点，每个阶段后保存，使 resume_session() 只需重做被中断的阶段
+        self.checkpoint: Dict[str, Any] = {}
+        self.resumed_stages: list = []
+        self._checkpoint_lock = asyncio.Lock()
+        
+        # Summary and canon updates of the last finalized chapter, run after
+        # the confirm response / 上次定稿章节的摘要与事实表更新，在确认响应之后运行
+        self.post_processing_task: Optional[asyncio.Task] = None
+        
+        # Task running the current session or feedback round; cancelled by cancel_session()
+        # 运行当前会话或反馈轮次的任务；由 cancel_session() 取消
+        self.session_task: Optional[asyncio.Task] = None
+        self._cancelled_tasks: set = set()
+        self.last_active = time.time()
+        
+        # Running slot provider set by SessionManager: (project_id, on_wait) -> async context
+        # 由 SessionManager 设置的运行槽位提供者：(project_id, on_wait) -> 异步上下文
+        self.concurrency_slot: Optional[Callable[..., AsyncContextManager]] = None
+        
+        # Seconds per stage (brief, draft, review, edit, finalize); LLM calls still
+        # running when a stage's deadline passes are cancelled
+        # 每个阶段的秒数（brief、draft、review、edit、finalize）；阶段截止时仍在进行的大模型调用会被取消
+        self.stage_timeouts: Dict[str, float] = config.get("session", {}).get("stage_timeouts", {}) or {}
+        
+        # Decides whether optional stages run; skipped ones are listed in results
+        # 决定可选阶段是否运行；被跳过的阶段列在结果中
+        self.stage_policy = StagePolicy()
+        self.skipped_stages: list = []
+    
+    def set_gateway(self, gateway: LLMGateway) -> None:
+        """
+        Use a new gateway for the following LLM calls (e.g. after an LLM config reload)
+        后续大模型调用改用新的网关（如重新加载大模型配置后）
+        
+        Calls already in flight finish on the previous gateway.
+        已在进行的调用仍在旧网关上完成。
+        
+        Args:
+            gateway: LLM gateway instance / 大模型网关实例
+        """
+        self.gateway = gateway
+        for agent in (self.archivist, self.writer, self.reviewer, self.editor):
+            agent.gateway = gateway
     
     async def start_session(
         self,
@@ -117,127 +209,184 @@ class Orchestrator:
         Returns:
             Session result / 会话结果
         """
-        self.current_project_id = project_id
-        self.current_chapter = chapter
-        self.iteration_count = 0
+        return await self._run_session_task(self._start_session(
+            project_id,
+            chapter,
+            chapter_title,
+            chapter_goal,
+            target_word_count,
+            character_names
+        ))
+    
+    async def _start_session(
+        self,
+        project_id: str,
+        chapter: str,
+        chapter_title: str,
+        chapter_goal: str,
+        target_word_count: int,
+        character_names: Optional[list],
+        resume: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Body of start_session(), run as the session task / start_session() 的主体，作为会话任务运行
         
-        try:
-            # Step 1: Archivist generates scene brief / 步骤1：资料管理员生成场景简报
-            await self._update_status(SessionStatus.GENERATING_BRIEF, "资料管理员正在整理设定...")
-            
-            archivist_result = await self.archivist.execute(
-                project_id=project_id,
-                chapter=chapter,
-                context={
-                    "chapter_title": chapter_title,
-                    "chapter_goal": chapter_goal,
-                    "characters": character_names or []
-                }
-            )
-            
-            if not archivist_result["success"]:
-                return await self._handle_error("Scene brief generation failed")
-            
-            scene_brief = archivist_result["scene_brief"]
-
-            style_card = await self.card_storage.get_style_card(project_id)
-            rules_card = await self.card_storage.get_rules_card(project_id)
-
-            if character_names:
-                _character_names = character_names
-            else:
-                _character_names = await self.card_storage.list_character_cards(project_id)
-
-            character_cards = []
-            for name in _character_names:
-                card = await self.card_storage.get_character_card(project_id, name)
-                if card:
-                    character_cards.append(card)
-
-            world_card_names = await self.card_storage.list_world_cards(project_id)
-            world_cards = []
-            for name in world_card_names:
-                card = await self.card_storage.get_world_card(project_id, name)
-                if card:
-                    world_cards.append(card)
-
-            facts = await self.canon_storage.get_all_facts(project_id)
-            timeline = await self.canon_storage.get_all_timeline_events(project_id)
-            character_states = await self.canon_storage.get_all_character_states(project_id)
-            
-            # Step 2: Writer generates draft / 步骤2：撰稿人生成草稿
-            await self._update_status(SessionStatus.WRITING_DRAFT, "撰稿人正在撰写草稿...")
+        A new session starts a new checkpoint round; with resume, stages of
+        the current round whose inputs are unchanged are skipped.
+        新会话开始新的检查点轮次；resume 时跳过当前轮次中输入未变的阶段。
+        """
+        with usage_scope(project_id, chapter):
+            self.current_project_id = project_id
+            self.current_chapter = chapter
+            self.iteration_count = 0
+            self.resumed_stages = []
+            self.skipped_stages = []
+            self.session_inputs = {
+                "project_id": project_id,
+                "chapter": chapter,
+                "chapter_title": chapter_title,
+                "chapter_goal": chapter_goal,
+                "target_word_count": target_word_count,
+                "character_names": character_names,
+            }
             
-            writer_result = await self.writer.execute(
-                project_id=project_id,
-                chapter=chapter,
-                context={
+            try:
+                if not resume:
+                    await self._begin_round({"kind": "start", "iteration": 0})
+                
+                # Cards and canon are loaded once and shared by all agents;
+                # cards are restricted to mentioned entities plus explicit ones
+                # 卡片与事实表只加载一次并由所有 Agent 共享；
+                # 卡片仅限被提及的实体与显式指定的角色
+                snapshot = await self._build_snapshot(project_id, chapter)
+                
+                # Step 1: Archivist generates scene brief / 步骤1：资料管理员生成场景简报
+                brief_hash = _fingerprint(chapter_title, chapter_goal, character_names, snapshot.sources_fingerprint)
+                scene_brief = await self._resume_stage(
+                    "brief", brief_hash,
+                    lambda artifacts: self.draft_storage.get_scene_brief(project_id, chapter)
+                )
+                if scene_brief is None:
+                    await self._update_status(SessionStatus.GENERATING_BRIEF, "资料管理员正在整理设定...")
+                    
+                    with self._stage("brief"):
+                        archivist_result = await self.archivist.execute(
+                            project_id=project_id,
+                            chapter=chapter,
+                            context={
+                                "chapter_title": chapter_title,
+                                "chapter_goal": chapter_goal,
+                                "characters": [c.name for c in snapshot.character_cards],
+                                "snapshot": snapshot
+                            }
+                        )
+                    
+                    if not archivist_result["success"]:
+                        return await self._handle_error("Scene brief generation failed")
+                    
+                    scene_brief = archivist_result["scene_brief"]
+                    await self._record_stage("brief", brief_hash, {"scene_brief": chapter})
+                
+                # Step 2: Writer generates draft / 步骤2：撰稿人生成草稿
+                draft_hash = _fingerprint(brief_hash, target_word_count, scene_brief.model_dump(mode="json"))
+                draft = await self._resume_stage(
+                    "draft", draft_hash,
+                    lambda artifacts: self.draft_storage.get_draft(project_id, chapter, artifacts.get("draft", "v1"))
+                )
+                if draft is None:
+                    await self._update_status(SessionStatus.WRITING_DRAFT, "撰稿人正在撰写草稿...")
+                    
+                    with self._stage("draft"):
+                        writer_result = await self.writer.execute(
+                            project_id=project_id,
+                            chapter=chapter,
+                            context={
+                                "scene_brief": scene_brief,
+                                "chapter_goal": chapter_goal,
+                                "target_word_count": target_word_count,
+                                "snapshot": snapshot,
+                                "on_delta": self._delta_forwarder("writer", "v1")
+                            }
+                        )
+                    
+                    if not writer_result["success"]:
+                        return await self._handle_error("Draft generation failed")
+                    
+                    draft = writer_result["draft"]
+                    await self._record_stage("draft", draft_hash, {"draft": draft.version})
+                
+                # Step 3: Reviewer reviews draft / 步骤3：审稿人审核草稿
+                review_hash = _fingerprint(draft_hash, draft.content)
+                review = await self._resume_stage(
+                    "review", review_hash,
+                    lambda artifacts: self.draft_storage.get_review(project_id, chapter)
+                )
+                if review is None:
+                    await self._update_status(SessionStatus.REVIEWING, "审稿人正在审核草稿...")
+                    
+                    with self._stage("review"):
+                        reviewer_result = await self.reviewer.execute(
+                            project_id=project_id,
+                            chapter=chapter,
+                            context={
+                                "draft_version": "v1",
+                                "snapshot": snapshot
+                            }
+                        )
+                    
+                    if not reviewer_result["success"]:
+                        return await self._handle_error("Review failed")
+                    
+                    review = reviewer_result["review"]
+                    await self._record_stage("review", review_hash, {"review": draft.version})
+                
+                # Step 4: Editor revises draft / 步骤4：编辑修订草稿
+                edit_hash = _fingerprint(review_hash, review.model_dump(mode="json"))
+                revised_draft = await self._resume_stage(
+                    "edit", edit_hash,
+                    lambda artifacts: self.draft_storage.get_draft(project_id, chapter, artifacts.get("draft", "v2"))
+                )
+                if revised_draft is None:
+                    revised_draft = await self._skip_by_policy("edit", edit_hash, draft, review=review)
+                if revised_draft is None:
+                    await self._update_status(SessionStatus.EDITING, "编辑正在修订草稿...")
+                    
+                    with self._stage("edit"):
+                        editor_result = await self.editor.execute(
+                            project_id=project_id,
+                            chapter=chapter,
+                            context={
+                                "draft_version": "v1",
+                                "user_feedback": "",
+                                "snapshot": snapshot,
+                                "on_delta": self._delta_forwarder("editor", "v1")
+                            }
+                        )
+                    
+                    if not editor_result["success"]:
+                        return await self._handle_error("Editing failed")
+                    
+                    revised_draft = editor_result["draft"]
+                    await self._record_stage("edit", edit_hash, {"draft": editor_result["version"]})
+                
+                # Step 5: Wait for user feedback / 步骤5：等待用户反馈
+                await self._finish_round(SessionStatus.WAITING_FEEDBACK)
+                await self._update_status(SessionStatus.WAITING_FEEDBACK, "等待用户反馈...")
+                
+                return {
+                    "success": True,
+                    "status": SessionStatus.WAITING_FEEDBACK,
                     "scene_brief": scene_brief,
-                    "chapter_goal": chapter_goal,
-                    "target_word_count": target_word_count,
-                    "style_card": style_card,
-                    "rules_card": rules_card,
-                    "character_cards": character_cards,
-                    "world_cards": world_cards,
-                    "facts": facts,
-                    "timeline": timeline,
-                    "character_states": character_states,
+                    "draft_v1": draft,
+                    "review": review,
+                    "draft_v2": revised_draft,
+                    "iteration": self.iteration_count,
+                    "resumed_stages": self.resumed_stages,
+                    "skipped_stages": self.skipped_stages
                 }
-            )
-            
-            if not writer_result["success"]:
-                return await self._handle_error("Draft generation failed")
-            
-            draft = writer_result["draft"]
-            
-            # Step 3: Reviewer reviews draft / 步骤3：审稿人审核草稿
-            await self._update_status(SessionStatus.REVIEWING, "审稿人正在审核草稿...")
-            
-            reviewer_result = await self.reviewer.execute(
-                project_id=project_id,
-                chapter=chapter,
-                context={
-                    "draft_version": "v1"
-                }
-            )
-            
-            if not reviewer_result["success"]:
-                return await self._handle_error("Review failed")
-            
-            review = reviewer_result["review"]
-            
-            # Step 4: Editor revises draft / 步骤4：编辑修订草稿
-            await self._update_status(SessionStatus.EDITING, "编辑正在修订草稿...")
-            
-            editor_result = await self.editor.execute(
-                project_id=project_id,
-                chapter=chapter,
-                context={
-                    "draft_version": "v1",
-                    "user_feedback": ""
-                }
-            )
-            
-            if not editor_result["success"]:
-                return await self._handle_error("Editing failed")
-            
-            revised_draft = editor_result["draft"]
-            
-            # Step 5: Wait for user feedback / 步骤5：等待用户反馈
-            await self._update_status(SessionStatus.WAITING_FEEDBACK, "等待用户反馈...")
-            
-            return {
-                "success": True,
-                "status": SessionStatus.WAITING_FEEDBACK,
-                "scene_brief": scene_brief,
-                "draft_v1": draft,
-                "review": review,
-                "draft_v2": revised_draft,
-                "iteration": self.iteration_count
-            }
-            
-        except Exception as e:
-            return await self._handle_error(f"Session error: {str(e)}")
+                
+            except Exception as e:
+                return await self._handle_error(f"Session error: {str(e)}")
     
     async def process_feedback(
         self,
@@ -259,64 +408,563 @@ class Orchestrator:
         Returns:
             Result / 结果
         """
-        if action == "confirm":
-            # User is satisfied, finalize the chapter / 用户满意，完成章节
-            return await self._finalize_chapter(project_id, chapter)
+        return await self._run_session_task(
+            self._process_feedback(project_id, chapter, feedback, action)
+        )
+    
+    async def _process_feedback(
+        self,
+        project_id: str,
+        chapter: str,
+        feedback: str,
+        action: str,
+        resume: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Body of process_feedback(), run as the session task / process_feedback() 的主体，作为会话任务运行
+        
+        With resume, the interrupted round is picked up from the checkpoint
+        instead of starting a new iteration.
+        resume 时从检查点接续被中断的轮次，而不是开始新的迭代。
+        """
+        with usage_scope(project_id, chapter):
+            await self._load_checkpoint(project_id, chapter)
+            self.resumed_stages = []
+            self.skipped_stages = []
+            
+            if action == "confirm":
+                # User is satisfied, finalize the chapter / 用户满意，完成章节
+                if not resume:
+                    await self._begin_round({"kind": "finalize", "iteration": self.iteration_count})
+                with self._stage("finalize"):
+                    result = await self._finalize_chapter(project_id, chapter)
+                # Spawned outside the finalize stage, which has returned by then
+                # 在 finalize 阶段之外启动，此时该阶段已经结束
+                if result.get("success"):
+                    await self._start_post_processing(project_id, chapter, result["final_draft"].content)
+                return result
+            
+            if resume:
+                self.iteration_count = self.checkpoint["round"]["iteration"]
+            else:
+                # User wants revisions / 用户要求修订
+                self.iteration_count += 1
+            
+            if self.iteration_count >= self.max_iterations:
+                return {
+                    "success": False,
+                    "error": "Maximum iterations reached",
+                    "message": "已达到最大迭代次数，建议确认当前版本或手动编辑"
+                }
+            
+            try:
+                if resume:
+                    latest_version = self.checkpoint["round"]["base_version"]
+                else:
+                    # Get latest draft version / 获取最新草稿版本
+                    versions = await self.draft_storage.list_draft_versions(project_id, chapter)
+                    latest_version = versions[-1] if versions else "v1"
+                    await self._begin_round({
+                        "kind": "feedback",
+                        "iteration": self.iteration_count,
+                        "feedback": feedback,
+                        "base_version": latest_version
+                    })
+                
+                # Fresh snapshot for this iteration / 为本次迭代构建新快照
+                snapshot = await self._build_snapshot(project_id, chapter)
+                base_draft = await self.draft_storage.get_draft(project_id, chapter, latest_version)
+                
+                # Re-review with feedback; reviewer and editor only look at what
+                # changed since the previous iteration
+                # 带反馈重新审核；审稿人与编辑只处理上次迭代以来的改动
+                review_hash = _fingerprint(
+                    self.iteration_count,
+                    latest_version,
+                    base_draft.content if base_draft else None,
+                    snapshot.sources_fingerprint
+                )
+                review = await self._resume_stage(
+                    "review", review_hash,
+                    lambda artifacts: self.draft_storage.get_review(project_id, chapter)
+                )
+                if review is None:
+                    await self._update_status(SessionStatus.REVIEWING, "根据反馈重新审核...")
+                    
+                    with self._stage("review"):
+                        reviewer_result = await self.reviewer.execute(
+                            project_id=project_id,
+                            chapter=chapter,
+                            context={
+                                "draft_version": latest_version,
+                                "snapshot": snapshot,
+                                "incremental": True
+                            }
+                        )
+                    
+                    review = reviewer_result.get("review")
+                    if reviewer_result["success"]:
+                        await self._record_stage("review", review_hash, {"review": latest_version})
+                
+                # Edit with user feedback / 根据用户反馈编辑
+                edit_hash = _fingerprint(review_hash, feedback, review.model_dump(mode="json") if review else None)
+                revised_draft = await self._resume_stage(
+                    "edit", edit_hash,
+                    lambda artifacts: self.draft_storage.get_draft(project_id, chapter, artifacts.get("draft", ""))
+                )
+                if revised_draft is None and base_draft:
+                    revised_draft = await self._skip_by_policy(
+                        "edit", edit_hash, base_draft, review=review, user_feedback=feedback
+                    )
+                if revised_draft is None:
+                    await self._update_status(SessionStatus.EDITING, "根据反馈修订...")
+                    
+                    with self._stage("edit"):
+                        editor_result = await self.editor.execute(
+                            project_id=project_id,
+                            chapter=chapter,
+                            context={
+                                "draft_version": latest_version,
+                                "user_feedback": feedback,
+                                "snapshot": snapshot,
+                                "incremental": True,
+                                "on_delta": self._delta_forwarder("editor", latest_version)
+                            }
+                        )
+                    
+                    if not editor_result["success"]:
+                        return await self._handle_error("Revision failed")
+                    
+                    revised_draft = editor_result["draft"]
+                    await self._record_stage("edit", edit_hash, {"draft": editor_result["version"]})
+                
+                # Wait for feedback again / 再次等待反馈
+                await self._finish_round(SessionStatus.WAITING_FEEDBACK)
+                await self._update_status(SessionStatus.WAITING_FEEDBACK, "等待用户反馈...")
+                
+                return {
+                    "success": True,
+                    "status": SessionStatus.WAITING_FEEDBACK,
+                    "draft": revised_draft,
+                    "version": revised_draft.version,
+                    "iteration": self.iteration_count,
+                    "resumed_stages": self.resumed_stages,
+                    "skipped_stages": self.skipped_stages
+                }
+                
+            except Exception as e:
+                return await self._handle_error(f"Feedback processing error: {str(e)}")
+    
+    async def resume_session(self, project_id: str, chapter: str) -> Dict[str, Any]:
+        """
+        Resume the chapter's interrupted session from its checkpoint
+        从检查点恢复章节被中断的会话
         
-        # User wants revisions / 用户要求修订
-        self.iteration_count += 1
+        The round recorded in the checkpoint (start, feedback or finalize) is
+        run again; completed stages whose inputs are unchanged are skipped, so
+        only the interrupted stage is redone.
+        重新运行检查点中记录的轮次（start、feedback 或 finalize）；输入未变的已完成
+        阶段会被跳过，因此只需重做被中断的阶段。
         
-        if self.iteration_count >= self.max_iterations:
+        Args:
+            project_id: Project ID / 项目ID
+            chapter: Chapter ID / 章节ID
+            
+        Returns:
+            Result of the resumed round / 恢复轮次的结果
+        """
+        return await self._run_session_task(self._resume_session(project_id, chapter))
+    
+    async def _resume_session(self, project_id: str, chapter: str) -> Dict[str, Any]:
+        """Body of resume_session(), run as the session task / resume_session() 的主体，作为会话任务运行"""
+        self.current_project_id = project_id
+        self.current_chapter = chapter
+        checkpoint = await self._load_checkpoint(project_id, chapter)
+        round_info = checkpoint.get("round") or {}
+        kind = round_info.get("kind")
+        
+        if not checkpoint or kind not in ("start", "feedback", "finalize"):
             return {
                 "success": False,
-                "error": "Maximum iterations reached",
-                "message": "已达到最大迭代次数，建议确认当前版本或手动编辑"
+                "error": "No checkpoint to resume"
             }
         
-        try:
-            # Get latest draft version / 获取最新草稿版本
-            versions = await self.draft_storage.list_draft_versions(project_id, chapter)
-            latest_version = versions[-1] if versions else "v1"
-            
-            # Re-review with feedback / 带反馈重新审核
-            await self._update_status(SessionStatus.REVIEWING, "根据反馈重新审核...")
-            
-            reviewer_result = await self.reviewer.execute(
-                project_id=project_id,
-                chapter=chapter,
-                context={
-                    "draft_version": latest_version
-                }
+        if checkpoint.get("status") == SessionStatus.COMPLETED.value:
+            self.current_status = SessionStatus.COMPLETED
+            return {
+                "success": True,
+                "status": SessionStatus.COMPLETED,
+                "message": "Chapter already finalized"
+            }
+        
+        print(f"[Orchestrator] Resuming {kind} round of {project_id}/{chapter}")
+        if kind == "start":
+            inputs = checkpoint.get("inputs") or {}
+            return await self._start_session(
+                project_id,
+                chapter,
+                inputs.get("chapter_title", ""),
+                inputs.get("chapter_goal", ""),
+                inputs.get("target_word_count", 3000),
+                inputs.get("character_names"),
+                resume=True
+            )
+        if kind == "feedback":
+            return await self._process_feedback(
+                project_id, chapter, round_info.get("feedback", ""), "revise", resume=True
             )
+        return await self._process_feedback(project_id, chapter, "", "confirm", resume=True)
+    
+    async def _run_session_task(self, work: Coroutine[Any, Any, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Run session work as the orchestrator-owned session task
+        将会话工作作为调度器持有的会话任务运行
+        
+        A session still running is superseded and cancelled: the orchestrator
+        tracks a single current session. With a concurrency slot the work
+        first waits for a free running slot.
+        仍在运行的会话会被取代并取消：调度器只跟踪一个当前会话。设置了并发槽位时，
+        工作会先等待空闲的运行槽位。
+        
+        Args:
+            work: Session coroutine / 会话协程
             
-            # Edit with user feedback / 根据用户反馈编辑
-            await self._update_status(SessionStatus.EDITING, "根据反馈修订...")
+        Returns:
+            Its result, or a cancelled result after cancel_session()
+            其结果；cancel_session() 之后返回已取消的结果
+        """
+        previous = self.session_task
+        if previous and not previous.done():
+            print("[Orchestrator] Cancelling superseded session task")
+            self._cancelled_tasks.add(previous)
+            previous.cancel()
+        
+        self.last_active = time.time()
+        task = asyncio.ensure_future(self._within_slot(work))
+        self.session_task = task
+        try:
+            return await task
+        except asyncio.CancelledError:
+            # Only cancellations requested here become a result; the caller's own re-raises
+            # 只有此处发起的取消转为结果；调用方自身被取消时继续抛出
+            if task not in self._cancelled_tasks:
+                raise
+            return {
+                "success": False,
+                "status": SessionStatus.IDLE,
+                "error": "Session cancelled"
+            }
+        finally:
+            self._cancelled_tasks.discard(task)
+            if self.session_task is task:
+                self.session_task = None
+    
+    async def _within_slot(self, work: Coroutine[Any, Any, Dict[str, Any]]) -> Dict[str, Any]:
+        """Await work inside the concurrency slot, if any / 在并发槽位（如有）内等待工作完成"""
+        if self.concurrency_slot is None:
+            return await work
+        
+        async def on_wait() -> None:
+            await self._update_status(SessionStatus.QUEUED, "等待空闲的会话槽位...")
+        
+        try:
+            async with self.concurrency_slot(self.current_project_id, on_wait):
+                return await work
+        except asyncio.CancelledError:
+            # Cancelled before the slot was free / 在获得槽位前被取消
+            work.close()
+            raise
+    
+    def is_running(self) -> bool:
+        """Whether a session task is running / 是否有会话任务正在运行"""
+        return bool(self.session_task and not self.session_task.done())
+    
+    async def cancel_session(self, project_id: Optional[str] = None) -> bool:
+        """
+        Cancel the running session task and reset the session status
+        取消正在运行的会话任务并重置会话状态
+        
+        In-flight LLM requests are aborted and no later stage runs; background
+        post-processing is cancelled too (resume_session() retries it).
+        Returns once the tasks have unwound, so nothing is written afterwards.
+        进行中的大模型请求被中止，后续阶段不再运行；后台后处理也被取消（resume_session()
+        会重试）。任务退出后才返回，之后不会再写入文件。
+        
+        Args:
+            project_id: Only cancel if this is the current project / 仅当为当前项目时取消
             
-            editor_result = await self.editor.execute(
-                project_id=project_id,
-                chapter=chapter,
-                context={
-                    "draft_version": latest_version,
-                    "user_feedback": feedback
-                }
-            )
+        Returns:
+            Whether a running task was cancelled / 是否取消了正在运行的任务
+        """
+        if project_id and self.current_project_id not in (None, project_id):
+            return False
+        
+        task = self.session_task
+        aborted = bool(task and not task.done())
+        if aborted:
+            self._cancelled_tasks.add(task)
+            task.cancel()
+            await asyncio.wait([task], timeout=5)
+        await self._wait_post_processing(cancel=True)
+        
+        self.current_status = SessionStatus.IDLE
+        self.last_active = time.time()
+        return aborted
+    
+    @contextmanager
+    def _stage(self, name: str) -> Iterator[None]:
+        """
+        Deadline scope for a stage from session.stage_timeouts
+        按 session.stage_timeouts 为阶段设置截止时间作用域
+        
+        Args:
+            name: Stage name / 阶段名称
+        """
+        with deadline_scope(self.stage_timeouts.get(name)):
+            try:
+                yield
+            except DeadlineExceeded as e:
+                raise DeadlineExceeded(f"Stage '{name}' timed out ({e})") from e
+    
+    async def _load_checkpoint(self, project_id: str, chapter: str) -> Dict[str, Any]:
+        """
+        Checkpoint of the chapter, loaded from storage when not current
+        章节的检查点，不是当前检查点时从存储加载
+        
+        A session recreated after a restart gets its inputs and iteration
+        count back from the checkpoint.
+        重启后重新创建的会话从检查点恢复输入与迭代次数。
+        
+        Args:
+            project_id: Project ID / 项目ID
+            chapter: Chapter ID / 章节ID
             
-            if not editor_result["success"]:
-                return await self._handle_error("Revision failed")
+        Returns:
+            Checkpoint record, empty if none / 检查点记录，没有时为空
+        """
+        current = (self.checkpoint.get("project_id"), self.checkpoint.get("chapter"))
+        if current != (project_id, chapter):
+            self.checkpoint = await self.session_state_storage.get_checkpoint(project_id, chapter) or {}
+        
+        inputs = self.checkpoint.get("inputs")
+        session = (self.session_inputs.get("project_id"), self.session_inputs.get("chapter"))
+        if inputs and session != (project_id, chapter):
+            self.session_inputs = {"project_id": project_id, "chapter": chapter, **inputs}
+            self.iteration_count = self.checkpoint.get("iteration", 0)
+        return self.checkpoint
+    
+    async def _begin_round(self, round_info: Dict[str, Any]) -> None:
+        """
+        Start a new checkpoint round, dropping the stages of the previous one
+        开始新的检查点轮次，丢弃上一轮次的阶段记录
+        
+        Waits for the post-processing of a finalized round first, so its
+        summary and canon updates complete before the round is replaced.
+        先等待已完成轮次的后处理结束，使其摘要与事实表更新在轮次被替换前完成。
+        
+        Args:
+            round_info: Round kind and its inputs / 轮次类型及其输入
+        """
+        # Post-processing of the previous round still writes its checkpoint
+        # 上一轮次的后处理仍在写入其检查点
+        await self._wait_post_processing()
+        self.checkpoint = {
+            "project_id": self.current_project_id,
+            "chapter": self.current_chapter,
+            "inputs": {key: self.session_inputs.get(key) for key in CHECKPOINT_INPUTS},
+            "round": round_info,
+            "iteration": self.iteration_count,
+            "status": "running",
+            "stages": {},
+        }
+        await self._save_checkpoint()
+    
+    async def _resume_stage(
+        self,
+        name: str,
+        inputs_hash: str,
+        load: Callable[[Dict[str, Any]], Awaitable[Any]],
+        checkpoint: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """
+        Artifact of a stage completed with the same inputs in this round
+        本轮次中以相同输入完成的阶段的产出
+        
+        Args:
+            name: Stage name / 阶段名称
+            inputs_hash: Fingerprint of the stage inputs / 阶段输入的指纹
+            load: Loads the artifact from the recorded artifact versions / 按记录的产出版本加载产出
+            checkpoint: Round checkpoint, defaults to the current one / 轮次检查点，默认为当前检查点
             
-            # Wait for feedback again / 再次等待反馈
-            await self._update_status(SessionStatus.WAITING_FEEDBACK, "等待用户反馈...")
+        Returns:
+            The artifact, or None if the stage must run / 产出；阶段需要运行时为 None
+        """
+        if checkpoint is None:
+            checkpoint = self.checkpoint
+        entry = (checkpoint.get("stages") or {}).get(name)
+        if not entry or entry.get("inputs_hash") != inputs_hash:
+            return None
+        
+        try:
+            artifact = await load(entry.get("artifacts") or {})
+        except Exception as e:
+            print(f"[Orchestrator] Checkpointed {name} could not be loaded: {e}")
+            return None
+        
+        if artifact is not None:
+            print(f"[Orchestrator] Stage '{name}' unchanged since checkpoint, skipped")
+            self.resumed_stages.append(name)
+        return artifact
+    
+    async def _record_stage(
+        self,
+        name: str,
+        inputs_hash: str,
+        artifacts: Dict[str, Any],
+        checkpoint: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Checkpoint a completed stage / 为已完成的阶段写入检查点
+        
+        Args:
+            name: Stage name / 阶段名称
+            inputs_hash: Fingerprint of the stage inputs / 阶段输入的指纹
+            artifacts: Produced artifact versions / 产出的版本
+            checkpoint: Round checkpoint, defaults to the current one / 轮次检查点，默认为当前检查点
+        """
+        if checkpoint is None:
+            checkpoint = self.checkpoint
+        checkpoint.setdefault("stages", {})[name] = {
+            "inputs_hash": inputs_hash,
+            "artifacts": artifacts,
+            "completed_at": time.time(),
+        }
+        await self._save_checkpoint(checkpoint)
+    
+    async def _skip_by_policy(
+        self,
+        name: str,
+        inputs_hash: str,
+        current: Any,
+        **facts: Any
+    ) -> Any:
+        """
+        Skip a stage when the stage policy says so / 按阶段策略跳过阶段
+        
+        A skipped stage is checkpointed like a completed one, with the
+        artifact it would have replaced, so resume does not run it either.
+        被跳过的阶段与已完成阶段一样写入检查点，记录其原本要替换的产出，恢复时也不会运行。
+        
+        Args:
+            name: Stage name / 阶段名称
+            inputs_hash: Fingerprint of the stage inputs / 阶段输入的指纹
+            current: Artifact kept when skipping (a draft) / 跳过时沿用的产出（草稿）
+            facts: Inputs of the policy rule / 策略规则的输入
             
-            return {
-                "success": True,
-                "status": SessionStatus.WAITING_FEEDBACK,
-                "draft": editor_result["draft"],
-                "version": editor_result["version"],
+        Returns:
+            current if the stage is skipped, else None / 跳过时返回 current，否则为 None
+        """
+        run, reason = self.stage_policy.decide(name, **facts)
+        if run:
+            return None
+        
+        print(f"[Orchestrator] Stage '{name}' skipped by policy: {reason}")
+        self.skipped_stages.append({"stage": name, "reason": reason})
+        await self._record_stage(name, inputs_hash, {"draft": current.version, "skipped": reason})
+        if self.progress_callback:
+            await self.progress_callback({
+                "type": "stage_skipped",
+                "stage": name,
+                "reason": reason,
+                "message": f"跳过阶段 {name}：{reason}",
+                "project_id": self.current_project_id,
+                "chapter": self.current_chapter,
                 "iteration": self.iteration_count
-            }
+            })
+        return current
+    
+    async def _finish_round(
+        self,
+        status: SessionStatus,
+        checkpoint: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Checkpoint the end of a round / 为轮次结束写入检查点
+        
+        Args:
+            status: Final status of the round / 轮次的最终状态
+            checkpoint: Round checkpoint, defaults to the current one; its
+                iteration is kept as recorded / 轮次检查点，默认为当前检查点；
+                传入时保留其记录的迭代次数
+        """
+        if checkpoint is None:
+            checkpoint = self.checkpoint
+            if checkpoint:
+                checkpoint["iteration"] = self.iteration_count
+        if not checkpoint:
+            return
+        checkpoint["status"] = status.value
+        await self._save_checkpoint(checkpoint)
+    
+    async def _save_checkpoint(self, checkpoint: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Persist a checkpoint; failures do not stop the session
+        持久化检查点；失败不中断会话
+        
+        Args:
+            checkpoint: Round checkpoint, defaults to the current one / 轮次检查点，默认为当前检查点
+        """
+        if checkpoint is None:
+            checkpoint = self.checkpoint
+        checkpoint["updated_at"] = time.time()
+        # Post-processing steps save concurrently / 后处理步骤会并发保存
+        async with self._checkpoint_lock:
+            try:
+                await self.session_state_storage.save_checkpoint(
+                    checkpoint["project_id"],
+                    checkpoint["chapter"],
+                    checkpoint
+                )
+            except Exception as e:
+                print(f"[Orchestrator] Failed to save checkpoint: {e}")
+    
+    async def _build_snapshot(
+        self,
+        project_id: str,
+        chapter: str
+    ) -> ContextSnapshot:
+        """
+        Build the context snapshot for the current iteration
+        为当前迭代构建上下文快照
+        
+        Falls back to the saved scene brief when the session was not started
+        by this orchestrator (e.g. after a restart).
+        若会话并非由本调度器启动（例如重启后），回退使用已保存的场景简报。
+        
+        Args:
+            project_id: Project ID / 项目ID
+            chapter: Chapter ID / 章节ID
             
-        except Exception as e:
-            return await self._handle_error(f"Feedback processing error: {str(e)}")
+        Returns:
+            Context snapshot / 上下文快照
+        """
+        inputs = self.session_inputs
+        if inputs.get("project_id") != project_id or inputs.get("chapter") != chapter:
+            scene_brief = await self.draft_storage.get_scene_brief(project_id, chapter)
+            inputs = {
+                "chapter_title": scene_brief.title if scene_brief else "",
+                "chapter_goal": scene_brief.goal if scene_brief else "",
+                "character_names": None,
+            }
+        
+        return await self.context_selector.build_snapshot(
+            project_id=project_id,
+            chapter=chapter,
+            iteration=self.iteration_count,
+            character_names=inputs.get("character_names"),
+            chapter_title=inputs.get("chapter_title", ""),
+            chapter_goal=inputs.get("chapter_goal", "")
+        )
     
     async def _finalize_chapter(
         self,
@@ -327,6 +975,11 @@ class Orchestrator:
         Finalize chapter and save final draft
         完成章节并保存成稿
         
+        Returns once final.md is written; the caller then starts the chapter
+        summary and canon updates in the background (see _start_post_processing).
+        final.md 写入后即返回；随后由调用方在后台启动章节摘要与事实表更新
+        （见 _start_post_processing）。
+        
         Args:
             project_id: Project ID / 项目ID
             chapter: Chapter ID / 章节ID
@@ -346,86 +999,301 @@ class Orchestrator:
                 return await self._handle_error("No draft content found to finalize")
 
             # Save as final / 保存为成稿
-            await self.draft_storage.save_final_draft(
-                project_id=project_id,
-                chapter=chapter,
-                content=draft.content,
+            final_hash = _fingerprint(latest_version, draft.content)
+            final = await self._resume_stage(
+                "final", final_hash,
+                lambda artifacts: self.draft_storage.get_final_draft(project_id, chapter)
             )
-
-            # Generate chapter summary (MVP-2 Week 5)
-            # 生成章节摘要（MVP-2 第5周）
-            try:
-                # Prefer title from scene brief / 优先从场景简报获取标题
-                scene_brief = await self.draft_storage.get_scene_brief(project_id, chapter)
-                chapter_title = scene_brief.title if scene_brief and scene_brief.title else chapter
-
-                summary = await self.archivist.generate_chapter_summary(
+            if final is None:
+                await self.draft_storage.save_final_draft(
                     project_id=project_id,
                     chapter=chapter,
-                    chapter_title=chapter_title,
-                    final_draft=draft.content,
+                    content=draft.content,
                 )
+                await self._record_stage("final", final_hash, {"final": latest_version})
 
-                await self.draft_storage.save_chapter_summary(project_id, summary)
-            except Exception as e:
-                # Do not block finalization if summary fails
-                # 摘要失败不阻塞章节完成（保证流程可继续）
-                print(f"[Orchestrator] Failed to generate chapter summary: {e}")
+            await self._update_status(SessionStatus.COMPLETED, "章节完成！摘要与事实表正在后台更新...")
+
+            return {
+                "success": True,
+                "status": SessionStatus.COMPLETED,
+                "message": "Chapter finalized successfully",
+                "final_draft": draft,
+                "post_processing": "running",
+                "resumed_stages": list(self.resumed_stages),
+            }
 
-            # Extract canon updates (MVP-2 Week 5)
-            # 抽取并更新事实表（MVP-2 第5周）
+        except Exception as e:
+            return await self._handle_error(f"Finalization error: {str(e)}")
+    
+    async def _start_post_processing(self, project_id: str, chapter: str, final_draft: str) -> None:
+        """
+        Start the background post-processing of the current round
+        启动当前轮次的后台后处理
+
+        A post-processing task still running for an earlier final draft is
+        awaited first, so every finalize round gets its own. The task runs
+        under its own post_process stage timeout and checkpoints into this
+        round's record even if a new round has begun meanwhile.
+        仍在为较早成稿运行的后处理任务会先被等待，使每个完成轮次都有自己的后处理。
+        该任务使用独立的 post_process 阶段超时，即使期间开始了新轮次，也只写入
+        本轮次的检查点。
+
+        Args:
+            project_id: Project ID / 项目ID
+            chapter: Chapter ID / 章节ID
+            final_draft: Final draft content / 成稿内容
+        """
+        await self._wait_post_processing()
+        # The task inherits the deadline scope it is created in
+        # 任务继承创建时所在的截止时间作用域
+        with self._stage("post_process"):
+            self.post_processing_task = asyncio.create_task(
+                self._post_process_chapter(project_id, chapter, final_draft, self.checkpoint)
+            )
+
+    async def _post_process_chapter(
+        self,
+        project_id: str,
+        chapter: str,
+        final_draft: str,
+        checkpoint: Dict[str, Any]
+    ) -> None:
+        """
+        Summarize the final draft and update canon concurrently
+        并发生成章节摘要并更新事实表
+        
+        Both are LLM calls over the same final draft; conflict detection
+        starts as soon as the canon updates are in. Each step is checkpointed
+        and reported as a post_processing event; a failed step does not block
+        the other, and resume_session() retries it.
+        两者都是针对同一成稿的大模型调用；事实表更新完成后立即开始冲突检测。每个步骤
+        都写入检查点并以 post_processing 事件上报；失败的步骤不阻塞另一个，
+        resume_session() 会重试它。
+        
+        Args:
+            project_id: Project ID / 项目ID
+            chapter: Chapter ID / 章节ID
+            final_draft: Final draft content / 成稿内容
+            checkpoint: Checkpoint of the finalize round / 完成轮次的检查点
+        """
+        results = await asyncio.gather(
+            self._post_process_step(
+                "summary", final_draft, checkpoint,
+                lambda: self._summarize_chapter(project_id, chapter, final_draft)
+            ),
+            self._post_process_step(
+                "canon", final_draft, checkpoint,
+                lambda: self._update_canon(project_id, chapter, final_draft)
+            ),
+        )
+
+        if all(results):
+            await self._finish_round(SessionStatus.COMPLETED, checkpoint)
+            await self._notify_post_processing("all", "done", "章节后处理完成")
+        else:
+            await self._finish_round(SessionStatus.ERROR, checkpoint)
+            await self._notify_post_processing("all", "failed", "部分章节后处理失败，可恢复会话重试")
+
+    async def _post_process_step(
+        self,
+        name: str,
+        final_draft: str,
+        checkpoint: Dict[str, Any],
+        run: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> bool:
+        """
+        Run one checkpointed post-processing step / 运行一个带检查点的后处理步骤
+        
+        Args:
+            name: Step name / 步骤名称
+            final_draft: Final draft content, part of the step inputs / 成稿内容，作为步骤输入
+            checkpoint: Checkpoint of the finalize round / 完成轮次的检查点
+            run: Runs the step and returns its artifact counts / 运行步骤并返回其产出计数
+            
+        Returns:
+            Whether the step succeeded / 步骤是否成功
+        """
+        step_hash = _fingerprint(name, final_draft)
+
+        async def recorded(artifacts: Dict[str, Any]) -> Dict[str, Any]:
+            return artifacts
+
+        if await self._resume_stage(name, step_hash, recorded, checkpoint) is not None:
+            return True
+
+        await self._notify_post_processing(name, "running", f"正在处理：{name}")
+        try:
+            artifacts = await run()
+        except Exception as e:
+            # Do not block finalization if a step fails
+            # 单个步骤失败不阻塞章节完成（保证流程可继续）
+            print(f"[Orchestrator] Post-processing step '{name}' failed: {e}")
+            await self._notify_post_processing(name, "failed", f"{name} 失败：{e}")
+            return False
+
+        await self._record_stage(name, step_hash, artifacts, checkpoint)
+        await self._notify_post_processing(name, "done", f"{name} 完成")
+        return True
+
+    async def _summarize_chapter(
+        self,
+        project_id: str,
+        chapter: str,
+        final_draft: str
+    ) -> Dict[str, Any]:
+        """
+        Generate and save the chapter summary (MVP-2 Week 5)
+        生成并保存章节摘要（MVP-2 第5周）
+        
+        Args:
+            project_id: Project ID / 项目ID
+            chapter: Chapter ID / 章节ID
+            final_draft: Final draft content / 成稿内容
+            
+        Returns:
+            Artifacts / 产出
+        """
+        # Prefer title from scene brief / 优先从场景简报获取标题
+        scene_brief = await self.draft_storage.get_scene_brief(project_id, chapter)
+        chapter_title = scene_brief.title if scene_brief and scene_brief.title else chapter
+
+        summary = await self.archivist.generate_chapter_summary(
+            project_id=project_id,
+            chapter=chapter,
+            chapter_title=chapter_title,
+            final_draft=final_draft,
+        )
+
+        await self.draft_storage.save_chapter_summary(project_id, summary)
+
+        # Compress newly completed blocks of older chapters now, so later
+        # sessions find them in the compression cache
+        # 立即压缩新凑齐的早期章节块，使后续会话直接命中压缩缓存
+        compressed = 0
+        compressor = self.context_selector.compressor
+        if compressor:
             try:
-                canon_updates = await self.archivist.extract_canon_updates(
-                    project_id=project_id,
-                    chapter=chapter,
-                    final_draft=draft.content,
+                compressed = await compressor.precompute_stable_blocks(
+                    await self.draft_storage.list_chapter_summaries(project_id)
                 )
+            except Exception as e:
+                print(f"[Orchestrator] Failed to precompute summary compressions: {e}")
 
-                for fact in canon_updates.get("facts", []) or []:
-                    await self.canon_storage.add_fact(project_id, fact)
+        return {"summary": chapter, "compressed_blocks": compressed}
 
-                for event in canon_updates.get("timeline_events", []) or []:
-                    await self.canon_storage.add_timeline_event(project_id, event)
+    async def _update_canon(
+        self,
+        project_id: str,
+        chapter: str,
+        final_draft: str
+    ) -> Dict[str, Any]:
+        """
+        Extract canon updates, then detect conflicts (MVP-2 Weeks 5-6)
+        抽取事实表更新，随后进行冲突检测（MVP-2 第5-6周）
+        
+        Args:
+            project_id: Project ID / 项目ID
+            chapter: Chapter ID / 章节ID
+            final_draft: Final draft content / 成稿内容
+            
+        Returns:
+            Artifacts / 产出
+        """
+        canon_updates = await self.archivist.extract_canon_updates(
+            project_id=project_id,
+            chapter=chapter,
+            final_draft=final_draft,
+        )
 
-                for state in canon_updates.get("character_states", []) or []:
-                    await self.canon_storage.update_character_state(project_id, state)
+        facts = canon_updates.get("facts", []) or []
+        timeline_events = canon_updates.get("timeline_events", []) or []
+        character_states = canon_updates.get("character_states", []) or []
 
-                # Detect conflicts (MVP-2 Week 6)
-                # 冲突检测（MVP-2 第6周）
-                try:
-                    report = await self.canon_storage.detect_conflicts(
-                        project_id=project_id,
-                        chapter=chapter,
-                        new_facts=canon_updates.get("facts", []) or [],
-                        new_timeline_events=canon_updates.get("timeline_events", []) or [],
-                        new_character_states=canon_updates.get("character_states", []) or [],
-                    )
+        for fact in facts:
+            await self.canon_storage.add_fact(project_id, fact)
 
-                    await self.draft_storage.save_conflict_report(
-                        project_id=project_id,
-                        chapter=chapter,
-                        report=report,
-                    )
-                except Exception as e:
-                    # Do not block finalization if conflict detection fails
-                    # 冲突检测失败不阻塞章节完成（保证流程可继续）
-                    print(f"[Orchestrator] Failed to detect conflicts: {e}")
-            except Exception as e:
-                # Do not block finalization if canon update fails
-                # Canon 更新失败不阻塞章节完成（保证流程可继续）
-                print(f"[Orchestrator] Failed to update canon: {e}")
+        for event in timeline_events:
+            await self.canon_storage.add_timeline_event(project_id, event)
 
-            await self._update_status(SessionStatus.COMPLETED, "章节完成！")
+        for state in character_states:
+            await self.canon_storage.update_character_state(project_id, state)
 
-            return {
-                "success": True,
-                "status": SessionStatus.COMPLETED,
-                "message": "Chapter finalized successfully",
-                "final_draft": draft,
-            }
+        artifacts = {
+            "facts": len(facts),
+            "timeline_events": len(timeline_events),
+            "character_states": len(character_states),
+        }
+
+        # Detect conflicts (MVP-2 Week 6)
+        # 冲突检测（MVP-2 第6周）
+        try:
+            report = await self.canon_storage.detect_conflicts(
+                project_id=project_id,
+                chapter=chapter,
+                new_facts=facts,
+                new_timeline_events=timeline_events,
+                new_character_states=character_states,
+            )
 
+            await self.draft_storage.save_conflict_report(
+                project_id=project_id,
+                chapter=chapter,
+                report=report,
+            )
+            artifacts["conflicts"] = chapter
+            await self._notify_post_processing("conflicts", "done", "冲突检测完成")
         except Exception as e:
-            return await self._handle_error(f"Finalization error: {str(e)}")
+            # Do not block finalization if conflict detection fails
+            # 冲突检测失败不阻塞章节完成（保证流程可继续）
+            print(f"[Orchestrator] Failed to detect conflicts: {e}")
+            await self._notify_post_processing("conflicts", "failed", f"冲突检测失败：{e}")
+
+        return artifacts
+
+    async def _notify_post_processing(self, step: str, status: str, message: str) -> None:
+        """
+        Report a post-processing step over the progress callback
+        通过进度回调上报后处理步骤
+        
+        Args:
+            step: Step name (summary, canon, conflicts, all) / 步骤名称
+            status: running, done or failed / 状态
+            message: Status message / 状态消息
+        """
+        if self.progress_callback:
+            await self.progress_callback({
+                "type": "post_processing",
+                "step": step,
+                "status": status,
+                "message": message,
+                "project_id": self.current_project_id,
+                "chapter": self.current_chapter
+            })
+    
+    def is_post_processing(self) -> bool:
+        """Whether finalization post-processing is running / 定稿后处理是否正在运行"""
+        return bool(self.post_processing_task and not self.post_processing_task.done())
+
+    async def _wait_post_processing(self, cancel: bool = False) -> None:
+        """
+        Wait for background post-processing to end / 等待后台后处理结束
+        
+        Args:
+            cancel: Cancel it first (waits at most 5 seconds) / 先取消它（最多等待 5 秒）
+        """
+        task = self.post_processing_task
+        if not task or task.done():
+            return
+        if cancel:
+            print("[Orchestrator] Cancelling post-processing")
+            task.cancel()
+            await asyncio.wait([task], timeout=5)
+        else:
+            print("[Orchestrator] Waiting for post-processing of the previous round")
+            # asyncio.wait does not cancel the task if this session is cancelled
+            # 本会话被取消时，asyncio.wait 不会连带取消该任务
+            await asyncio.wait([task])
     
     async def _update_status(self, status: SessionStatus, message: str) -> None:
         """
@@ -437,6 +1305,7 @@ class Orchestrator:
             message: Status message / 状态消息
         """
         self.current_status = status
+        self.last_active = time.time()
         
         if self.progress_callback:
             await self.progress_callback({
@@ -447,6 +1316,43 @@ class Orchestrator:
                 "iteration": self.iteration_count
             })
     
+    def _delta_forwarder(
+        self,
+        agent: str,
+        base_version: str
+    ) -> Optional[Callable[[str], Awaitable[None]]]:
+        """
+        Build callback that forwards streamed agent output as draft_delta events
+        构建将 Agent 流式输出作为 draft_delta 事件转发的回调
+        
+        Args:
+            agent: Streaming agent (writer, editor) / 正在流式输出的 Agent
+            base_version: Draft version being written or revised / 正在撰写或修订的草稿版本
+            
+        Returns:
+            Async callback, or None when nobody listens / 异步回调；无监听方时为 None
+        """
+        if not self.progress_callback:
+            return None
+        
+        seq = 0
+        
+        async def forward(text: str) -> None:
+            nonlocal seq
+            seq += 1
+            await self.progress_callback({
+                "type": "draft_delta",
+                "agent": agent,
+                "base_version": base_version,
+                "seq": seq,
+                "delta": text,
+                "project_id": self.current_project_id,
+                "chapter": self.current_chapter,
+                "iteration": self.iteration_count
+            })
+        
+        return forward
+    
     async def _handle_error(self, error_message: str) -> Dict[str, Any]:
         """
         Handle error and update status
@@ -459,6 +1365,8 @@ class Orchestrator:
             Error result / 错误结果
         """
         self.current_status = SessionStatus.ERROR
+        self.last_active = time.time()
+        await self._finish_round(SessionStatus.ERROR)
         
         if self.progress_callback:
             await self.progress_callback({
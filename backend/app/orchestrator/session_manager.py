@@ -0,0 +1,246 @@
+"""
+Session Manager / 会话管理器
+Registry of independent writing sessions keyed by (project_id, chapter)
+按 (project_id, chapter) 索引的独立写作会话注册表
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, Callable, Awaitable, AsyncIterator, List, Tuple
+from app.config import config
+from app.storage import CardStorage, CanonStorage, DraftStorage, SessionStateStorage
+from app.llm_gateway import LLMGateway, get_gateway
+from app.context_engine import ContextSelector, ContextCompressor
+from app.orchestrator.orchestrator import Orchestrator
+
+
+class SessionManager:
+    """
+    Holds one Orchestrator per (project_id, chapter)
+    为每个 (project_id, chapter) 保存一个 Orchestrator
+
+    Sessions share the gateway, storage and context selector, so chapters
+    and projects run side by side. Running stages are capped globally
+    (session.max_concurrent_sessions) and per project
+    (session.max_sessions_per_project); sessions over the cap wait for a
+    slot. Sessions idle for session.idle_ttl_seconds are dropped.
+    各会话共享网关、存储与上下文选择器，因此不同章节与项目可以并行运行。
+    正在运行阶段的会话数受全局（session.max_concurrent_sessions）与每个项目
+    （session.max_sessions_per_project）上限约束，超出上限的会话等待空闲槽位。
+    空闲超过 session.idle_ttl_seconds 的会话会被移除。
+    """
+
+    def __init__(
+        self,
+        data_dir: str = "../data",
+        progress_callback: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+    ):
+        """
+        Initialize manager with shared storage
+
+        Args:
+            data_dir: Data directory path / 数据目录路径
+            progress_callback: Progress callback passed to every session / 传给每个会话的进度回调
+        """
+        self.data_dir = data_dir
+        self.progress_callback = progress_callback
+
+        # Shared by all sessions / 所有会话共享
+        self.card_storage = CardStorage(data_dir)
+        self.canon_storage = CanonStorage(data_dir)
+        self.draft_storage = DraftStorage(data_dir)
+        self.session_state_storage = SessionStateStorage(data_dir)
+        self.context_selector = ContextSelector(
+            self.card_storage,
+            self.canon_storage,
+            self.draft_storage,
+            compressor=ContextCompressor(get_gateway())
+        )
+
+        session_config = config.get("session", {})
+        self.max_concurrent = session_config.get("max_concurrent_sessions", 8)
+        self.max_per_project = session_config.get("max_sessions_per_project", 2)
+        self.idle_ttl = session_config.get("idle_ttl_seconds", 3600)
+
+        self.sessions: Dict[Tuple[str, str], Orchestrator] = {}
+        self._global_slots = asyncio.Semaphore(self.max_concurrent)
+        self._project_slots: Dict[str, asyncio.Semaphore] = {}
+        self.running = 0
+        self.waiting = 0
+
+    def get_or_create(self, project_id: str, chapter: str) -> Orchestrator:
+        """
+        Session for a chapter, created on first use / 章节的会话，首次使用时创建
+
+        Args:
+            project_id: Project ID / 项目ID
+            chapter: Chapter ID / 章节ID
+
+        Returns:
+            Orchestrator of the session / 会话的调度器
+        """
+        self._evict_idle()
+
+        key = (project_id, chapter)
+        session = self.sessions.get(key)
+        if session is None:
+            session = Orchestrator(
+                data_dir=self.data_dir,
+                progress_callback=self.progress_callback,
+                card_storage=self.card_storage,
+                canon_storage=self.canon_storage,
+                draft_storage=self.draft_storage,
+                context_selector=self.context_selector,
+                session_state_storage=self.session_state_storage
+            )
+            session.current_project_id = project_id
+            session.current_chapter = chapter
+            session.concurrency_slot = self.slot
+            self.sessions[key] = session
+        return session
+
+    def set_gateway(self, gateway: LLMGateway) -> None:
+        """
+        Switch all sessions to a new gateway, keeping the registry
+        将所有会话切换到新网关，同时保留注册表
+
+        Used after an LLM config reload: running sessions, their jobs and
+        the concurrency slots stay tracked, and their next LLM calls use
+        the new providers.
+        用于重新加载大模型配置后：运行中的会话、其任务与并发槽位仍被跟踪，
+        它们的下一次大模型调用使用新的提供商。
+
+        Args:
+            gateway: LLM gateway instance / 大模型网关实例
+        """
+        if self.context_selector.compressor:
+            self.context_selector.compressor.gateway = gateway
+        for session in self.sessions.values():
+            session.set_gateway(gateway)
+        print(f"[SessionManager] Switched {len(self.sessions)} sessions to the reloaded gateway")
+
+    def get(self, project_id: str, chapter: str) -> Optional[Orchestrator]:
+        """Existing session for a chapter / 章节已有的会话"""
+        return self.sessions.get((project_id, chapter))
+
+    def project_sessions(self, project_id: str) -> List[Orchestrator]:
+        """
+        Sessions of a project, most recently active first / 项目的会话，最近活跃的在前
+
+        Args:
+            project_id: Project ID / 项目ID
+
+        Returns:
+            Orchestrators / 调度器列表
+        """
+        sessions = [s for (project, _chapter), s in self.sessions.items() if project == project_id]
+        return sorted(sessions, key=lambda s: s.last_active, reverse=True)
+
+    async def cancel(self, project_id: str, chapter: Optional[str] = None) -> int:
+        """
+        Cancel the sessions of a project, or of one chapter
+        取消项目的会话，或其中一个章节的会话
+
+        Args:
+            project_id: Project ID / 项目ID
+            chapter: Only this chapter / 仅此章节
+
+        Returns:
+            Number of running sessions aborted / 被中止的运行中会话数
+        """
+        sessions = (
+            [s for s in [self.get(project_id, chapter)] if s]
+            if chapter else self.project_sessions(project_id)
+        )
+        aborted = 0
+        for session in sessions:
+            if await session.cancel_session():
+                aborted += 1
+        return aborted
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        project_id: str,
+        on_wait: Optional[Callable[[], Awaitable[None]]] = None
+    ) -> AsyncIterator[None]:
+        """
+        Hold a per-project and a global running slot / 占用一个项目级与一个全局运行槽位
+
+        The per-project slot is taken first, so a busy project queues
+        behind itself rather than holding global slots.
+        先获取项目级槽位，使繁忙的项目在自身队列中等待，而不占用全局槽位。
+
+        Args:
+            project_id: Project ID / 项目ID
+            on_wait: Awaited once if the session has to wait / 需要等待时调用一次
+        """
+        project_slots = self._project_slots.get(project_id)
+        if project_slots is None:
+            project_slots = asyncio.Semaphore(self.max_per_project)
+            self._project_slots[project_id] = project_slots
+
+        if on_wait and (project_slots.locked() or self._global_slots.locked()):
+            await on_wait()
+
+        self.waiting += 1
+        waiting = True
+        try:
+            async with project_slots:
+                async with self._global_slots:
+                    self.waiting -= 1
+                    waiting = False
+                    self.running += 1
+                    try:
+                        yield
+                    finally:
+                        self.running -= 1
+        finally:
+            # Cancelled while waiting / 等待期间被取消
+            if waiting:
+                self.waiting -= 1
+
+    def list_sessions(self, project_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Sessions with their status and the concurrency limits
+        会话及其状态与并发限制
+
+        Args:
+            project_id: Only sessions of this project / 仅此项目的会话
+
+        Returns:
+            Listing dict / 列表字典
+        """
+        self._evict_idle()
+        sessions = [
+            {
+                **session.get_status(),
+                "running": session.is_running(),
+                "post_processing": session.is_post_processing(),
+                "last_active": session.last_active,
+            }
+            for (project, _chapter), session in self.sessions.items()
+            if project_id is None or project == project_id
+        ]
+        sessions.sort(key=lambda s: s["last_active"], reverse=True)
+        return {
+            "sessions": sessions,
+            "running": self.running,
+            "waiting": self.waiting,
+            "limits": {
+                "max_concurrent_sessions": self.max_concurrent,
+                "max_sessions_per_project": self.max_per_project,
+            },
+        }
+
+    def _evict_idle(self) -> None:
+        """Drop sessions idle for longer than idle_ttl / 移除空闲超过 idle_ttl 的会话"""
+        if not self.idle_ttl:
+            return
+        cutoff = time.time() - self.idle_ttl
+        for key, session in list(self.sessions.items()):
+            if session.is_running() or session.is_post_processing():
+                continue
+            if session.last_active < cutoff:
+                del self.sessions[key]
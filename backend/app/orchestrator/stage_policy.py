@@ -0,0 +1,104 @@
+"""
+Stage Policy / 阶段策略
+Decides per stage whether the orchestrator runs it
+决定调度器是否运行某个阶段
+"""
+
+from typing import Dict, Any, Optional, Tuple
+from app.config import config
+from app.schemas.draft import ReviewResult
+
+
+class StagePolicy:
+    """
+    Run-or-skip rules for session stages, from session.stage_policy
+    会话阶段的运行/跳过规则，来自 session.stage_policy
+
+    Each stage has a mode: "always" runs it, "auto" applies the stage's
+    rule. Only the editor has an auto rule so far: it is skipped when the
+    review was parsed and has no more critical/moderate issues than the
+    thresholds, the reviewer lets the draft proceed and the user gave no
+    feedback.
+    每个阶段有一个模式："always" 总是运行，"auto" 应用该阶段的规则。目前只有编辑
+    阶段有 auto 规则：当审稿已成功解析、严重/中等问题不超过阈值、审稿人允许继续且
+    用户没有反馈时跳过编辑。
+    """
+
+    DEFAULTS: Dict[str, Dict[str, Any]] = {
+        "edit": {
+            "mode": "auto",
+            "max_critical": 0,
+            "max_moderate": 0,
+            "require_can_proceed": True,
+        },
+    }
+
+    def __init__(self, policy_config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize policy
+
+        Args:
+            policy_config: Per-stage settings, defaults to session.stage_policy / 各阶段设置，默认读取 session.stage_policy
+        """
+        if policy_config is None:
+            policy_config = config.get("session", {}).get("stage_policy", {}) or {}
+        self.stages: Dict[str, Dict[str, Any]] = {
+            stage: {**self.DEFAULTS.get(stage, {}), **(policy_config.get(stage) or {})}
+            for stage in set(self.DEFAULTS) | set(policy_config)
+        }
+
+    def decide(
+        self,
+        stage: str,
+        review: Optional[ReviewResult] = None,
+        user_feedback: str = ""
+    ) -> Tuple[bool, str]:
+        """
+        Whether to run a stage / 是否运行某个阶段
+
+        Args:
+            stage: Stage name / 阶段名称
+            review: Latest review, for the editor rule / 最新审稿结果，用于编辑规则
+            user_feedback: User feedback of the round / 本轮用户反馈
+
+        Returns:
+            (run, reason) / (是否运行, 原因)
+        """
+        settings = self.stages.get(stage, {})
+        mode = settings.get("mode", "always")
+        if mode != "auto":
+            return True, f"mode {mode}"
+        if stage == "edit":
+            return self._decide_edit(settings, review, user_feedback)
+        return True, "no auto rule"
+
+    def _decide_edit(
+        self,
+        settings: Dict[str, Any],
+        review: Optional[ReviewResult],
+        user_feedback: str
+    ) -> Tuple[bool, str]:
+        """Editor rule: skip when the review leaves nothing to act on / 编辑规则：审稿无可处理问题时跳过"""
+        if user_feedback and user_feedback.strip():
+            return True, "user feedback"
+        if review is None:
+            return True, "no review"
+        # An unparsed review has no issues listed, not no issues / 未解析的审稿没有列出问题，并非没有问题
+        if review.parse_failed:
+            return True, "review could not be parsed"
+        if settings.get("require_can_proceed", True) and not review.can_proceed:
+            return True, "reviewer blocked the draft"
+
+        counts = {"critical": 0, "moderate": 0}
+        for issue in review.issues:
+            severity = (issue.severity or "").strip().lower()
+            if severity in counts:
+                counts[severity] += 1
+
+        if counts["critical"] > settings.get("max_critical", 0):
+            return True, f"{counts['critical']} critical issues"
+        if counts["moderate"] > settings.get("max_moderate", 0):
+            return True, f"{counts['moderate']} moderate issues"
+        return False, (
+            f"review has {counts['critical']} critical and {counts['moderate']} moderate issues"
+        )
@@ -6,7 +6,8 @@ from .projects import router as projects_router
 from .cards import router as cards_router
 from .canon import router as canon_router
 from .drafts import router as drafts_router
-from .session import router as session_router
+from .session import router as session_router, sessions_router
+from .jobs import router as jobs_router
 from .config_llm import router as config_router
 
 __all__ = [
@@ -15,5 +16,7 @@ __all__ = [
     "canon_router",
     "drafts_router",
     "session_router",
+    "sessions_router",
+    "jobs_router",
     "config_router",
 ]
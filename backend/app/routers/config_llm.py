@@ -7,7 +7,7 @@ from dotenv import load_dotenv
 import os
 
 import app.config as app_config
-from app.llm_gateway import reset_gateway
+from app.llm_gateway import reset_gateway, get_gateway
 
 
 router = APIRouter(prefix="/config", tags=["config"])
@@ -23,8 +23,8 @@ class LLMConfigStatus(BaseModel):
 
 
 class LLMConfigUpdate(BaseModel):
-    provider: Optional[str] = Field(None, description="Provider: openai|anthropic|deepseek|mock")
-    default_provider: Optional[str] = Field(None, description="Provider: openai|anthropic|deepseek|mock")
+    provider: Optional[str] = Field(None, description="Provider: openai|anthropic|deepseek|mock|simulated")
+    default_provider: Optional[str] = Field(None, description="Provider: openai|anthropic|deepseek|mock|simulated")
     agent_providers: Optional[Dict[str, str]] = None
     openai_api_key: Optional[str] = None
     anthropic_api_key: Optional[str] = None
@@ -96,6 +96,7 @@ async def get_llm_config_status():
         {"id": "anthropic", "label": "Anthropic (Claude)", "requires_key": True},
         {"id": "deepseek", "label": "DeepSeek", "requires_key": True},
         {"id": "mock", "label": "Mock (Demo)", "requires_key": False},
+        {"id": "simulated", "label": "Simulated (Benchmark)", "requires_key": False},
     ]
 
     default_provider = os.getenv("NOVIX_LLM_PROVIDER") or app_config.config.get("llm", {}).get("default_provider", "openai")
@@ -122,6 +123,7 @@ async def get_llm_config_status():
         "anthropic": _is_real_key(app_config.settings.anthropic_api_key),
         "deepseek": _is_real_key(app_config.settings.deepseek_api_key),
         "mock": True,
+        "simulated": True,
     }
 
     return {
@@ -136,7 +138,7 @@ async def get_llm_config_status():
 
 @router.post("/llm")
 async def update_llm_config(payload: LLMConfigUpdate):
-    allowed = {"openai", "anthropic", "deepseek", "mock"}
+    allowed = {"openai", "anthropic", "deepseek", "mock", "simulated"}
     default_provider = payload.default_provider or payload.provider
     if not default_provider:
         raise HTTPException(status_code=400, detail="Provider is required")
@@ -168,17 +170,18 @@ async def update_llm_config(payload: LLMConfigUpdate):
 
     reset_gateway()
 
-    try:
-        import app.routers.session as session_router
-        session_router._orchestrator = None
-    except Exception:
-        pass
+    # Keep the session registry (running sessions, jobs, slots); only swap the gateway
+    # 保留会话注册表（运行中的会话、任务、槽位），只替换网关
+    import app.routers.session as session_router
+    if session_router._session_manager is not None:
+        session_router._session_manager.set_gateway(get_gateway())
 
     required_key_map = {
         "openai": app_config.settings.openai_api_key,
         "anthropic": app_config.settings.anthropic_api_key,
         "deepseek": app_config.settings.deepseek_api_key,
         "mock": "ok",
+        "simulated": "ok",
     }
 
     providers_to_check = {default_provider}
@@ -187,7 +190,7 @@ async def update_llm_config(payload: LLMConfigUpdate):
             providers_to_check.add(v)
 
     for p in providers_to_check:
-        if p == "mock":
+        if p in ("mock", "simulated"):
             continue
         if not required_key_map.get(p):
             raise HTTPException(status_code=400, detail=f"API key is required for provider: {p}")
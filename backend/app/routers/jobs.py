@@ -0,0 +1,44 @@
+"""
+Jobs Router / 任务路由
+Status and results of background session jobs
+后台会话任务的状态与结果
+"""
+
+from fastapi import APIRouter, HTTPException
+from typing import Optional
+from app.routers.session import get_job_queue
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.get("")
+async def list_jobs(project_id: Optional[str] = None):
+    """
+    List jobs with queue depth and worker metrics
+    列出任务及队列深度与工作协程指标
+    
+    Args:
+        project_id: Only jobs of this project / 仅此项目的任务
+        
+    Returns:
+        Jobs and metrics / 任务与指标
+    """
+    return get_job_queue().list_jobs(project_id)
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """
+    Get a job, including its result once finished
+    获取任务，结束后包含其结果
+    
+    Args:
+        job_id: Job ID / 任务ID
+        
+    Returns:
+        Job with status and result / 含状态与结果的任务
+    """
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
@@ -10,6 +10,7 @@ from datetime import datetime
 from typing import Any, Dict, List
 from app.schemas.project import Project, ProjectCreate, ProjectStats
 from app.storage import CardStorage, CanonStorage, DraftStorage
+from app.llm_gateway import get_gateway
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
@@ -279,6 +280,29 @@ async def get_project_dashboard(project_id: str) -> Dict[str, Any]:
     }
 
 
+@router.get("/{project_id}/usage")
+async def get_project_usage(project_id: str) -> Dict[str, Any]:
+    """
+    Get LLM usage of a project from the usage ledger
+    从用量账本获取项目的大模型用量
+
+    Args:
+        project_id: Project ID / 项目ID
+
+    Returns:
+        Totals, cost per chapter, tokens per agent and latency per provider
+        总计、各章节成本、各 Agent token 用量与各提供商延迟
+    """
+    ledger = get_gateway().usage_ledger
+    if ledger is None:
+        raise HTTPException(status_code=404, detail="Usage ledger is disabled")
+
+    return {
+        **ledger.summary(project_id),
+        "by_chapter": ledger.cost_by_chapter(project_id),
+    }
+
+
 @router.delete("/{project_id}")
 async def delete_project(project_id: str):
     """
@@ -299,5 +323,8 @@ async def delete_project(project_id: str):
         raise HTTPException(status_code=404, detail="Project not found")
     
     shutil.rmtree(project_dir)
+    # Cached detectors and context views of the project are stale now
+    # 项目已缓存的提及检测器与上下文视图至此失效
+    card_storage.bump_project_revisions(project_id)
     
     return {"success": True, "message": "Project deleted"}
@@ -4,36 +4,99 @@ Writing session management endpoints
 写作会话管理端点
 """
 
-from fastapi import APIRouter, HTTPException
+import hashlib
+import json
+from fastapi import APIRouter, HTTPException, Response, Header
 from pydantic import BaseModel, Field
 from typing import Optional, List
-from app.orchestrator import Orchestrator
+from app.orchestrator import SessionManager, JobQueue, Job, JobQueueFull
 from app.orchestrator.orchestrator import SessionStatus
 from app.routers.websocket import broadcast_progress
 
 router = APIRouter(prefix="/projects/{project_id}/session", tags=["session"])
+sessions_router = APIRouter(prefix="/sessions", tags=["session"])
 
-# Global orchestrator instance / 全局调度器实例
-_orchestrator: Optional[Orchestrator] = None
+# Global session registry and job queue / 全局会话注册表与任务队列
+_session_manager: Optional[SessionManager] = None
+_job_queue: Optional[JobQueue] = None
 
 
-def get_orchestrator() -> Orchestrator:
-    """Get or create orchestrator instance / 获取或创建调度器实例"""
-    global _orchestrator
+async def _progress_callback(payload: dict) -> None:
+    """Broadcast session progress to WebSocket / 将会话进度广播到 WebSocket"""
+    project = payload.get("project_id")
+    if not project:
+        return
+    await broadcast_progress(project, payload)
 
-    async def _progress_callback(payload: dict) -> None:
-        """Broadcast session progress to WebSocket / 将会话进度广播到 WebSocket"""
-        project = payload.get("project_id")
-        if not project:
-            return
-        await broadcast_progress(project, payload)
 
-    if _orchestrator is None:
-        _orchestrator = Orchestrator(progress_callback=_progress_callback)
-    else:
-        # Ensure progress callback is always set / 确保进度回调始终设置
-        _orchestrator.progress_callback = _progress_callback
-    return _orchestrator
+def get_session_manager() -> SessionManager:
+    """Get or create the session manager / 获取或创建会话管理器"""
+    global _session_manager
+
+    if _session_manager is None:
+        _session_manager = SessionManager(progress_callback=_progress_callback)
+    return _session_manager
+
+
+def get_job_queue() -> JobQueue:
+    """Get or create the background job queue / 获取或创建后台任务队列"""
+    global _job_queue
+
+    if _job_queue is None:
+        _job_queue = JobQueue(notify=_progress_callback)
+    return _job_queue
+
+
+def _job_key(
+    kind: str,
+    project_id: str,
+    request: BaseModel,
+    idempotency_key: Optional[str] = None
+) -> str:
+    """
+    Idempotency key of a session job / 会话任务的幂等键
+    
+    The Idempotency-Key header wins; otherwise identical requests for the
+    same project share a key, so a double submit joins the job in progress.
+    优先使用 Idempotency-Key 请求头；否则同一项目的相同请求共享一个键，
+    重复提交会并入进行中的任务。
+    
+    Args:
+        kind: Job kind / 任务类型
+        project_id: Project ID / 项目ID
+        request: Request body / 请求体
+        idempotency_key: Idempotency-Key header / Idempotency-Key 请求头
+        
+    Returns:
+        Job key / 任务键
+    """
+    if idempotency_key:
+        return f"{project_id}:{idempotency_key}"
+    body = json.dumps(request.model_dump(), ensure_ascii=False, sort_keys=True)
+    return f"{project_id}:{kind}:{hashlib.sha256(body.encode('utf-8')).hexdigest()[:16]}"
+
+
+async def _submitted(job: Job, response: Response, wait: bool) -> dict:
+    """
+    Response for a submitted job: 202 with the job, or its result when waiting
+    已提交任务的响应：返回 202 与任务信息，等待时返回其结果
+    
+    Args:
+        job: Submitted job / 已提交的任务
+        response: Response to set the status code on / 用于设置状态码的响应
+        wait: Hold the request until the job finishes / 保持请求直到任务结束
+        
+    Returns:
+        Job dict, or the job result / 任务字典或任务结果
+    """
+    if not wait:
+        return job.to_dict(include_result=False)
+    
+    await job.done.wait()
+    if job.result is None:
+        raise HTTPException(status_code=500, detail=job.error or "Job failed")
+    response.status_code = 200
+    return job.result
 
 
 class StartSessionRequest(BaseModel):
@@ -52,26 +115,34 @@ class FeedbackRequest(BaseModel):
     action: str = Field("revise", description="Action: 'revise' or 'confirm' / 动作")
 
 
-@router.post("/start")
+@router.post("/start", status_code=202)
 async def start_session(
     project_id: str,
-    request: StartSessionRequest
+    request: StartSessionRequest,
+    response: Response,
+    wait: bool = False,
+    idempotency_key: Optional[str] = Header(None)
 ):
     """
-    Start a new writing session
-    开始新的写作会话
+    Start a new writing session as a background job
+    以后台任务开始新的写作会话
+    
+    Progress is broadcast over the WebSocket; poll GET /jobs/{job_id} for
+    the result.
+    进度通过 WebSocket 广播；通过 GET /jobs/{job_id} 轮询结果。
     
     Args:
         project_id: Project ID / 项目ID
         request: Session request / 会话请求
+        wait: Return the session result instead of the job / 返回会话结果而非任务信息
         
     Returns:
-        Session result / 会话结果
+        Queued job (202), or the session result with wait / 已排队任务（202），wait 时为会话结果
     """
-    try:
-        orchestrator = get_orchestrator()
-        
-        result = await orchestrator.start_session(
+    orchestrator = get_session_manager().get_or_create(project_id, request.chapter)
+    
+    def work():
+        return orchestrator.start_session(
             project_id=project_id,
             chapter=request.chapter,
             chapter_title=request.chapter_title,
@@ -79,98 +150,190 @@ async def start_session(
             target_word_count=request.target_word_count,
             character_names=request.character_names
         )
+    
+    try:
+        job = get_job_queue().submit(
+            "start", project_id, request.chapter, work,
+            key=_job_key("start", project_id, request, idempotency_key)
+        )
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    return await _submitted(job, response, wait)
+
+
+class ResumeSessionRequest(BaseModel):
+    """Request to resume an interrupted session / 恢复被中断会话的请求"""
+    chapter: str = Field(..., description="Chapter ID / 章节ID")
+
+
+@router.post("/resume", status_code=202)
+async def resume_session(
+    project_id: str,
+    request: ResumeSessionRequest,
+    response: Response,
+    wait: bool = False,
+    idempotency_key: Optional[str] = Header(None)
+):
+    """
+    Resume a chapter's interrupted session from its checkpoint as a background job
+    以后台任务从检查点恢复章节被中断的会话
+    
+    Completed stages whose inputs are unchanged are skipped; only the
+    interrupted stage and those after it run again.
+    跳过输入未变的已完成阶段，只重新运行被中断的阶段及其后续阶段。
+    
+    Args:
+        project_id: Project ID / 项目ID
+        request: Resume request / 恢复请求
+        wait: Return the session result instead of the job / 返回会话结果而非任务信息
         
-        return result
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    Returns:
+        Queued job (202), or the session result with wait / 已排队任务（202），wait 时为会话结果
+    """
+    orchestrator = get_session_manager().get_or_create(project_id, request.chapter)
+    
+    def work():
+        return orchestrator.resume_session(project_id, request.chapter)
+    
+    try:
+        job = get_job_queue().submit(
+            "resume", project_id, request.chapter, work,
+            key=_job_key("resume", project_id, request, idempotency_key)
+        )
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    return await _submitted(job, response, wait)
 
 
 @router.get("/status")
-async def get_session_status(project_id: str):
+async def get_session_status(project_id: str, chapter: Optional[str] = None):
     """
-    Get current session status
-    获取当前会话状态
+    Get session status of a chapter, or of the project's most recent session
+    获取章节的会话状态，或项目最近活跃会话的状态
     
     Args:
         project_id: Project ID / 项目ID
+        chapter: Chapter ID / 章节ID
         
     Returns:
         Session status / 会话状态
     """
-    orchestrator = get_orchestrator()
-    status = orchestrator.get_status()
+    manager = get_session_manager()
+    if chapter:
+        orchestrator = manager.get(project_id, chapter)
+    else:
+        sessions = manager.project_sessions(project_id)
+        orchestrator = sessions[0] if sessions else None
     
-    # Check if this is the correct project / 检查是否是正确的项目
-    if status["project_id"] != project_id:
+    if orchestrator is None:
+        # A checkpoint left by a previous process can be resumed
+        # 之前进程留下的检查点可被恢复
+        checkpoint = (
+            await manager.session_state_storage.get_checkpoint(project_id, chapter)
+            if chapter else None
+        )
         return {
             "status": "idle",
-            "message": "No active session for this project"
+            "message": "No active session for this project",
+            "checkpoint": {
+                "round": checkpoint.get("round", {}).get("kind"),
+                "status": checkpoint.get("status"),
+                "completed_stages": list(checkpoint.get("stages") or {}),
+                "updated_at": checkpoint.get("updated_at"),
+            } if checkpoint else None
         }
     
-    return status
+    return orchestrator.get_status()
 
 
-@router.post("/feedback")
+@router.post("/feedback", status_code=202)
 async def submit_feedback(
     project_id: str,
-    request: FeedbackRequest
+    request: FeedbackRequest,
+    response: Response,
+    wait: bool = False,
+    idempotency_key: Optional[str] = Header(None)
 ):
     """
-    Submit user feedback
-    提交用户反馈
+    Submit user feedback; revisions and finalization run as background jobs
+    提交用户反馈；修订与定稿作为后台任务运行
     
     Args:
         project_id: Project ID / 项目ID
         request: Feedback request / 反馈请求
+        wait: Return the processing result instead of the job / 返回处理结果而非任务信息
         
     Returns:
-        Processing result / 处理结果
+        Queued job (202), or the processing result with wait / 已排队任务（202），wait 时为处理结果
     """
-    try:
-        orchestrator = get_orchestrator()
-        
-        result = await orchestrator.process_feedback(
+    orchestrator = get_session_manager().get_or_create(project_id, request.chapter)
+    
+    def work():
+        return orchestrator.process_feedback(
             project_id=project_id,
             chapter=request.chapter,
             feedback=request.feedback,
             action=request.action
         )
-        
-        return result
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    
+    kind = "finalize" if request.action == "confirm" else "feedback"
+    try:
+        job = get_job_queue().submit(
+            kind, project_id, request.chapter, work,
+            key=_job_key(kind, project_id, request, idempotency_key)
+        )
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    return await _submitted(job, response, wait)
 
 
 @router.post("/cancel")
-async def cancel_session(project_id: str):
+async def cancel_session(project_id: str, chapter: Optional[str] = None):
     """
-    Cancel current session
-    取消当前会话
+    Cancel the project's sessions (or one chapter's), aborting in-flight LLM calls
+    取消项目的会话（或某一章节的会话），并中止进行中的大模型调用
     
     Args:
         project_id: Project ID / 项目ID
+        chapter: Only this chapter / 仅此章节
         
     Returns:
         Cancellation result / 取消结果
     """
-    orchestrator = get_orchestrator()
-    
-    # Reset orchestrator state / 重置调度器状态
-    orchestrator.current_status = SessionStatus.IDLE
-    orchestrator.current_project_id = None
-    orchestrator.current_chapter = None
+    # Drop queued jobs, then cancel the session tasks and reset state
+    # 丢弃排队中的任务，再取消会话任务并重置状态
+    cancelled_jobs = get_job_queue().cancel(project_id, chapter)
+    aborted = await get_session_manager().cancel(project_id, chapter)
 
     await broadcast_progress(project_id, {
         "status": SessionStatus.IDLE.value,
         "message": "Session cancelled",
         "project_id": project_id,
-        "chapter": None,
+        "chapter": chapter,
         "iteration": 0
     })
     
     return {
         "success": True,
-        "message": "Session cancelled"
+        "message": "Session cancelled",
+        "aborted": aborted,
+        "cancelled_jobs": cancelled_jobs
     }
+
+
+@sessions_router.get("")
+async def list_sessions(project_id: Optional[str] = None):
+    """
+    List writing sessions with their status and the concurrency limits
+    列出写作会话及其状态与并发限制
+    
+    Args:
+        project_id: Only sessions of this project / 仅此项目的会话
+        
+    Returns:
+        Sessions, running/waiting counts and limits / 会话、运行与等待数量及限制
+    """
+    return get_session_manager().list_sessions(project_id)
@@ -9,6 +9,10 @@ from pydantic import BaseModel, Field
 class CharacterCard(BaseModel):
     """Character card model / 角色卡模型"""
     name: str = Field(..., description="Character name / 角色名称")
+    aliases: List[str] = Field(
+        default_factory=list,
+        description="Other names the character is referred to by / 角色的别名、称呼"
+    )
     identity: str = Field(..., description="Character identity / 角色身份")
     motivation: str = Field(..., description="Character motivation / 角色动机")
     personality: List[str] = Field(default_factory=list, description="Personality traits / 性格特点")
@@ -27,6 +31,7 @@ class CharacterCard(BaseModel):
         json_schema_extra = {
             "example": {
                 "name": "李明",
+                "aliases": ["小明", "阿明"],
                 "identity": "22岁大学生，计算机专业",
                 "motivation": "找到失踪的妹妹",
                 "personality": ["内向但执着", "逻辑思维强"],
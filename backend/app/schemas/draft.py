@@ -63,6 +63,10 @@ class ReviewResult(BaseModel):
     issues: List[Issue] = Field(default_factory=list, description="Issues found / 发现的问题")
     overall_assessment: str = Field(..., description="Overall assessment / 总体评价")
     can_proceed: bool = Field(..., description="Whether can proceed to editing / 是否可进入编辑")
+    parse_failed: bool = Field(
+        False,
+        description="Reviewer output could not be parsed, issues are unknown / 审稿输出无法解析，问题未知"
+    )
 
 
 class RevisionRecord(BaseModel):
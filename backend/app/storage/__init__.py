@@ -1,11 +1,12 @@
 """
 Storage Module / 存储模块
-File-based storage operations for cards, canon, drafts
-基于文件的存储操作（卡片、事实表、草稿）
+File-based storage operations for cards, canon, drafts, session checkpoints
+基于文件的存储操作（卡片、事实表、草稿、会话检查点）
 """
 
 from .cards import CardStorage
 from .canon import CanonStorage
 from .drafts import DraftStorage
+from .session_state import SessionStateStorage
 
-__all__ = ["CardStorage", "CanonStorage", "DraftStorage"]
+__all__ = ["CardStorage", "CanonStorage", "DraftStorage", "SessionStateStorage"]
@@ -7,12 +7,20 @@ Common utilities for file operations
 import json
 import yaml
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 import aiofiles
 
 
+# Storage areas with change counters / 带变更计数的存储区域
+REVISION_AREAS = ("cards", "canon", "drafts", "summaries")
+
+
 class BaseStorage:
     """Base storage class with common file operations / 带通用文件操作的存储基类"""
+
+    # Per-(project, area) change counters shared by all storage instances in the process
+    # 进程内所有存储实例共享的 (项目, 区域) 变更计数
+    _revisions: Dict[Tuple[str, str], int] = {}
     
     def __init__(self, data_dir: str = "../data"):
         """
@@ -31,6 +39,41 @@ class BaseStorage:
     def ensure_dir(self, path: Path) -> None:
         """Ensure directory exists / 确保目录存在"""
         path.mkdir(parents=True, exist_ok=True)
+
+    def get_revision(self, project_id: str, area: str) -> int:
+        """
+        Get change counter of a storage area / 获取存储区域的变更计数
+
+        Args:
+            project_id: Project ID / 项目ID
+            area: Storage area, e.g. "cards" / 存储区域，如 "cards"
+
+        Returns:
+            Revision number / 版本号
+        """
+        return BaseStorage._revisions.get((project_id, area), 0)
+
+    def bump_revision(self, project_id: str, area: str) -> None:
+        """Report a change in a storage area / 报告存储区域发生变更"""
+        key = (project_id, area)
+        BaseStorage._revisions[key] = BaseStorage._revisions.get(key, 0) + 1
+
+    def bump_project_revisions(self, project_id: str) -> None:
+        """
+        Report that all areas of a project changed, e.g. on project delete
+        报告项目的所有区域均已变更，如删除项目时
+
+        Counters are bumped rather than cleared: a project recreated with the
+        same ID must not match views cached at the old revisions.
+        计数器递增而非清零：以相同ID重建的项目不能命中按旧版本号缓存的视图。
+
+        Args:
+            project_id: Project ID / 项目ID
+        """
+        areas = set(REVISION_AREAS)
+        areas.update(area for project, area in BaseStorage._revisions if project == project_id)
+        for area in areas:
+            self.bump_revision(project_id, area)
     
     async def read_yaml(self, file_path: Path) -> Dict[str, Any]:
         """
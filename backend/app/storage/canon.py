@@ -4,15 +4,28 @@ Manage facts, timeline events, and character states
 管理事实表、时间线和角色状态
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Callable, Awaitable
+from pathlib import Path
+import asyncio
+import json
 import re
 from app.storage.base import BaseStorage
+from app.storage.canon_index import FactIndex, TimelineIndex, normalize_text, has_negation
 from app.schemas.canon import Fact, TimelineEvent, CharacterState
 
 
 class CanonStorage(BaseStorage):
     """Storage operations for canon (facts, timeline, character states) / 事实表存储操作"""
 
+    # Loaded canon indexes keyed by source file, tagged with the file size they cover
+    # 已加载的事实表索引，按源文件缓存，并记录其覆盖的文件大小
+    _indexes: Dict[Path, Tuple[int, Any]] = {}
+
+    # Serialize index loads and source+index appends per source file, so a
+    # rebuild never interleaves with an append
+    # 按源文件串行化索引加载与源文件+索引追加，使重建不会与追加交错
+    _index_locks: Dict[Path, asyncio.Lock] = {}
+
     def _parse_chapter_number(self, chapter: str) -> Optional[int]:
         """Parse chapter number from id / 从章节ID解析章节号"""
         if not chapter:
@@ -48,7 +61,125 @@ class CanonStorage(BaseStorage):
             fact: Fact to add / 要添加的事实
         """
         file_path = self.get_project_path(project_id) / "canon" / "facts.jsonl"
-        await self.append_jsonl(file_path, fact.model_dump())
+        async with self._index_lock(project_id, "facts"):
+            index = await self._load_fact_index(project_id)
+            await self.append_jsonl(file_path, fact.model_dump())
+
+            # Keep the fact index in step with facts.jsonl / 使事实索引与 facts.jsonl 保持同步
+            row = FactIndex.make_row(fact)
+            index.add(row)
+            await self._append_index_row(project_id, "facts", index, row)
+
+        self.bump_revision(project_id, "canon")
+
+    async def get_fact_index(self, project_id: str) -> FactIndex:
+        """
+        Get the MinHash/LSH fact index, rebuilding it if stale
+        获取 MinHash/LSH 事实索引，过期时重建
+
+        Args:
+            project_id: Project ID / 项目ID
+
+        Returns:
+            Fact index / 事实索引
+        """
+        async with self._index_lock(project_id, "facts"):
+            return await self._load_fact_index(project_id)
+
+    async def _load_fact_index(self, project_id: str) -> FactIndex:
+        """Fact index, with the facts lock held by the caller / 事实索引，调用方需持有事实锁"""
+        async def build_rows() -> List[Dict[str, Any]]:
+            return [FactIndex.make_row(f) for f in await self.get_all_facts(project_id)]
+
+        return await self._get_index(project_id, "facts", FactIndex, build_rows)
+
+    def _index_lock(self, project_id: str, kind: str) -> asyncio.Lock:
+        """Lock of a canon source and its index / 事实表源文件及其索引的锁"""
+        source_path, _, _ = self._index_paths(project_id, kind)
+        lock = CanonStorage._index_locks.get(source_path)
+        if lock is None:
+            lock = asyncio.Lock()
+            CanonStorage._index_locks[source_path] = lock
+        return lock
+
+    async def _get_index(
+        self,
+        project_id: str,
+        kind: str,
+        index_cls: Any,
+        build_rows: Callable[[], Awaitable[List[Dict[str, Any]]]]
+    ) -> Any:
+        """
+        Load a persisted canon index, rebuilding it if stale
+        加载持久化的事实表索引，过期时重建
+
+        The index of canon/<kind>.jsonl is persisted in canon/<kind>_index.jsonl;
+        its meta file records the source file size it covers, so edits made
+        outside the add_* methods trigger a rebuild.
+        canon/<kind>.jsonl 的索引持久化于 canon/<kind>_index.jsonl；元数据记录其覆盖的
+        源文件大小，因此绕过 add_* 方法的修改会触发重建。
+
+        Args:
+            project_id: Project ID / 项目ID
+            kind: Source name ("facts" or "timeline") / 源名称
+            index_cls: Index class / 索引类
+            build_rows: Builds all rows from the source / 从源数据构建全部行
+
+        Returns:
+            Index instance / 索引实例
+        """
+        source_path, index_path, meta_path = self._index_paths(project_id, kind)
+        source_size = source_path.stat().st_size if source_path.exists() else 0
+
+        cached = CanonStorage._indexes.get(source_path)
+        if cached and cached[0] == source_size:
+            return cached[1]
+
+        index = None
+        if meta_path.exists():
+            try:
+                meta = await self.read_yaml(meta_path) or {}
+                if meta.get("source_size") == source_size and meta.get("format") == index_cls.FORMAT:
+                    index = index_cls(await self.read_jsonl(index_path))
+            except Exception as e:
+                print(f"[CanonStorage] Failed to load {kind} index, rebuilding: {e}")
+                index = None
+
+        if index is None:
+            index = index_cls(await build_rows())
+            await self.write_text(
+                index_path,
+                "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in index.rows)
+            )
+            await self._save_index_meta(project_id, kind, index)
+
+        CanonStorage._indexes[source_path] = (source_size, index)
+        return index
+
+    def _index_paths(self, project_id: str, kind: str) -> Tuple[Path, Path, Path]:
+        """Paths of a canon source, its index and index meta / 事实表源文件、索引与索引元数据的路径"""
+        canon_dir = self.get_project_path(project_id) / "canon"
+        return (
+            canon_dir / f"{kind}.jsonl",
+            canon_dir / f"{kind}_index.jsonl",
+            canon_dir / f"{kind}_index.meta.yaml",
+        )
+
+    async def _append_index_row(self, project_id: str, kind: str, index: Any, row: Dict[str, Any]) -> None:
+        """Persist a row already added to the index / 持久化已加入索引的行"""
+        _, index_path, _ = self._index_paths(project_id, kind)
+        await self.append_jsonl(index_path, row)
+        await self._save_index_meta(project_id, kind, index)
+
+    async def _save_index_meta(self, project_id: str, kind: str, index: Any) -> None:
+        """Record which source size the index covers / 记录索引覆盖的源文件大小"""
+        source_path, _, meta_path = self._index_paths(project_id, kind)
+        source_size = source_path.stat().st_size if source_path.exists() else 0
+        await self.write_yaml(
+            meta_path,
+            {"source_size": source_size, "format": type(index).FORMAT, "rows": len(index.rows)}
+        )
+        CanonStorage._indexes[source_path] = (source_size, index)
     
     async def get_facts_by_chapter(
         self,
@@ -95,7 +226,40 @@ class CanonStorage(BaseStorage):
             event: Timeline event to add / 要添加的事件
         """
         file_path = self.get_project_path(project_id) / "canon" / "timeline.jsonl"
-        await self.append_jsonl(file_path, event.model_dump())
+        async with self._index_lock(project_id, "timeline"):
+            index = await self._load_timeline_index(project_id)
+            await self.append_jsonl(file_path, event.model_dump())
+
+            # Keep the timeline index in step with timeline.jsonl; ids are line
+            # numbers, so they are taken under the lock
+            # 使时间线索引与 timeline.jsonl 保持同步；ID 即行号，因此在锁内分配
+            row = TimelineIndex.make_row(event, len(index.rows))
+            index.add(row)
+            await self._append_index_row(project_id, "timeline", index, row)
+
+        self.bump_revision(project_id, "canon")
+
+    async def get_timeline_index(self, project_id: str) -> TimelineIndex:
+        """
+        Get the time/participant timeline index, rebuilding it if stale
+        获取按时间/参与者的时间线索引，过期时重建
+
+        Args:
+            project_id: Project ID / 项目ID
+
+        Returns:
+            Timeline index / 时间线索引
+        """
+        async with self._index_lock(project_id, "timeline"):
+            return await self._load_timeline_index(project_id)
+
+    async def _load_timeline_index(self, project_id: str) -> TimelineIndex:
+        """Timeline index, with the timeline lock held by the caller / 时间线索引，调用方需持有时间线锁"""
+        async def build_rows() -> List[Dict[str, Any]]:
+            events = await self.get_all_timeline_events(project_id)
+            return [TimelineIndex.make_row(e, i) for i, e in enumerate(events)]
+
+        return await self._get_index(project_id, "timeline", TimelineIndex, build_rows)
     
     async def get_timeline_events_by_chapter(
         self,
@@ -133,8 +297,19 @@ class CanonStorage(BaseStorage):
         - 若章节号无法解析，则回退取最近 max_events 条
         """
 
-        current_num = self._parse_chapter_number(chapter)
         all_events = await self.get_all_timeline_events(project_id)
+        return self.select_events_near_chapter(all_events, chapter, window, max_events)
+
+    def select_events_near_chapter(
+        self,
+        all_events: List[TimelineEvent],
+        chapter: str,
+        window: int = 3,
+        max_events: int = 10,
+    ) -> List[TimelineEvent]:
+        """Select events near a chapter from loaded events / 从已加载事件中选取邻近章节的事件"""
+
+        current_num = self._parse_chapter_number(chapter)
         if current_num is None:
             return all_events[-max_events:] if all_events else []
 
@@ -211,20 +386,15 @@ class CanonStorage(BaseStorage):
             "canon" / "character_state.jsonl"
         )
         await self.append_jsonl(file_path, state.model_dump())
+        self.bump_revision(project_id, "canon")
 
     def _normalize_text(self, text: str) -> str:
         """Normalize text for comparison / 文本归一化（用于比较）"""
-        if not text:
-            return ""
-        t = text.strip().lower()
-        t = re.sub(r"\s+", "", t)
-        t = re.sub(r"[\,\.;:!?，。；：！？\"'“”‘’]", "", t)
-        return t
+        return normalize_text(text)
 
     def _has_negation(self, text: str) -> bool:
         """Check if text contains negation cue / 判断文本是否包含否定线索"""
-        t = self._normalize_text(text)
-        return any(x in t for x in ["不是", "不", "没有", "无"])
+        return has_negation(self._normalize_text(text))
 
     def _maybe_contradict(self, a: str, b: str) -> bool:
         """Heuristic contradiction check / 启发式矛盾判断
@@ -234,6 +404,10 @@ class CanonStorage(BaseStorage):
         """
         na = self._normalize_text(a)
         nb = self._normalize_text(b)
+        return self._maybe_contradict_normalized(na, has_negation(na), nb, has_negation(nb))
+
+    def _maybe_contradict_normalized(self, na: str, neg_a: bool, nb: str, neg_b: bool) -> bool:
+        """Contradiction check on precomputed normalized text / 基于预计算归一化文本的矛盾判断"""
         if not na or not nb:
             return False
 
@@ -243,12 +417,10 @@ class CanonStorage(BaseStorage):
 
         # If one contains negation cue and shares long common substring, flag
         # 若一方有否定且共享较长公共片段，则认为可能冲突
-        if self._has_negation(na) != self._has_negation(nb):
+        if neg_a != neg_b:
             # Common prefix-ish overlap heuristic / 简单重叠判断
-            common = 0
-            for ch in na:
-                if ch in nb:
-                    common += 1
+            chars_b = set(nb)
+            common = sum(1 for ch in na if ch in chars_b)
             return common >= max(6, min(len(na), len(nb)) // 3)
 
         return False
@@ -279,28 +451,30 @@ class CanonStorage(BaseStorage):
 
         conflicts: List[str] = []
 
-        # Compare facts / 对比事实
-        existing_facts = await self.get_all_facts(project_id)
+        # Compare facts against near-duplicate candidates from the LSH index
+        # 仅与 LSH 索引给出的近似重复候选对比事实
+        fact_index = await self.get_fact_index(project_id)
         for nf in new_facts:
-            for ef in existing_facts:
-                if self._maybe_contradict(nf.statement, ef.statement):
+            norm = self._normalize_text(nf.statement)
+            neg = has_negation(norm)
+            for row in fact_index.candidates(norm):
+                if self._maybe_contradict_normalized(norm, neg, row["norm"], row["neg"]):
                     conflicts.append(
-                        f"[Fact Conflict] {nf.statement}  <->  {ef.statement} (from {ef.introduced_in})"
+                        f"[Fact Conflict] {nf.statement}  <->  {row['statement']} (from {row['introduced_in']})"
                     )
                     break
 
-        # Compare timeline / 对比时间线
-        existing_events = await self.get_all_timeline_events(project_id)
+        # Compare timeline: same normalized time joined with shared participants
+        # 对比时间线：按归一化时间与共同参与者做哈希连接
+        timeline_index = await self.get_timeline_index(project_id)
         for ne in new_timeline_events:
-            for ee in existing_events:
-                if self._normalize_text(ne.time) and self._normalize_text(ne.time) == self._normalize_text(ee.time):
-                    # Participant overlap / 参与者重叠
-                    if set(ne.participants or []).intersection(set(ee.participants or [])):
-                        if self._normalize_text(ne.location) != self._normalize_text(ee.location) or self._normalize_text(ne.event) != self._normalize_text(ee.event):
-                            conflicts.append(
-                                f"[Timeline Conflict] time={ne.time}, participants={ne.participants}: ({ne.event}@{ne.location}) <-> ({ee.event}@{ee.location}) (from {ee.source})"
-                            )
-                            break
+            new_row = TimelineIndex.make_row(ne, -1)
+            for row in timeline_index.candidates(new_row["time_key"], ne.participants or []):
+                if row["location_key"] != new_row["location_key"] or row["event_key"] != new_row["event_key"]:
+                    conflicts.append(
+                        f"[Timeline Conflict] time={ne.time}, participants={ne.participants}: ({ne.event}@{ne.location}) <-> ({row['event']}@{row['location']}) (from {row['source']})"
+                    )
+                    break
 
         # Compare character state / 对比角色状态
         current_num = self._parse_chapter_number(chapter)
@@ -0,0 +1,316 @@
+"""
+Canon Index / 事实表索引
+Persistent candidate indexes for canon conflict detection
+用于事实表冲突检测的持久化候选索引
+"""
+
+import hashlib
+import heapq
+import random
+import re
+from collections import Counter, defaultdict
+from typing import List, Dict, Any, Set, Tuple
+
+
+# Negation cues; removed before hashing so that a statement and its
+# negation land in the same LSH buckets
+# 否定线索；哈希前移除，使陈述与其否定形式落入相同的 LSH 桶
+NEGATION_CUES = ["不是", "没有", "不", "无"]
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for comparison / 文本归一化（用于比较）"""
+    if not text:
+        return ""
+    t = text.strip().lower()
+    t = re.sub(r"\s+", "", t)
+    t = re.sub(r"[\,\.;:!?，。；：！？\"'“”‘’]", "", t)
+    return t
+
+
+def has_negation(normalized: str) -> bool:
+    """Check if normalized text contains a negation cue / 判断归一化文本是否包含否定线索"""
+    return any(x in normalized for x in NEGATION_CUES)
+
+
+def _strip_negation(normalized: str) -> str:
+    """Normalized text without negation cues / 去除否定线索后的归一化文本"""
+    t = normalized
+    for cue in NEGATION_CUES:
+        t = t.replace(cue, "")
+    return t
+
+
+def subject_key(normalized: str) -> str:
+    """
+    Leading characters of a statement, standing in for its subject
+    陈述的开头字符，用作其主语的近似
+
+    Facts usually open with the entity they are about, and a negation keeps
+    the subject while rewording the rest.
+    事实通常以所述实体开头；否定形式保留主语而改写其余部分。
+    """
+    return _strip_negation(normalized)[:2]
+
+
+def _characters(normalized: str) -> Set[str]:
+    """
+    Characters of normalized text without negation cues
+    去除否定线索后的归一化文本字符集合
+
+    The contradiction heuristic compares shared characters, so the MinHash
+    estimates the Jaccard similarity of the same character sets.
+    矛盾启发式比较共有字符，因此 MinHash 估计的是同一字符集合的 Jaccard 相似度。
+    """
+    return set(_strip_negation(normalized))
+
+
+def _subject_bigrams(normalized: str) -> Set[str]:
+    """
+    Bigrams after the subject, each anchored to the subject
+    主语之后的二字分片，每个都锚定到主语
+
+    "张三有一把祖传的宝剑" yields "张三|祖传", "张三|宝剑", ...: a reworded
+    negation about the same entity shares one of its content words, while
+    other facts about that entity mostly do not.
+    "张三有一把祖传的宝剑" 产生 "张三|祖传"、"张三|宝剑" 等：关于同一实体的否定式
+    改写会共享其中某个实词，而该实体的其他事实大多不会。
+    """
+    t = _strip_negation(normalized)
+    subject = t[:2]
+    return {f"{subject}|{t[i:i + 2]}" for i in range(2, len(t) - 1)}
+
+
+# Universal hash permutations (a * x + b) mod p, fixed by seed so that
+# persisted signatures stay valid across processes
+# 通用哈希置换 (a * x + b) mod p，固定种子使持久化的签名跨进程有效
+_NUM_PERM = 80
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240611)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(_NUM_PERM)]
+
+
+def _stable_hash(shingle: str) -> int:
+    """64-bit hash that is stable across processes / 跨进程稳定的64位哈希"""
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _short_hash(text: str) -> str:
+    """Short hex digest used as a bucket key / 用作桶键的短十六进制摘要"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=6).hexdigest()
+
+
+class FactIndex:
+    """
+    MinHash/LSH index over normalized fact statements
+    基于归一化事实陈述的 MinHash/LSH 索引
+
+    Each row stores the fact id, normalized text, negation flag and its
+    bucket keys: the LSH band hashes of a MinHash signature over characters,
+    plus subject-anchored bigrams (see _subject_bigrams) for negated
+    rewordings that share few characters with the original (e.g.
+    "张三有一把祖传的宝剑" / "张三从来没有过什么祖传宝剑", Jaccard ~0.4).
+    每行保存事实ID、归一化文本、否定标记及其桶键：基于字符的 MinHash 签名的 LSH
+    分带哈希，以及锚定主语的二字分片（见 _subject_bigrams），用于与原句共有字符
+    较少的否定式改写（如上例，Jaccard 约 0.4）。
+
+    Only rows with the opposite negation flag can contradict a statement, so
+    buckets are split by the flag. Candidates are ranked by shared bucket
+    keys and capped at MAX_CANDIDATES, so a lookup returns a bounded set even
+    when a large share of the canon is about one character.
+    只有否定标记相反的行才可能与陈述矛盾，因此桶按该标记划分。候选按共享桶键数
+    排序并截断至 MAX_CANDIDATES，即使事实表中很大比例关于同一角色，查询返回的
+    候选数也有上界。
+    """
+
+    # Bump when the row layout changes; stale index files are rebuilt
+    # 行结构变化时递增；旧索引文件会被重建
+    FORMAT = 3
+
+    NUM_PERM = _NUM_PERM
+    BANDS = 20
+    ROWS = NUM_PERM // BANDS
+    MAX_CANDIDATES = 64
+
+    def __init__(self, rows: List[Dict[str, Any]] = None):
+        """
+        Build index from stored rows
+
+        Args:
+            rows: Index rows (see make_row) / 索引行（见 make_row）
+        """
+        self.rows: List[Dict[str, Any]] = []
+        self._buckets: Dict[Tuple[bool, str], List[int]] = defaultdict(list)
+        for row in rows or []:
+            self._insert(row)
+
+    @classmethod
+    def signature(cls, normalized: str) -> List[int]:
+        """
+        MinHash signature of normalized text / 归一化文本的 MinHash 签名
+
+        Args:
+            normalized: Normalized text / 归一化文本
+
+        Returns:
+            Signature of NUM_PERM values / 长度为 NUM_PERM 的签名
+        """
+        hashes = [_stable_hash(s) for s in _characters(normalized)]
+        if not hashes:
+            return [_PRIME] * cls.NUM_PERM
+        return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS]
+
+    @classmethod
+    def bucket_keys(cls, normalized: str) -> List[str]:
+        """
+        Bucket keys of normalized text / 归一化文本的桶键
+
+        Args:
+            normalized: Normalized text / 归一化文本
+
+        Returns:
+            Band hashes followed by subject-anchored bigram hashes / 分带哈希，其后为锚定主语的二字分片哈希
+        """
+        sig = cls.signature(normalized)
+        keys = [
+            f"{band}:" + _short_hash(",".join(str(v) for v in sig[band * cls.ROWS:(band + 1) * cls.ROWS]))
+            for band in range(cls.BANDS)
+        ]
+        keys.extend("s:" + _short_hash(anchored) for anchored in sorted(_subject_bigrams(normalized)))
+        return keys
+
+    @classmethod
+    def make_row(cls, fact: Any) -> Dict[str, Any]:
+        """
+        Precompute the index row of a fact / 预计算事实的索引行
+
+        Args:
+            fact: Fact object / 事实对象
+
+        Returns:
+            Row with id, norm, neg, keys, statement, introduced_in
+            包含 id、norm、neg、keys、statement、introduced_in 的行
+        """
+        norm = normalize_text(fact.statement)
+        return {
+            "id": fact.id,
+            "norm": norm,
+            "neg": has_negation(norm),
+            "keys": cls.bucket_keys(norm),
+            "statement": fact.statement,
+            "introduced_in": fact.introduced_in,
+        }
+
+    def add(self, row: Dict[str, Any]) -> None:
+        """Add a precomputed row / 添加预计算的行"""
+        self._insert(row)
+
+    def candidates(self, normalized: str) -> List[Dict[str, Any]]:
+        """
+        Rows of opposite negation sharing the most bucket keys with the text
+        与文本共享桶键最多、否定标记相反的行
+
+        Args:
+            normalized: Normalized query text / 归一化查询文本
+
+        Returns:
+            At most MAX_CANDIDATES rows, in insertion order / 至多 MAX_CANDIDATES 行（按插入顺序）
+        """
+        opposite = not has_negation(normalized)
+        shared: Counter = Counter()
+        for key in self.bucket_keys(normalized):
+            shared.update(self._buckets.get((opposite, key), ()))
+        best = heapq.nsmallest(self.MAX_CANDIDATES, shared, key=lambda i: (-shared[i], i))
+        return [self.rows[i] for i in sorted(best)]
+
+    def _insert(self, row: Dict[str, Any]) -> None:
+        """Insert row into the buckets of its negation flag / 将行插入其否定标记对应的桶"""
+        position = len(self.rows)
+        self.rows.append(row)
+        for key in row["keys"]:
+            self._buckets[(row["neg"], key)].append(position)
+
+
+class TimelineIndex:
+    """
+    Hash index over timeline events by normalized time and participant
+    按归一化时间与参与者建立的时间线事件哈希索引
+
+    Events are identified by their line number in timeline.jsonl. Normalized
+    time, location and event text are computed once when a row is made, so a
+    conflict check is a time-key lookup intersected with participant postings.
+    事件以其在 timeline.jsonl 中的行号标识。归一化的时间、地点与事件文本在建行时
+    计算一次，冲突检查即时间键查找与参与者倒排表求交。
+    """
+
+    # Bump when the row layout changes; stale index files are rebuilt
+    # 行结构变化时递增；旧索引文件会被重建
+    FORMAT = 1
+
+    def __init__(self, rows: List[Dict[str, Any]] = None):
+        """
+        Build postings from stored rows
+
+        Args:
+            rows: Index rows (see make_row) / 索引行（见 make_row）
+        """
+        self.rows: List[Dict[str, Any]] = []
+        self.by_time: Dict[str, List[int]] = defaultdict(list)
+        self.by_participant: Dict[str, List[int]] = defaultdict(list)
+        for row in rows or []:
+            self.add(row)
+
+    @staticmethod
+    def make_row(event: Any, event_id: int) -> Dict[str, Any]:
+        """
+        Precompute the index row of a timeline event / 预计算时间线事件的索引行
+
+        Args:
+            event: Timeline event / 时间线事件
+            event_id: Line number in timeline.jsonl / 在 timeline.jsonl 中的行号
+
+        Returns:
+            Row with normalized keys and the original fields / 包含归一化键与原始字段的行
+        """
+        return {
+            "id": event_id,
+            "time_key": normalize_text(event.time),
+            "location_key": normalize_text(event.location),
+            "event_key": normalize_text(event.event),
+            "participants": list(event.participants or []),
+            "time": event.time,
+            "event": event.event,
+            "location": event.location,
+            "source": event.source,
+        }
+
+    def add(self, row: Dict[str, Any]) -> None:
+        """Add a precomputed row / 添加预计算的行"""
+        position = len(self.rows)
+        self.rows.append(row)
+        if row["time_key"]:
+            self.by_time[row["time_key"]].append(position)
+        for participant in set(row["participants"]):
+            self.by_participant[participant].append(position)
+
+    def candidates(self, time_key: str, participants: List[str]) -> List[Dict[str, Any]]:
+        """
+        Events at the same normalized time sharing a participant, in insertion order
+        同一归一化时间且有共同参与者的事件（按插入顺序）
+
+        Args:
+            time_key: Normalized time / 归一化时间
+            participants: Participant names / 参与者名称
+
+        Returns:
+            Candidate rows / 候选行
+        """
+        at_time = self.by_time.get(time_key) if time_key else None
+        if not at_time:
+            return []
+
+        shared: Set[int] = set()
+        for participant in set(participants or []):
+            shared.update(self.by_participant.get(participant, ()))
+
+        return [self.rows[i] for i in sorted(shared.intersection(at_time))]
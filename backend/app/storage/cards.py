@@ -57,6 +57,7 @@ class CardStorage(BaseStorage):
         )
         
         await self.write_yaml(file_path, card.model_dump())
+        self.bump_revision(project_id, "cards")
     
     async def list_character_cards(self, project_id: str) -> List[str]:
         """
@@ -102,6 +103,7 @@ class CardStorage(BaseStorage):
         
         if file_path.exists():
             file_path.unlink()
+            self.bump_revision(project_id, "cards")
             return True
         return False
     
@@ -149,6 +151,7 @@ class CardStorage(BaseStorage):
         )
         
         await self.write_yaml(file_path, card.model_dump())
+        self.bump_revision(project_id, "cards")
     
     async def list_world_cards(self, project_id: str) -> List[str]:
         """
@@ -209,6 +212,7 @@ class CardStorage(BaseStorage):
         )
         
         await self.write_yaml(file_path, card.model_dump())
+        self.bump_revision(project_id, "cards")
     
     async def get_rules_card(self, project_id: str) -> Optional[RulesCard]:
         """
@@ -249,3 +253,4 @@ class CardStorage(BaseStorage):
         )
         
         await self.write_yaml(file_path, card.model_dump())
+        self.bump_revision(project_id, "cards")
@@ -133,6 +133,7 @@ class DraftStorage(BaseStorage):
             "drafts" / chapter / f"draft_{version}.meta.yaml"
         )
         await self.write_yaml(meta_path, draft.model_dump(mode='json'))
+        self.bump_revision(project_id, "drafts")
         
         return draft
     
@@ -321,6 +322,7 @@ class DraftStorage(BaseStorage):
             "summaries" / f"{summary.chapter}_summary.yaml"
         )
         await self.write_yaml(file_path, summary.model_dump())
+        self.bump_revision(project_id, "summaries")
     
     async def get_chapter_summary(
         self,
@@ -398,6 +400,10 @@ class DraftStorage(BaseStorage):
             summary_path.unlink()
             deleted_any = True
 
+        if deleted_any:
+            self.bump_revision(project_id, "drafts")
+            self.bump_revision(project_id, "summaries")
+
         return deleted_any
 
     async def select_previous_summaries(
@@ -534,6 +540,40 @@ class DraftStorage(BaseStorage):
 
         return selected_far, selected_mid, selected_near
 
+    async def list_chapter_summaries(
+        self,
+        project_id: str,
+        before: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """List chapter summaries in chapter order / 按章节顺序列出章节摘要
+
+        Args:
+            project_id: Project ID / 项目ID
+            before: Only chapters numbered below this / 仅章节号小于该值的章节
+
+        Returns:
+            [{"chapter", "title", "summary"}], the input of ContextCompressor
+            [{"chapter", "title", "summary"}]，即 ContextCompressor 的输入
+        """
+        pairs = []
+        for ch in await self.list_chapters(project_id):
+            n = self._parse_chapter_number(ch)
+            if n is None or (before is not None and n >= before):
+                continue
+            pairs.append((n, ch))
+        pairs.sort(key=lambda x: x[0])
+
+        summaries = []
+        for _, ch in pairs:
+            summary = await self.get_chapter_summary(project_id, ch)
+            if summary:
+                summaries.append({
+                    "chapter": ch,
+                    "title": summary.title,
+                    "summary": summary.brief_summary,
+                })
+        return summaries
+
     async def save_conflict_report(
         self,
         project_id: str,
@@ -0,0 +1,96 @@
+"""
+Session State Storage / 会话状态存储
+Per-chapter session checkpoints under the project's traces/ directory
+项目 traces/ 目录下按章节保存的会话检查点
+"""
+
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from app.storage.base import BaseStorage
+
+
+class SessionStateStorage(BaseStorage):
+    """
+    Checkpoints written by the orchestrator after every stage
+    调度器在每个阶段之后写入的检查点
+    """
+
+    def _checkpoint_path(self, project_id: str, chapter: str) -> Path:
+        """Checkpoint file of a chapter / 章节的检查点文件"""
+        return self.get_project_path(project_id) / "traces" / "sessions" / f"{chapter}.yaml"
+
+    async def save_checkpoint(
+        self,
+        project_id: str,
+        chapter: str,
+        state: Dict[str, Any]
+    ) -> None:
+        """
+        Save a session checkpoint / 保存会话检查点
+
+        Written to a temporary file and renamed, so a crash mid-write keeps
+        the previous checkpoint.
+        先写入临时文件再重命名，写入中途崩溃时保留上一个检查点。
+
+        Args:
+            project_id: Project ID / 项目ID
+            chapter: Chapter ID / 章节ID
+            state: Checkpoint record / 检查点记录
+        """
+        file_path = self._checkpoint_path(project_id, chapter)
+        tmp_path = file_path.with_suffix(".yaml.tmp")
+        await self.write_yaml(tmp_path, state)
+        os.replace(tmp_path, file_path)
+
+    async def get_checkpoint(
+        self,
+        project_id: str,
+        chapter: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get a session checkpoint / 获取会话检查点
+
+        Args:
+            project_id: Project ID / 项目ID
+            chapter: Chapter ID / 章节ID
+
+        Returns:
+            Checkpoint record or None / 检查点记录或None
+        """
+        file_path = self._checkpoint_path(project_id, chapter)
+        if not file_path.exists():
+            return None
+        return await self.read_yaml(file_path)
+
+    async def list_checkpoints(self, project_id: str) -> List[Dict[str, Any]]:
+        """
+        Checkpoints of a project / 项目的所有检查点
+
+        Args:
+            project_id: Project ID / 项目ID
+
+        Returns:
+            Checkpoint records / 检查点记录列表
+        """
+        directory = self.get_project_path(project_id) / "traces" / "sessions"
+        if not directory.exists():
+            return []
+        return [await self.read_yaml(path) for path in sorted(directory.glob("*.yaml"))]
+
+    async def delete_checkpoint(self, project_id: str, chapter: str) -> bool:
+        """
+        Delete a session checkpoint / 删除会话检查点
+
+        Args:
+            project_id: Project ID / 项目ID
+            chapter: Chapter ID / 章节ID
+
+        Returns:
+            Whether a checkpoint was deleted / 是否删除了检查点
+        """
+        file_path = self._checkpoint_path(project_id, chapter)
+        if not file_path.exists():
+            return False
+        file_path.unlink()
+        return True
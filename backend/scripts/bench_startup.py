@@ -0,0 +1,145 @@
+"""
+Startup Benchmark / 启动基准测试
+Import cost of the backend and cold start to the first /health response
+后端的导入耗时，以及从冷启动到首个 /health 响应的时间
+
+Run from backend/ / 在 backend/ 目录下运行:
+
+    python scripts/bench_startup.py --runs 5
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Modules worth knowing about when they show up at startup / 启动时出现即值得关注的模块
+WATCHED_MODULES = ("openai", "anthropic", "httpx", "yaml", "sqlite3")
+
+
+def measure_imports(target: str) -> Tuple[float, Dict[str, float], List[str]]:
+    """
+    Import target under python -X importtime / 在 python -X importtime 下导入目标模块
+
+    Args:
+        target: Module to import / 要导入的模块
+
+    Returns:
+        (total seconds, self time per top-level package, watched modules loaded)
+        (总秒数, 按顶层包汇总的自身耗时, 已加载的关注模块)
+    """
+    code = (
+        f"import sys, {target}; "
+        f"print(','.join(m for m in {WATCHED_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    total = 0.0
+    by_package: Dict[str, float] = defaultdict(float)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if not fields[0].strip().isdigit():
+            continue  # header line / 表头行
+        self_us, cumulative_us, name = int(fields[0]), int(fields[1]), fields[2]
+        by_package[name.strip().split(".")[0]] += self_us / 1e6
+        if name.strip() == target:
+            total = cumulative_us / 1e6
+
+    loaded = [m for m in result.stdout.strip().split(",") if m]
+    return total, dict(by_package), loaded
+
+
+def _free_port() -> int:
+    """Unused local TCP port / 未占用的本地 TCP 端口"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_cold_start(app: str, timeout: float) -> float:
+    """
+    Seconds from spawning uvicorn to the first successful /health
+    从启动 uvicorn 进程到首个成功的 /health 响应的秒数
+
+    Args:
+        app: ASGI application path / ASGI 应用路径
+        timeout: Give up after this many seconds / 超过该秒数则放弃
+
+    Returns:
+        Elapsed seconds / 耗时秒数
+    """
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {process.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError, OSError):
+                time.sleep(0.01)
+        raise TimeoutError(f"No /health response within {timeout:.0f}s")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main() -> None:
+    """Run the benchmark / 运行基准测试"""
+    parser = argparse.ArgumentParser(description="NOVIX backend startup benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="cold starts to measure")
+    parser.add_argument("--module", default="app.main", help="module to import-profile")
+    parser.add_argument("--app", default="app.main:app", help="ASGI app for the cold start")
+    parser.add_argument("--top", type=int, default=10, help="packages to list by import time")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    total, by_package, loaded = measure_imports(args.module)
+    print(f"import {args.module}: {total * 1000:.0f} ms")
+    print(f"watched modules loaded: {', '.join(loaded) or 'none'}")
+    print(f"top {args.top} packages by self import time:")
+    for name, seconds in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {name:<24} {seconds * 1000:8.1f} ms")
+
+    samples = [measure_cold_start(args.app, args.timeout) for _ in range(args.runs)]
+    print(
+        f"cold start to first /health over {len(samples)} runs: "
+        f"min {min(samples) * 1000:.0f} ms, "
+        f"median {statistics.median(samples) * 1000:.0f} ms, "
+        f"max {max(samples) * 1000:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+"""
+Test setup / 测试配置
+Makes the backend package importable when pytest runs from the repository root
+从仓库根目录运行 pytest 时使 backend 包可被导入
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,109 @@
+"""
+Canon index tests / 事实表索引测试
+Fact candidates must keep the recall of the pairwise contradiction heuristic on
+negation pairs while staying bounded on a canon dominated by one character
+事实候选在否定配对上必须保持两两矛盾启发式的召回率，且在以单个角色为主的事实表上保持有界
+"""
+
+import asyncio
+import random
+
+import pytest
+
+from app.schemas.canon import Fact
+from app.storage import CanonStorage
+from app.storage.canon_index import FactIndex, has_negation, normalize_text
+
+
+# (existing fact, new contradicting fact) / （已有事实，新的矛盾事实）
+NEGATION_PAIRS = [
+    ("王老三欠了赌坊五百两银子", "王老三没有欠赌坊的钱"),
+    ("李明是青云派的弟子", "李明不是青云派弟子"),
+    ("林婉儿会青云剑法和轻功", "林婉儿不会青云剑法和轻功"),
+    ("青云山的山门每晚子时关闭", "青云山的山门每晚子时都不关闭"),
+    ("张三有一把祖传的宝剑", "张三从来没有过什么祖传宝剑"),
+    ("镇上的药铺只卖草药和丹药", "镇上的药铺不卖草药和丹药"),
+    ("赵四在十年前离开了京城", "赵四十年前没有离开京城"),
+    ("苏瑶的父亲是朝廷的宰相", "苏瑶的父亲不是宰相"),
+    ("五百两银子是王老三欠赌坊的", "王老三没有欠赌坊五百两银子"),
+]
+
+# Unrelated facts so candidates come from buckets, not a tiny index
+# 无关事实，使候选来自分桶而非极小的索引
+FILLER = [f"第{i}号角色在第{i % 7}章去过第{i % 13}号地点并见过掌柜" for i in range(300)]
+
+
+def skewed_canon(size, seed=7):
+    """
+    Synthetic canon where 30% of facts are about the protagonist and 10% are negated
+    合成事实表：30% 的事实关于主角，10% 为否定
+    """
+    rng = random.Random(seed)
+    names = ["李明"] * 30 + ["林婉儿"] * 15 + ["苏瑶"] * 10 + ["赵四"] * 7 + [
+        "陈长老", "周掌柜", "孙大夫", "吴捕头", "郑姑娘", "钱公子", "冯师兄", "蒋镖头",
+    ] * 5
+    verbs = ["去过", "住在", "见过", "打败了", "喜欢", "认识", "讨厌", "拜访了", "离开了", "守护着"]
+    objects = [
+        "青云山", "京城", "赌坊", "药铺", "客栈", "后山的山洞", "城南的铁匠铺", "江边渡口",
+        "藏经阁", "一把古剑", "一本秘籍", "一匹白马", "一块玉佩",
+    ]
+    times = ["三年前", "昨天夜里", "去年冬天", "小时候", "上个月", ""]
+    statements = []
+    for _ in range(size):
+        name = rng.choice(names)
+        negation = "没有" if rng.random() < 0.1 else ""
+        statements.append(f"{name}{rng.choice(times)}{negation}{rng.choice(verbs)}{rng.choice(objects)}")
+    return statements
+
+
+def fact(fact_id, statement):
+    return Fact(id=fact_id, statement=statement, source="ch01", confidence=1.0, introduced_in="ch01")
+
+
+@pytest.fixture(scope="module")
+def skewed_index():
+    rows = [FactIndex.make_row(fact(f"F{i}", s)) for i, s in enumerate(skewed_canon(4000))]
+    rows += [FactIndex.make_row(fact(f"X{i}", existing)) for i, (existing, _) in enumerate(NEGATION_PAIRS)]
+    return FactIndex(rows)
+
+
+@pytest.mark.parametrize("existing, new", NEGATION_PAIRS)
+def test_negation_pairs_are_candidates(existing, new):
+    storage = CanonStorage("/nonexistent")
+    assert storage._maybe_contradict(existing, new)
+
+    rows = [FactIndex.make_row(fact(f"F{i}", s)) for i, s in enumerate(FILLER)]
+    index = FactIndex(rows + [FactIndex.make_row(fact("X", existing))])
+
+    assert "X" in [row["id"] for row in index.candidates(normalize_text(new))]
+
+
+@pytest.mark.parametrize("i", range(len(NEGATION_PAIRS)))
+def test_negation_pairs_survive_skewed_canon(skewed_index, i):
+    candidates = skewed_index.candidates(normalize_text(NEGATION_PAIRS[i][1]))
+    assert f"X{i}" in [row["id"] for row in candidates]
+    assert len(candidates) <= FactIndex.MAX_CANDIDATES
+
+
+@pytest.mark.parametrize("query", ["李明昨天夜里没有去过青云山", "李明见过京城", "蒋镖头没有喜欢一匹白马"])
+def test_candidates_are_bounded_on_skewed_canon(skewed_index, query):
+    norm = normalize_text(query)
+    candidates = skewed_index.candidates(norm)
+    assert len(candidates) <= FactIndex.MAX_CANDIDATES
+    # Only opposite negation can contradict / 只有否定相反的事实才可能矛盾
+    assert all(row["neg"] != has_negation(norm) for row in candidates)
+
+
+def test_detect_conflicts_flags_negation_pairs(tmp_path):
+    storage = CanonStorage(str(tmp_path))
+
+    async def run():
+        for i, statement in enumerate(FILLER[:50]):
+            await storage.add_fact("p", fact(f"F{i}", statement))
+        for i, (existing, _) in enumerate(NEGATION_PAIRS):
+            await storage.add_fact("p", fact(f"X{i}", existing))
+        new_facts = [fact(f"N{i}", new) for i, (_, new) in enumerate(NEGATION_PAIRS)]
+        return await storage.detect_conflicts("p", "ch02", new_facts, [], [])
+
+    report = asyncio.run(run())
+    assert len(report["conflicts"]) == len(NEGATION_PAIRS)
@@ -0,0 +1,89 @@
+"""
+Context compressor tests / 上下文压缩器测试
+The far-chapter digest stays near its target however many chapters there are,
+and within the summary budget of the selector
+远章摘要的长度无论章节多少都保持在目标附近，并受选择器的摘要预算约束
+"""
+
+import asyncio
+import re
+
+import pytest
+
+from app.context_engine.compressor import CompressionCache, ContextCompressor
+from app.context_engine.selector import ContextSelector
+from app.schemas.draft import ChapterSummary
+from app.storage import CanonStorage, CardStorage, DraftStorage
+
+
+class FakeGateway:
+    """Gateway answering compressions with a multiple of the requested length / 按要求长度的倍数返回压缩结果的网关"""
+
+    def __init__(self, overshoot=1):
+        self.providers = {}
+        self.calls = 0
+        self.overshoot = overshoot
+
+    def get_provider_for_agent(self, agent):
+        return "fake"
+
+    def get_temperature_for_agent(self, agent):
+        return 0.3
+
+    async def chat(self, messages, **kwargs):
+        self.calls += 1
+        target = int(re.search(r"approximately (\d+) characters", messages[-1]["content"]).group(1))
+        return {"content": "压" * (target * self.overshoot)}
+
+
+def summaries(count):
+    return [
+        {"chapter": f"ch{n:02d}", "title": f"第{n}章", "summary": "情节" * 100}
+        for n in range(1, count + 1)
+    ]
+
+
+def test_digest_is_bounded_by_target(tmp_path):
+    gateway = FakeGateway()
+    compressor = ContextCompressor(gateway, cache=CompressionCache(str(tmp_path / "cache.json")))
+
+    digest = asyncio.run(compressor.compress_summaries(summaries(100), 600))
+    assert len(digest) <= 600
+
+
+def test_stable_blocks_are_reused(tmp_path):
+    gateway = FakeGateway()
+    compressor = ContextCompressor(gateway, cache=CompressionCache(str(tmp_path / "cache.json")))
+
+    asyncio.run(compressor.compress_summaries(summaries(40), 600))
+    first = gateway.calls
+    # One more chapter: only the recent part and the final pass are new
+    # 多一章：只有近期部分与最后一轮是新的
+    asyncio.run(compressor.compress_summaries(summaries(41), 600))
+    assert gateway.calls - first <= 2
+
+
+@pytest.mark.parametrize("budget", [3000, 1500, 900])
+def test_selector_counts_digest_against_budget(tmp_path, budget):
+    data_dir = str(tmp_path)
+    drafts = DraftStorage(data_dir)
+    # LLM output three times longer than asked / 大模型输出为要求长度的三倍
+    compressor = ContextCompressor(
+        FakeGateway(overshoot=3), cache=CompressionCache(str(tmp_path / "cache.json"))
+    )
+    selector = ContextSelector(CardStorage(data_dir), CanonStorage(data_dir), drafts, compressor=compressor)
+    selector.summary_max_chars = budget
+
+    async def run():
+        for n in range(1, 31):
+            chapter = f"ch{n:02d}"
+            await drafts.save_final_draft("p", chapter, "正文")
+            await drafts.save_chapter_summary("p", ChapterSummary(
+                chapter=chapter, title=f"第{n}章", word_count=2, key_events=["事件"] * 3,
+                new_facts=[], character_state_changes=[], open_loops=[], brief_summary="摘要" * 100,
+            ))
+        return await selector._load_summaries("p", "ch31")
+
+    blocks = asyncio.run(run())
+    assert blocks[0].startswith("Earlier Chapters")
+    assert sum(len(block) for block in blocks) <= budget
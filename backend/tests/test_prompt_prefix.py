@@ -0,0 +1,135 @@
+"""
+Prompt prefix tests / 提示前缀测试
+Requests sent through the local stub server keep a byte-identical cacheable prefix
+经由本地桩服务器发送的请求保持字节级一致的可缓存前缀
+"""
+
+import asyncio
+import json
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+
+from app.config import config
+from app.llm_gateway import reset_gateway, get_gateway
+from app.llm_gateway.stub_server import create_stub_app
+from app.storage import CardStorage, CanonStorage, DraftStorage
+from app.schemas.card import CharacterCard, WorldCard, StyleCard
+from app.schemas.draft import SceneBrief
+from app.context_engine import ContextSelector
+from app.agents import WriterAgent, ReviewerAgent
+
+
+@pytest.fixture
+def stub_requests(monkeypatch):
+    """
+    Run the stub server on a free port with the openai provider pointed at it
+    在空闲端口运行桩服务器，并将 openai 提供商指向它
+
+    Yields the JSON bodies of the chat completion requests it received.
+    产出其收到的聊天补全请求的 JSON 请求体。
+    """
+    simulated = config["llm"]["providers"]["simulated"]
+    monkeypatch.setitem(simulated, "ttft", 0.0)
+    monkeypatch.setitem(simulated, "ttft_jitter", 0.0)
+    monkeypatch.setitem(simulated, "tokens_per_second", 100000)
+
+    bodies = []
+    app = create_stub_app()
+
+    @app.middleware("http")
+    async def record(request, call_next):
+        if request.url.path == "/v1/chat/completions":
+            bodies.append(json.loads(await request.body()))
+        return await call_next(request)
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    openai = config["llm"]["providers"]["openai"]
+    monkeypatch.setitem(openai, "api_key", "stub")
+    monkeypatch.setitem(openai, "base_url", f"http://127.0.0.1:{port}/v1")
+    monkeypatch.setitem(config["llm"]["usage_ledger"], "enabled", False)
+    monkeypatch.setenv("NOVIX_LLM_PROVIDER", "openai")
+    reset_gateway()
+
+    yield bodies
+
+    server.should_exit = True
+    thread.join(timeout=5)
+    reset_gateway()
+
+
+def prefix_bytes(body, stable_count):
+    """Serialized system prompt and context segments / 系统提示与上下文分段的序列化字节"""
+    return json.dumps(body["messages"][:stable_count], ensure_ascii=False).encode("utf-8")
+
+
+def test_writer_and_reviewer_prefixes_are_byte_identical(stub_requests, tmp_path):
+    data_dir = str(tmp_path)
+    card_storage = CardStorage(data_dir)
+    canon_storage = CanonStorage(data_dir)
+    draft_storage = DraftStorage(data_dir)
+
+    async def run():
+        await card_storage.save_character_card(
+            "p", CharacterCard(name="李明", identity="学生", motivation="找妹妹")
+        )
+        await card_storage.save_world_card(
+            "p", WorldCard(name="青云山", category="location", description="终年云雾的山")
+        )
+        await card_storage.save_style_card(
+            "p", StyleCard(narrative_distance="近", pacing="快", sentence_structure="短句")
+        )
+
+        selector = ContextSelector(card_storage, canon_storage, draft_storage)
+        snapshot = await selector.build_snapshot("p", "ch01", chapter_goal="李明上青云山")
+        gateway = get_gateway()
+        writer = WriterAgent(gateway, card_storage, canon_storage, draft_storage)
+        reviewer = ReviewerAgent(gateway, card_storage, canon_storage, draft_storage)
+
+        # Two iterations with different goals and drafts: only the volatile tail changes
+        # 两次迭代使用不同的目标与草稿：只有易变的尾部发生变化
+        for goal in ("李明上青云山", "李明在青云山遇到大雾"):
+            brief = SceneBrief(chapter="ch01", title="开端", goal=goal, style_reminder="短句")
+            result = await writer.execute("p", "ch01", {
+                "scene_brief": brief,
+                "chapter_goal": goal,
+                "target_word_count": 300,
+                "snapshot": snapshot,
+            })
+            assert result["success"]
+            result = await reviewer.execute("p", "ch01", {"draft_version": "v1", "snapshot": snapshot})
+            assert result["success"]
+
+        layout = writer.build_messages("", "", context_blocks=snapshot.blocks)
+        return writer.get_system_prompt(), sum(1 for m in layout if m.get("cache_breakpoint"))
+
+    writer_prompt, stable_count = asyncio.run(run())
+    assert stable_count > 1
+
+    writer_bodies = [b for b in stub_requests if b["messages"][0]["content"] == writer_prompt]
+    reviewer_bodies = [b for b in stub_requests if b["messages"][0]["content"] != writer_prompt]
+    assert len(writer_bodies) >= 2
+    assert len(reviewer_bodies) >= 2
+
+    # Same agent: system prompt plus context segments are byte-identical
+    # 同一 Agent：系统提示加上下文分段字节级一致
+    for bodies in (writer_bodies, reviewer_bodies):
+        assert len({prefix_bytes(b, stable_count) for b in bodies}) == 1
+        assert bodies[0]["messages"][0]["role"] == "system"
+
+    # Across agents: the context segments after the system prompt are byte-identical too
+    # 跨 Agent：系统提示之后的上下文分段同样字节级一致
+    writer_segments = json.dumps(writer_bodies[0]["messages"][1:stable_count], ensure_ascii=False)
+    reviewer_segments = json.dumps(reviewer_bodies[0]["messages"][1:stable_count], ensure_ascii=False)
+    assert writer_segments == reviewer_segments
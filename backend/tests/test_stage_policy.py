@@ -0,0 +1,104 @@
+"""
+Stage policy tests / 阶段策略测试
+The editor is skipped only when a parsed review leaves nothing to fix
+仅当已解析的审稿无需修改时才跳过编辑
+"""
+
+import asyncio
+
+from app.agents.reviewer import ReviewerAgent
+from app.orchestrator.stage_policy import StagePolicy
+from app.schemas.draft import Issue, ReviewResult
+from app.storage import CanonStorage, CardStorage, DraftStorage
+
+
+def _review(issues=None, can_proceed=True, parse_failed=False) -> ReviewResult:
+    return ReviewResult(
+        chapter="ch01",
+        draft_version="v1",
+        issues=issues or [],
+        overall_assessment="",
+        can_proceed=can_proceed,
+        parse_failed=parse_failed,
+    )
+
+
+def _reviewer(tmp_path) -> ReviewerAgent:
+    data_dir = str(tmp_path)
+    return ReviewerAgent(None, CardStorage(data_dir), CanonStorage(data_dir), DraftStorage(data_dir))
+
+
+def test_clean_review_skips_editor():
+    run, _ = StagePolicy().decide("edit", review=_review())
+    assert not run
+
+
+def test_issues_over_threshold_run_editor():
+    issue = Issue(severity="moderate", category="pacing", location="", problem="slow", suggestion="")
+    run, reason = StagePolicy().decide("edit", review=_review([issue]))
+    assert run and "moderate" in reason
+
+
+def test_unparsed_review_runs_editor(tmp_path):
+    review = _reviewer(tmp_path)._parse_review("issues: [unclosed", "ch01", "v1")
+    assert review.parse_failed
+    assert review.issues == []
+
+    run, reason = StagePolicy().decide("edit", review=review)
+    assert run
+    assert reason == "review could not be parsed"
+
+
+def test_parsed_review_is_not_marked_failed(tmp_path):
+    content = "```yaml\nissues: []\noverall_assessment: ok\ncan_proceed: true\n```"
+    review = _reviewer(tmp_path)._parse_review(content, "ch01", "v1")
+    assert not review.parse_failed
+    assert StagePolicy().decide("edit", review=review) == (
+        False, "review has 0 critical and 0 moderate issues"
+    )
+
+
+def _incremental_review(tmp_path, previous: ReviewResult, reply: str):
+    """
+    Run an incremental review of v2 over a stored review of v1
+    在已保存的 v1 审稿之上对 v2 进行增量审稿
+
+    Returns:
+        (review, paragraphs the LLM was asked to focus on) / （审稿结果, 要求大模型聚焦的段落）
+    """
+    reviewer = _reviewer(tmp_path)
+    calls = []
+
+    async def generate(**kwargs):
+        calls.append(kwargs.get("focus"))
+        return reply
+
+    reviewer._generate_review = generate
+
+    async def run():
+        drafts = reviewer.draft_storage
+        await drafts.save_draft("p", "ch01", "v1", "第一段。\n\n第二段。\n\n第三段。", 12)
+        await drafts.save_draft("p", "ch01", "v2", "第一段。\n\n第二段改写。\n\n第三段。", 14)
+        await drafts.save_review("p", "ch01", previous)
+        result = await reviewer.execute("p", "ch01", {"draft_version": "v2", "incremental": True})
+        return result["review"]
+
+    return asyncio.run(run()), calls[0]
+
+
+def test_incremental_parse_failure_runs_editor(tmp_path):
+    review, focus = _incremental_review(tmp_path, _review(), "issues: [unclosed")
+    assert focus is not None
+    assert review.parse_failed
+
+    run, reason = StagePolicy().decide("edit", review=review, user_feedback="")
+    assert run and reason == "review could not be parsed"
+
+
+def test_unparsed_previous_review_triggers_full_review(tmp_path):
+    review, focus = _incremental_review(
+        tmp_path, _review(parse_failed=True), "issues: []\noverall_assessment: ok\ncan_proceed: true"
+    )
+    assert focus is None
+    assert not review.parse_failed
+    assert StagePolicy().decide("edit", review=review)[0] is False
@@ -41,9 +41,44 @@ export const sessionAPI = {
   start: (projectId, data) => axios.post(`${API_BASE}/projects/${projectId}/session/start`, data),
   getStatus: (projectId) => axios.get(`${API_BASE}/projects/${projectId}/session/status`),
   submitFeedback: (projectId, data) => axios.post(`${API_BASE}/projects/${projectId}/session/feedback`, data),
+  resume: (projectId, data) => axios.post(`${API_BASE}/projects/${projectId}/session/resume`, data),
   cancel: (projectId) => axios.post(`${API_BASE}/projects/${projectId}/session/cancel`),
 };
 
+// Jobs API: session start/feedback return 202 with a job to poll
+export const jobsAPI = {
+  list: (projectId) => axios.get(`${API_BASE}/jobs`, { params: { project_id: projectId } }),
+  get: (jobId) => axios.get(`${API_BASE}/jobs/${jobId}`),
+};
+
+const FINISHED_JOB_STATUSES = ['succeeded', 'failed', 'cancelled'];
+const jobWakers = new Map();
+
+// Called on WebSocket job events so waitForJob polls right away
+export const notifyJobUpdate = (jobId) => {
+  const wake = jobWakers.get(jobId);
+  if (wake) wake();
+};
+
+// Poll a job until it finishes and return it
+export const waitForJob = async (jobId, intervalMs = 2000) => {
+  try {
+    for (;;) {
+      const { data: job } = await jobsAPI.get(jobId);
+      if (FINISHED_JOB_STATUSES.includes(job.status)) return job;
+      await new Promise((resolve) => {
+        const timer = window.setTimeout(resolve, intervalMs);
+        jobWakers.set(jobId, () => {
+          window.clearTimeout(timer);
+          resolve();
+        });
+      });
+    }
+  } finally {
+    jobWakers.delete(jobId);
+  }
+};
+
 // Drafts API
 export const draftsAPI = {
   listChapters: (projectId) => axios.get(`${API_BASE}/projects/${projectId}/drafts`),
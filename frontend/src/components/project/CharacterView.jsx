@@ -6,6 +6,7 @@ import { Plus, Edit2, User, Globe, Save, X } from 'lucide-react';
 export function CharacterView({ characters, onEdit, onSave, editing, onCancel }) {
   const [formData, setFormData] = useState({
     name: '',
+    aliases: [],
     identity: '',
     motivation: '',
     personality: [],
@@ -22,6 +23,7 @@ export function CharacterView({ characters, onEdit, onSave, editing, onCancel })
        // Reset form when not editing
        setFormData({
         name: '',
+        aliases: [],
         identity: '',
         motivation: '',
         personality: [],
@@ -110,6 +112,16 @@ export function CharacterView({ characters, onEdit, onSave, editing, onCancel })
                   </div>
                 </div>
                 
+                <div className="space-y-2">
+                  <label className="text-xs font-mono text-muted-foreground uppercase">别名 (逗号分隔)</label>
+                  <input
+                    type="text"
+                    value={Array.isArray(formData.aliases) ? formData.aliases.join(', ') : ''}
+                    onChange={(e) => setFormData({ ...formData, aliases: e.target.value.split(',').map(s => s.trim()) })}
+                    className="w-full bg-black/50 border border-border rounded px-3 py-2 text-white focus:border-primary focus:outline-none"
+                  />
+                </div>
+
                 <div className="space-y-2">
                   <label className="text-xs font-mono text-muted-foreground uppercase">动机</label>
                   <input
@@ -1,5 +1,5 @@
 import React, { useState, useEffect, useRef } from 'react';
-import { sessionAPI, createWebSocket } from '../../api';
+import { sessionAPI, createWebSocket, waitForJob, notifyJobUpdate } from '../../api';
 import { Button } from '../ui/Button';
 import { Card, CardHeader, CardTitle, CardContent } from '../ui/Card';
 import { Play, RotateCcw, Check, MessageSquare, AlertTriangle, Terminal, FileText, Send } from 'lucide-react';
@@ -8,6 +8,7 @@ export function WritingView({ projectId }) {
   const [status, setStatus] = useState('idle');
   const [messages, setMessages] = useState([]);
   const [currentDraft, setCurrentDraft] = useState(null);
+  const [streamingText, setStreamingText] = useState(null);
   const [review, setReview] = useState(null);
   const [feedback, setFeedback] = useState('');
   const [sessionData, setSessionData] = useState(null);
@@ -24,6 +25,12 @@ export function WritingView({ projectId }) {
   const [isSubmitting, setIsSubmitting] = useState(false);
   const wsRef = useRef(null);
   const logContainerRef = useRef(null);
+  // Events of other chapters' sessions share the project socket
+  const chapterRef = useRef(chapterInfo.chapter);
+
+  useEffect(() => {
+    chapterRef.current = chapterInfo.chapter;
+  }, [chapterInfo.chapter]);
 
   useEffect(() => {
     wsRef.current = createWebSocket(projectId, handleWebSocketMessage);
@@ -39,6 +46,29 @@ export function WritingView({ projectId }) {
   }, [messages]);
 
   const handleWebSocketMessage = (data) => {
+    if (data.type === 'job') {
+      notifyJobUpdate(data.job_id);
+      return;
+    }
+    if (data.chapter && data.chapter !== chapterRef.current) return;
+    if (data.type === 'draft_delta') {
+      // Writer streams draft text, editor streams its edit instructions
+      setStreamingText(prev =>
+        prev && prev.agent === data.agent && prev.baseVersion === data.base_version
+          ? { ...prev, text: prev.text + data.delta }
+          : { agent: data.agent, baseVersion: data.base_version, text: data.delta }
+      );
+      return;
+    }
+    if (data.type === 'stage_skipped') {
+      addMessage('system', data.message);
+      return;
+    }
+    if (data.type === 'post_processing') {
+      // Summary and canon updates after finalization; the session stays completed
+      addMessage(data.status === 'failed' ? 'error' : 'system', data.message);
+      return;
+    }
     if (data.status) {
       setStatus(data.status);
       addMessage('system', data.message);
@@ -55,29 +85,72 @@ export function WritingView({ projectId }) {
     setStatus('idle');
     setMessages([]);
     setCurrentDraft(null);
+    setStreamingText(null);
     setReview(null);
     setFeedback('');
     setSessionData(null);
   };
 
+  // Session requests return a job; its result arrives once the job finishes
+  const runJob = async (request) => {
+    const { data } = await request;
+    const job = await waitForJob(data.job_id);
+    return job.result || { success: false, error: job.error };
+  };
+
   const startSession = async (e) => {
     e.preventDefault();
     setIsStarting(true);
     setStatus('starting');
     setMessages([]);
+    setStreamingText(null);
     addMessage('user', `INITIATING_SESSION: ${chapterInfo.chapter_title}`);
     
     try {
-      const response = await sessionAPI.start(projectId, chapterInfo);
-      setSessionData(response.data);
+      const result = await runJob(sessionAPI.start(projectId, chapterInfo));
+      setSessionData(result);
       
-      if (response.data.success) {
+      if (result.success) {
         setIsStarted(true);
-        setCurrentDraft(response.data.draft_v2);
-        setReview(response.data.review);
+        setCurrentDraft(result.draft_v2);
+        setStreamingText(null);
+        setReview(result.review);
         setStatus('waiting_feedback');
       } else {
-        addMessage('error', 'SESSION_START_FAILED: ' + response.data.error);
+        addMessage('error', 'SESSION_START_FAILED: ' + result.error);
+        setStatus('error');
+      }
+    } catch (error) {
+      addMessage('error', 'SYSTEM_ERROR: ' + (error.response?.data?.detail || error.message));
+      setStatus('error');
+    } finally {
+      setIsStarting(false);
+    }
+  };
+
+  // Picks up a session interrupted by a restart; completed stages are not redone
+  const resumeSession = async () => {
+    setIsStarting(true);
+    setStatus('starting');
+    setMessages([]);
+    setStreamingText(null);
+    addMessage('user', `RESUMING_SESSION: ${chapterInfo.chapter}`);
+
+    try {
+      const result = await runJob(sessionAPI.resume(projectId, { chapter: chapterInfo.chapter }));
+      setSessionData(result);
+
+      if (result.success) {
+        setIsStarted(true);
+        setCurrentDraft(result.draft_v2 || result.draft || result.final_draft || null);
+        setStreamingText(null);
+        if (result.review) setReview(result.review);
+        setStatus(result.status);
+        if (result.resumed_stages?.length) {
+          addMessage('system', `RESUMED_STAGES: ${result.resumed_stages.join(', ')}`);
+        }
+      } else {
+        addMessage('error', 'RESUME_FAILED: ' + result.error);
         setStatus('error');
       }
     } catch (error) {
@@ -97,31 +170,32 @@ export function WritingView({ projectId }) {
         setStatus('finalizing');
       }
 
-      const response = await sessionAPI.submitFeedback(projectId, {
+      const result = await runJob(sessionAPI.submitFeedback(projectId, {
         chapter: chapterInfo.chapter,
         feedback: feedback,
         action: action
-      });
+      }));
       
       if (action === 'confirm') {
-        if (response.data?.success) {
+        if (result?.success) {
           addMessage('system', 'CHAPTER_FINALIZED_SUCCESSFULLY');
           setStatus('completed');
           // Optional: Navigate or reset
         } else {
-          addMessage('error', 'FINALIZE_ERROR: ' + (response.data?.error || 'Unknown error'));
+          addMessage('error', 'FINALIZE_ERROR: ' + (result?.error || 'Unknown error'));
           setStatus('waiting_feedback');
         }
       } else {
         addMessage('user', `FEEDBACK_SUBMITTED: ${feedback}`);
         addMessage('system', 'REVISION_IN_PROGRESS...');
         
-        if (response.data.success) {
-          setCurrentDraft(response.data.draft);
-          addMessage('system', `REVISION_COMPLETE (${response.data.version})`);
+        if (result.success) {
+          setCurrentDraft(result.draft);
+          setStreamingText(null);
+          addMessage('system', `REVISION_COMPLETE (${result.version})`);
           setFeedback('');
         } else {
-          addMessage('error', 'REVISION_FAILED: ' + (response.data?.error || 'Unknown error'));
+          addMessage('error', 'REVISION_FAILED: ' + (result?.error || 'Unknown error'));
         }
       }
     } catch (error) {
@@ -191,6 +265,9 @@ export function WritingView({ projectId }) {
                 <Button type="submit" disabled={isStarting} className="w-full font-mono font-bold">
                   {isStarting ? '初始化中...' : '开始会话'}
                 </Button>
+                <Button type="button" onClick={resumeSession} disabled={isStarting} variant="outline" className="w-full font-mono">
+                  恢复中断的会话
+                </Button>
               </form>
             ) : (
               <div className="space-y-4">
@@ -267,7 +344,18 @@ export function WritingView({ projectId }) {
           </CardHeader>
           
           <div className="flex-1 overflow-y-auto p-6 space-y-6 custom-scrollbar">
-            {!currentDraft ? (
+            {streamingText && (!currentDraft || streamingText.agent === 'editor') ? (
+              <div className="space-y-2">
+                <div className="font-mono text-xs uppercase opacity-50 text-muted-foreground">
+                  {streamingText.agent === 'writer' ? '撰稿人正在撰写...' : '编辑正在生成修订指令...'}
+                </div>
+                <div className={`max-w-none whitespace-pre-wrap leading-relaxed text-gray-300 ${
+                  streamingText.agent === 'writer' ? 'prose prose-invert font-serif' : 'font-mono text-xs'
+                }`}>
+                  {streamingText.text}
+                </div>
+              </div>
+            ) : !currentDraft ? (
               <div className="h-full flex flex-col items-center justify-center text-muted-foreground opacity-30">
                 <Terminal size={48} className="mb-4" />
                 <div className="font-mono">等待内容生成...</div>